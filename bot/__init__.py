@@ -24,6 +24,9 @@ from qbittorrentapi import Client as QbClient
 from tzlocal import get_localzone
 from uvloop import install
 
+from .core.task_queue import TaskQueue
+from .core.task_registry import TaskRegistry
+
 # from faulthandler import enable as faulthandler_enable
 # faulthandler_enable()
 
@@ -74,15 +77,15 @@ basicConfig(handlers=[file_handler, stream_handler], level=INFO)
 
 LOGGER = getLogger(__name__)
 
-intervals = {"status": {}, "qb": "", "jd": "", "stopAll": False}
+intervals = {"status": "", "qb": "", "jd": "", "stopAll": False}
 qb_torrents = {}
 user_data = {}
 aria2_options = {}
 qbit_options = {}
-queued_dl = {}
-queued_up = {}
+queued_dl = TaskQueue()
+queued_up = TaskQueue()
 status_dict = {}
-task_dict = {}
+task_dict = TaskRegistry()
 jd_downloads = {}
 rss_dict = {}
 non_queued_dl = set()
@@ -91,7 +94,6 @@ multi_tags = set()
 task_dict_lock = Lock()
 queue_dict_lock = Lock()
 qb_listener_lock = Lock()
-cpu_eater_lock = Lock()
 same_directory_lock = Lock()
 jd_listener_lock = Lock()
 extension_filter = ["aria2", "!qB"]
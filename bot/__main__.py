@@ -32,6 +32,7 @@ from .helper.ext_utils.files_utils import clean_all, exit_clean_up
 from .helper.ext_utils.jdownloader_booter import jdownloader
 from .helper.ext_utils.telegraph_helper import telegraph
 from .helper.listeners.aria2_listener import start_aria2_listener
+from .helper.mirror_leech_utils.gdrive_utils.index import drive_index
 from .helper.mirror_leech_utils.rclone_utils.serve import rclone_serve_booter
 from .helper.telegram_helper.bot_commands import BotCommands
 from .helper.telegram_helper.filters import CustomFilters
@@ -116,7 +117,11 @@ async def set_commands():
 
 # Main Function
 async def main():
-    await gather(TgClient.start_bot(), TgClient.start_user())
+    await gather(
+        TgClient.start_bot(),
+        TgClient.start_user(),
+        TgClient.start_helpers(),
+    )
     await gather(load_configurations(), update_variables())
     await gather(
         sync_to_async(update_qb_options),
@@ -132,7 +137,8 @@ async def main():
         restart_notification(),
         telegraph.create_account(),
         rclone_serve_booter(),
-        sync_to_async(start_aria2_listener, wait=False),
+        start_aria2_listener(),
+        drive_index.start(),
     )
     create_help_buttons()
     add_handlers()
@@ -1,16 +1,19 @@
 from asyncio import Lock
+from typing import ClassVar
 
-from pyrogram import Client, enums
+from pyrogram import enums
 
 from bot import LOGGER
 
 from .config_manager import Config
+from .rate_governor import GovernedClient
 
 
 class TgClient:
     _lock = Lock()
     bot = None
     user = None
+    helpers: ClassVar[list] = []
     NAME = ""
     ID = 0
     IS_PREMIUM_USER = False
@@ -19,7 +22,7 @@ class TgClient:
     @classmethod
     async def start_bot(cls):
         LOGGER.info("Creating client from BOT_TOKEN")
-        cls.bot = Client(
+        cls.bot = GovernedClient(
             "bot",
             Config.TELEGRAM_API,
             Config.TELEGRAM_HASH,
@@ -36,7 +39,7 @@ class TgClient:
         if Config.USER_SESSION_STRING:
             LOGGER.info("Creating client from USER_SESSION_STRING")
             try:
-                cls.user = Client(
+                cls.user = GovernedClient(
                     "user",
                     Config.TELEGRAM_API,
                     Config.TELEGRAM_HASH,
@@ -54,6 +57,27 @@ class TgClient:
                 cls.IS_PREMIUM_USER = False
                 cls.user = None
 
+    @classmethod
+    async def start_helpers(cls):
+        """Extra bots that only upload leech files next to the main one."""
+        for index, token in enumerate(Config.HELPER_BOT_TOKENS.split(), start=1):
+            LOGGER.info(f"Creating helper client {index} from HELPER_BOT_TOKENS")
+            client = GovernedClient(
+                f"helper{index}",
+                Config.TELEGRAM_API,
+                Config.TELEGRAM_HASH,
+                bot_token=token,
+                parse_mode=enums.ParseMode.HTML,
+                no_updates=True,
+                max_concurrent_transmissions=10,
+            )
+            try:
+                await client.start()
+            except Exception as e:
+                LOGGER.error(f"Failed to start helper client {index}. {e}")
+                continue
+            cls.helpers.append(client)
+
     @classmethod
     async def stop(cls):
         async with cls._lock:
@@ -61,6 +85,8 @@ class TgClient:
                 await cls.bot.stop()
             if cls.user:
                 await cls.user.stop()
+            for client in cls.helpers:
+                await client.stop()
             LOGGER.info("Client stopped")
 
     @classmethod
@@ -69,4 +95,6 @@ class TgClient:
             await cls.bot.restart()
             if cls.user:
                 await cls.user.restart()
+            for client in cls.helpers:
+                await client.restart()
             LOGGER.info("Client restarted")
@@ -0,0 +1,242 @@
+import contextlib
+from asyncio import sleep, wait_for
+from base64 import b64encode
+from itertools import count
+from json import dumps, loads
+from os import path as ospath
+from typing import ClassVar
+
+from aiofiles import open as aiopen
+from aiofiles.os import path as aiopath
+from aiofiles.os import remove
+from aiohttp import ClientSession, WSMsgType
+
+from bot import LOGGER, bot_loop
+from bot.helper.ext_utils.exceptions import Aria2Error
+
+TERMINAL_EVENTS = ("onDownloadComplete", "onDownloadError", "onDownloadStop")
+
+
+def download_name(status):
+    if bittorrent := status.get("bittorrent"):
+        if info := bittorrent.get("info"):
+            return info["name"]
+        return f"[METADATA]{status.get('infoHash', '')}"
+    files = status.get("files") or []
+    if not files:
+        return status.get("gid", "")
+    if path := files[0].get("path"):
+        if path.startswith("[METADATA]"):
+            return path
+        if status.get("dir"):
+            return ospath.relpath(path, status["dir"]).split("/", 1)[0]
+        return ospath.basename(path)
+    if uris := files[0].get("uris"):
+        return uris[0]["uri"].split("?", 1)[0].rsplit("/", 1)[-1]
+    return status.get("gid", "")
+
+
+class Aria2Client:
+    """Native asyncio JSON-RPC client for aria2.
+
+    A single WebSocket connection carries both method calls and aria2's
+    notifications, falling back to plain HTTP while the socket is down.
+    """
+
+    URL = "http://localhost:6800/jsonrpc"
+    WS_URL = "ws://localhost:6800/jsonrpc"
+    SECRET = ""
+    _ids = count(1)
+    _session = None
+    _ws = None
+    _listener = None
+    _pending: ClassVar[dict] = {}
+    _handlers: ClassVar[dict] = {}
+    _waiters: ClassVar[dict] = {}
+
+    @classmethod
+    async def start(cls):
+        if cls._session is None:
+            cls._session = ClientSession()
+        if cls._listener is None:
+            cls._listener = bot_loop.create_task(cls._listen())
+
+    @classmethod
+    def on(cls, event, handler):
+        cls._handlers[event] = handler
+
+    @classmethod
+    async def _listen(cls):
+        while True:
+            try:
+                async with cls._session.ws_connect(
+                    cls.WS_URL,
+                    heartbeat=30,
+                    max_msg_size=0,
+                ) as ws:
+                    cls._ws = ws
+                    LOGGER.info("Aria2 notification channel connected")
+                    async for msg in ws:
+                        if msg.type != WSMsgType.TEXT:
+                            break
+                        cls._dispatch(loads(msg.data))
+            except Exception as e:
+                LOGGER.error(f"Aria2 WebSocket: {e}")
+            cls._ws = None
+            for future in cls._pending.values():
+                if not future.done():
+                    future.set_exception(ConnectionError("Aria2 WebSocket closed"))
+            cls._pending.clear()
+            await sleep(3)
+
+    @classmethod
+    def _dispatch(cls, data):
+        if isinstance(data, list):
+            for item in data:
+                cls._dispatch(item)
+            return
+        if data.get("id") is not None:
+            future = cls._pending.pop(data["id"], None)
+            if future is None or future.done():
+                return
+            if error := data.get("error"):
+                future.set_exception(Aria2Error(error.get("message")))
+            else:
+                future.set_result(data.get("result"))
+            return
+        event = data.get("method", "").removeprefix("aria2.")
+        for param in data.get("params", []):
+            gid = param.get("gid")
+            if event in TERMINAL_EVENTS:
+                for future in cls._waiters.pop(gid, []):
+                    if not future.done():
+                        future.set_result(event)
+            if handler := cls._handlers.get(event):
+                bot_loop.create_task(handler(gid))
+
+    @classmethod
+    def _params(cls, params):
+        return [f"token:{cls.SECRET}", *params] if cls.SECRET else list(params)
+
+    @classmethod
+    async def call(cls, method, *params):
+        id_ = next(cls._ids)
+        payload = {
+            "jsonrpc": "2.0",
+            "id": id_,
+            "method": method,
+            "params": cls._params(params),
+        }
+        if cls._ws is not None and not cls._ws.closed:
+            future = bot_loop.create_future()
+            cls._pending[id_] = future
+            try:
+                await cls._ws.send_str(dumps(payload))
+                return await wait_for(future, 60)
+            finally:
+                cls._pending.pop(id_, None)
+        if cls._session is None:
+            cls._session = ClientSession()
+        async with cls._session.post(cls.URL, json=payload) as resp:
+            data = await resp.json(content_type=None)
+        if error := data.get("error"):
+            raise Aria2Error(error.get("message"))
+        return data.get("result")
+
+    @classmethod
+    async def multicall(cls, calls):
+        """Run [(method, [params]), ...] in one `system.multicall` round trip.
+        Failed entries are returned as Aria2Error instances."""
+        results = await cls.call(
+            "system.multicall",
+            [
+                {"methodName": method, "params": cls._params(params)}
+                for method, params in calls
+            ],
+        )
+        return [
+            Aria2Error(res.get("faultString")) if isinstance(res, dict) else res[0]
+            for res in results
+        ]
+
+    @classmethod
+    def wait_for_gid(cls, gid):
+        """Future resolved with the event name once gid completes, fails or
+        is stopped."""
+        future = bot_loop.create_future()
+        cls._waiters.setdefault(gid, []).append(future)
+        return future
+
+    @classmethod
+    def discard_waiter(cls, gid, future):
+        if gid in cls._waiters:
+            if future in cls._waiters[gid]:
+                cls._waiters[gid].remove(future)
+            if not cls._waiters[gid]:
+                del cls._waiters[gid]
+
+    @classmethod
+    async def add(cls, link, options):
+        if await aiopath.isfile(link):
+            async with aiopen(link, "rb") as f:
+                content = b64encode(await f.read()).decode()
+            if link.lower().endswith((".meta4", ".metalink")):
+                return (await cls.call("aria2.addMetalink", content, options))[0]
+            return await cls.call("aria2.addTorrent", content, [], options)
+        return await cls.call("aria2.addUri", [link], options)
+
+    @classmethod
+    async def add_uris(cls, uris, options, position=None):
+        if position is None:
+            return await cls.call("aria2.addUri", uris, options)
+        return await cls.call("aria2.addUri", uris, options, position)
+
+    @classmethod
+    async def tell_status(cls, gid, keys=None):
+        if keys:
+            return await cls.call("aria2.tellStatus", gid, keys)
+        return await cls.call("aria2.tellStatus", gid)
+
+    @classmethod
+    async def get_option(cls, gid):
+        return await cls.call("aria2.getOption", gid)
+
+    @classmethod
+    async def change_option(cls, gid, options):
+        return await cls.call("aria2.changeOption", gid, options)
+
+    @classmethod
+    async def force_pause(cls, gid):
+        return await cls.call("aria2.forcePause", gid)
+
+    @classmethod
+    async def unpause(cls, gid):
+        return await cls.call("aria2.unpause", gid)
+
+    @classmethod
+    async def remove(cls, gid, files=False):
+        try:
+            status = await cls.tell_status(gid, ["status", "files"])
+        except Aria2Error:
+            return
+        except Exception as e:
+            LOGGER.error(f"Aria2 remove: {e} GID: {gid}")
+            return
+        if status["status"] in ["active", "waiting", "paused"]:
+            try:
+                await cls.call("aria2.forceRemove", gid)
+            except Aria2Error as e:
+                LOGGER.error(f"Aria2 remove: {e} GID: {gid}")
+        with contextlib.suppress(Aria2Error):
+            await cls.call("aria2.removeDownloadResult", gid)
+        if not files:
+            return
+        for file_o in status.get("files", []):
+            if not (path := file_o.get("path")) or path.startswith("[METADATA]"):
+                continue
+            for f_path in (path, f"{path}.aria2"):
+                if await aiopath.isfile(f_path):
+                    try:
+                        await remove(f_path)
+                    except Exception as e:
+                        LOGGER.error(f"Aria2 remove: {e} Path: {f_path}")
@@ -16,14 +16,21 @@ class Config:
     EXTENSION_FILTER = ""
     FFMPEG_CMDS: ClassVar[dict[str, list[str]]] = {}
     FILELION_API = ""
+    GDRIVE_CLONE_WORKERS = 4
+    GDRIVE_DOWNLOAD_WORKERS = 4
     GDRIVE_ID = ""
+    GDRIVE_INDEX_INTERVAL = 0
+    GDRIVE_UPLOAD_WORKERS = 4
+    HELPER_BOT_TOKENS = ""
     INCOMPLETE_TASK_NOTIFIER = False
     INDEX_URL = ""
     JD_EMAIL = ""
     JD_PASS = ""
     IS_TEAM_DRIVE = False
+    LEECH_CACHE = True
     LEECH_DUMP_CHAT = ""
     LEECH_FILENAME_PREFIX = ""
+    LEECH_PARALLEL_UPLOADS = 4
     LEECH_SPLIT_SIZE = 2097152000
     MEDIA_GROUP = False
     MIXED_LEECH = False
@@ -46,6 +53,7 @@ class Config:
     SUDO_USERS = ""
     TELEGRAM_API = 0
     TELEGRAM_HASH = ""
+    TELEGRAM_DL_CONNECTIONS = 4
     THUMBNAIL_LAYOUT = ""
     TORRENT_TIMEOUT = 0
     USER_TRANSMISSION = False
@@ -0,0 +1,160 @@
+from asyncio import sleep
+from functools import partial
+from time import monotonic
+
+from cachetools import TTLCache
+from pyrogram import Client, raw, utils
+from pyrogram.errors import FloodPremiumWait, FloodWait
+
+from bot import LOGGER
+
+LOW, NORMAL, HIGH = range(3)
+
+LOW_CALLS = (
+    raw.functions.messages.EditMessage,
+    raw.functions.messages.EditInlineBotMessage,
+)
+HIGH_CALLS = (
+    raw.functions.messages.SendMedia,
+    raw.functions.messages.SendMultiMedia,
+    raw.functions.messages.ForwardMessages,
+    raw.functions.messages.UploadMedia,
+)
+
+
+class TokenBucket:
+    """`rate` calls a second with bursts of up to `burst`.
+
+    A FloodWait blocks the bucket for the time Telegram asked for and halves
+    its rate, every call that goes through afterwards wins a little of it
+    back.
+    """
+
+    __slots__ = ("base", "blocked_until", "burst", "rate", "stamp", "tokens")
+
+    def __init__(self, rate, burst):
+        self.base = self.rate = rate
+        self.burst = self.tokens = burst
+        self.stamp = monotonic()
+        self.blocked_until = 0
+
+    def delay(self, now, reserve):
+        """Seconds until a call that leaves `reserve` of the burst can run."""
+        self.tokens = min(self.burst, self.tokens + (now - self.stamp) * self.rate)
+        self.stamp = now
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        need = 1 + reserve * self.burst
+        return 0 if self.tokens >= need else (need - self.tokens) / self.rate
+
+    def take(self):
+        self.tokens -= 1
+
+    def flood(self, now, seconds):
+        self.blocked_until = max(self.blocked_until, now + seconds)
+        self.rate = max(self.base / 16, self.rate / 2)
+        self.tokens = 0
+
+    def recover(self):
+        self.rate = min(self.base, self.rate * 1.05)
+
+
+class RateGovernor:
+    """Paces the API calls of one client with a global bucket and one per chat.
+
+    Uploads and copies are served first. Status edits only run while a
+    chat has most of its burst left, so they give way as soon as anything
+    else is busy there. FloodWaits are waited out and retried here, except
+    for status edits and waits longer than MAX_WAIT, which are raised to the
+    caller.
+    """
+
+    GLOBAL = (30, 30)
+    PRIVATE = (1, 5)
+    GROUP = (1, 10)
+    RESERVE = (0.5, 0.2, 0)
+    MAX_WAIT = 60
+
+    def __init__(self):
+        self._global = TokenBucket(*self.GLOBAL)
+        self._chats = TTLCache(maxsize=10000, ttl=3600)
+
+    def slowdown(self, chat_id):
+        """How many times less often than usual chat_id should be written to.
+
+        Infinite while a FloodWait blocks the chat.
+        """
+        peer_type = utils.get_peer_type(chat_id)
+        raw_id = utils.get_channel_id(chat_id) if peer_type == "channel" else chat_id
+        if (bucket := self._chats.get((peer_type, abs(raw_id)))) is None:
+            return 1
+        if monotonic() < bucket.blocked_until:
+            return float("inf")
+        return bucket.base / bucket.rate
+
+    @staticmethod
+    def priority(query):
+        if isinstance(query, LOW_CALLS):
+            return LOW
+        if isinstance(query, HIGH_CALLS):
+            return HIGH
+        return NORMAL
+
+    def _buckets(self, query):
+        for attr in ("peer", "to_peer", "channel"):
+            if (peer := getattr(query, attr, None)) is not None:
+                break
+        else:
+            return (self._global,)
+        if hasattr(peer, "channel_id"):
+            key, limits = ("channel", peer.channel_id), self.GROUP
+        elif hasattr(peer, "chat_id"):
+            key, limits = ("chat", peer.chat_id), self.GROUP
+        else:
+            key, limits = ("user", getattr(peer, "user_id", 0)), self.PRIVATE
+        if (bucket := self._chats.get(key)) is None:
+            bucket = self._chats[key] = TokenBucket(*limits)
+        return (self._global, bucket)
+
+    async def _acquire(self, buckets, priority):
+        reserve = self.RESERVE[priority]
+        while True:
+            now = monotonic()
+            if (wait := max(bucket.delay(now, reserve) for bucket in buckets)) <= 0:
+                for bucket in buckets:
+                    bucket.take()
+                return
+            await sleep(wait)
+
+    async def run(self, query, call):
+        priority = self.priority(query)
+        buckets = self._buckets(query)
+        while True:
+            await self._acquire(buckets, priority)
+            try:
+                result = await call()
+            except (FloodWait, FloodPremiumWait) as f:
+                buckets[-1].flood(monotonic(), f.value)
+                if priority == LOW or f.value > self.MAX_WAIT:
+                    raise
+                LOGGER.warning(f"{f}. Retrying {type(query).__name__}")
+                continue
+            for bucket in buckets:
+                bucket.recover()
+            return result
+
+
+class GovernedClient(Client):
+    """Client whose API calls all go through its own RateGovernor."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.governor = RateGovernor()
+
+    async def invoke(self, query, *args, **kwargs):
+        # Keep the session from sleeping on FloodWaits, the governor does that
+        kwargs["sleep_threshold"] = 0
+        return await self.governor.run(
+            query,
+            partial(super().invoke, query, *args[:2], **kwargs),
+        )
@@ -0,0 +1,105 @@
+from asyncio import Lock, create_subprocess_exec, sleep
+from asyncio.subprocess import DEVNULL
+from contextlib import suppress
+from secrets import token_hex
+from socket import socket
+from time import monotonic
+from typing import ClassVar
+
+from aiohttp import BasicAuth, ClientSession
+
+from bot import LOGGER
+from bot.helper.ext_utils.exceptions import RcloneError
+
+
+def _free_port():
+    with socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class RcloneClient:
+    """Long-lived `xone rcd` daemons driven over rclone's JSON RC API.
+
+    A daemon is started for each config file the first time a transfer
+    needs it and is kept for the following ones, so jobs skip the process
+    start and config parsing of the CLI. Per-task options go with each call
+    as `_config`. Daemons nobody called for IDLE_TIMEOUT are stopped.
+    """
+
+    IDLE_TIMEOUT = 600
+    _auth = BasicAuth("mltb", token_hex(16))
+    _session = None
+    _lock = Lock()
+    _daemons: ClassVar[dict] = {}
+
+    @classmethod
+    def _stop(cls, config_path):
+        proc, _, _ = cls._daemons.pop(config_path)
+        if proc.returncode is None:
+            LOGGER.info(f"Stopping rclone rcd for {config_path}")
+            with suppress(ProcessLookupError):
+                proc.terminate()
+
+    @classmethod
+    def stop_all(cls):
+        for config_path in list(cls._daemons):
+            cls._stop(config_path)
+
+    @classmethod
+    async def _url(cls, config_path):
+        async with cls._lock:
+            if cls._session is None:
+                cls._session = ClientSession(auth=cls._auth)
+            now = monotonic()
+            for path, (_, _, used) in list(cls._daemons.items()):
+                if path != config_path and now - used > cls.IDLE_TIMEOUT:
+                    cls._stop(path)
+            if config_path in cls._daemons:
+                proc, port, _ = cls._daemons[config_path]
+                if proc.returncode is None:
+                    cls._daemons[config_path] = (proc, port, now)
+                    return f"http://127.0.0.1:{port}/"
+            port = _free_port()
+            url = f"http://127.0.0.1:{port}/"
+            LOGGER.info(f"Starting rclone rcd for {config_path} on port {port}")
+            proc = await create_subprocess_exec(
+                "xone",
+                "rcd",
+                "--config",
+                config_path,
+                "--rc-addr",
+                f"127.0.0.1:{port}",
+                "--rc-user",
+                cls._auth.login,
+                "--rc-pass",
+                cls._auth.password,
+                "-v",
+                "--log-systemd",
+                "--log-file",
+                "rlog.txt",
+                stdout=DEVNULL,
+                stderr=DEVNULL,
+            )
+            cls._daemons[config_path] = (proc, port, now)
+            for _ in range(50):
+                try:
+                    async with cls._session.post(f"{url}rc/noop", json={}) as resp:
+                        if resp.status == 200:
+                            return url
+                except Exception:
+                    pass
+                if proc.returncode is not None:
+                    break
+                await sleep(0.2)
+            cls._stop(config_path)
+            raise RcloneError(f"rclone rcd for {config_path} didn't start")
+
+    @classmethod
+    async def call(cls, config_path, method, **params):
+        url = await cls._url(config_path)
+        async with cls._session.post(f"{url}{method}", json=params) as resp:
+            data = await resp.json(content_type=None)
+        if resp.status != 200:
+            raise RcloneError(data.get("error", f"{method}: HTTP {resp.status}"))
+        return data
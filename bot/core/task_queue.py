@@ -0,0 +1,103 @@
+from collections import deque
+from heapq import heappop, heappush
+from itertools import count
+from math import log2
+
+# Size a task's cost is measured in, tasks of unknown size like magnets
+# without metadata are costed as one
+UNIT = 1 << 30
+# How many later tasks of the same user a task's cost lets overtake it
+AGING = 8
+
+
+class TaskQueue:
+    """Queued tasks of one stage, served by weighted fair queuing across users.
+
+    Every user has a virtual clock that each started task advances by its
+    cost over the user's weight, and the user whose clock is furthest behind
+    is served next. Cost grows with the log of the size, so small tasks get
+    through while big ones wait. A user's own tasks go smallest first, but
+    one is only overtaken by the few queued shortly after it. Bumped tasks
+    go before all of them, in the order they were bumped.
+    """
+
+    def __init__(self):
+        self._seq = count()
+        self._tasks = {}
+        self._users = {}
+        self._clocks = {}
+        self._ready = []
+        self._bumped = deque()
+        self._vtime = 0
+
+    def __contains__(self, mid):
+        return mid in self._tasks
+
+    def __len__(self):
+        return len(self._tasks)
+
+    def add(self, mid, event, user_id, weight, size=0, bump=False):
+        cost = 1 + log2(1 + (size or UNIT) / UNIT)
+        seq = next(self._seq)
+        # [key, seq, mid, event, user_id, cost / weight], mid is None once removed
+        entry = [seq + cost * AGING, seq, mid, event, user_id, cost / weight]
+        self._tasks[mid] = entry
+        if bump:
+            self._bumped.append(entry)
+            return
+        if (heap := self._users.get(user_id)) is None:
+            heap = self._users[user_id] = []
+            start = max(self._vtime, self._clocks.pop(user_id, 0))
+            heappush(self._ready, (start, seq, user_id))
+        heappush(heap, entry)
+
+    def remove(self, mid):
+        """Drop mid from the queue and return its event, None if it isn't queued."""
+        if (entry := self._tasks.pop(mid, None)) is None:
+            return None
+        entry[2] = None
+        return entry[3]
+
+    def bump(self, mid):
+        """Move mid ahead of every task that wasn't bumped before it."""
+        if (entry := self._tasks.get(mid)) is None:
+            return False
+        entry[2] = None
+        seq = next(self._seq)
+        entry = self._tasks[mid] = [seq, seq, mid, entry[3], None, 0]
+        self._bumped.append(entry)
+        return True
+
+    def _pop_user(self):
+        while self._ready:
+            start, _, user_id = heappop(self._ready)
+            heap = self._users[user_id]
+            while heap and heap[0][2] is None:
+                heappop(heap)
+            if not heap:
+                del self._users[user_id]
+                continue
+            entry = heappop(heap)
+            self._vtime = start
+            finish = start + entry[5]
+            while heap and heap[0][2] is None:
+                heappop(heap)
+            if heap:
+                heappush(self._ready, (finish, next(self._seq), user_id))
+            else:
+                del self._users[user_id]
+                self._clocks[user_id] = finish
+            return entry
+        return None
+
+    def pop(self):
+        """Remove the task that should start next and return (mid, event)."""
+        while self._bumped:
+            entry = self._bumped.popleft()
+            if entry[2] is not None:
+                break
+        else:
+            if (entry := self._pop_user()) is None:
+                return None
+        del self._tasks[entry[2]]
+        return entry[2], entry[3]
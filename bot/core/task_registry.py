@@ -0,0 +1,109 @@
+class GidTrie:
+    """Prefix tree from gids to the keys of the tasks that have them.
+
+    Every node keeps the keys of all gids below it in insertion order, so
+    a prefix lookup is a walk down the prefix.
+    """
+
+    __slots__ = ("_root",)
+
+    def __init__(self):
+        self._root = ({}, {})
+
+    def add(self, gid, key):
+        node = self._root
+        for char in gid:
+            node = node[0].setdefault(char, ({}, {}))
+            node[1][key] = None
+
+    def remove(self, gid, key):
+        node = self._root
+        path = []
+        for char in gid:
+            if (child := node[0].get(char)) is None:
+                break
+            child[1].pop(key, None)
+            path.append((node, char, child))
+            node = child
+        for parent, char, child in reversed(path):
+            if child[1]:
+                break
+            del parent[0][char]
+
+    def find(self, prefix):
+        node = self._root
+        for char in prefix:
+            if (node := node[0].get(char)) is None:
+                return None
+        return next(iter(node[1]), None)
+
+
+class TaskRegistry(dict):
+    """task_dict, indexed by gid prefix and by user.
+
+    The indexes follow every insert, replace and delete. gids that change
+    after a task is added, like an aria2 magnet followed by its torrent,
+    are picked up by reindex().
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._gids = {}
+        self._trie = GidTrie()
+        self._users = {}
+
+    def _index(self, key, task):
+        gid = task.gid()
+        self._gids[key] = gid
+        self._trie.add(gid, key)
+        self._users.setdefault(task.listener.user_id, {})[key] = None
+
+    def _unindex(self, key, task):
+        if (gid := self._gids.pop(key, None)) is not None:
+            self._trie.remove(gid, key)
+        user_id = task.listener.user_id
+        if (keys := self._users.get(user_id)) is not None:
+            keys.pop(key, None)
+            if not keys:
+                del self._users[user_id]
+
+    def __setitem__(self, key, task):
+        if key in self:
+            self._unindex(key, self[key])
+        super().__setitem__(key, task)
+        self._index(key, task)
+
+    def __delitem__(self, key):
+        self._unindex(key, self[key])
+        super().__delitem__(key)
+
+    def pop(self, key, *default):
+        if key in self:
+            self._unindex(key, self[key])
+        return super().pop(key, *default)
+
+    def clear(self):
+        super().clear()
+        self._gids.clear()
+        self._trie = GidTrie()
+        self._users.clear()
+
+    def reindex(self):
+        """Move the tasks whose gid changed since they were added."""
+        for key, task in self.items():
+            if (gid := task.gid()) != self._gids[key]:
+                self._trie.remove(self._gids[key], key)
+                self._trie.add(gid, key)
+                self._gids[key] = gid
+
+    def by_gid(self, prefix):
+        """The first task whose gid starts with prefix, None if there's none."""
+        for _ in range(2):
+            key = self._trie.find(prefix)
+            if key is not None and self[key].gid().startswith(prefix):
+                return self[key]
+            self.reindex()
+        return None
+
+    def by_user(self, user_id):
+        return [self[key] for key in self._users.get(user_id, ())]
@@ -1,42 +1,29 @@
-import json
 import os
-from asyncio import create_subprocess_exec
-from asyncio.subprocess import PIPE
 
 from bot import LOGGER
+from bot.helper.ext_utils.media_utils import get_probe_data
 
 
 async def get_streams(file):
-    cmd = [
-        "ffprobe",
-        "-hide_banner",
-        "-loglevel",
-        "error",
-        "-print_format",
-        "json",
-        "-show_streams",
-        file,
-    ]
-    process = await create_subprocess_exec(*cmd, stdout=PIPE, stderr=PIPE)
-    stdout, stderr = await process.communicate()
-
-    if process.returncode != 0:
-        LOGGER.error(f"Error getting stream info: {stderr.decode().strip()}")
+    data = await get_probe_data(file)
+    if data is None:
         return None
-
-    try:
-        return json.loads(stdout)["streams"]
-    except KeyError:
+    if "streams" not in data:
         LOGGER.error(
-            f"No streams found in the ffprobe output: {stdout.decode().strip()}",
+            f"No streams found in the ffprobe output: {data.get('stderr', '')}",
         )
         return None
+    return data["streams"]
+
+
+def _watermark_filter(key):
+    font_path = "default.otf"
+    return f"drawtext=text='{key}':fontfile={font_path}:fontsize=20:fontcolor=white:x=10:y=10"
 
 
 # Lots of work need
 async def get_watermark_cmd(file, key):
     temp_file = f"{file}.temp.mkv"
-    font_path = "default.otf"
 
     cmd = [
         "xtra",
@@ -48,7 +35,7 @@ async def get_watermark_cmd(file, key):
         "-i",
         file,
         "-vf",
-        f"drawtext=text='{key}':fontfile={font_path}:fontsize=20:fontcolor=white:x=10:y=10",
+        _watermark_filter(key),
         # "-preset",
         # "ultrafast",
         "-threads",
@@ -158,6 +145,85 @@ async def get_metadata_cmd(file_path, key):
     return cmd, temp_file
 
 
+FOLD_BLOCKED_OPTS = (
+    "-map",
+    "-c",
+    "-codec",
+    "-vcodec",
+    "-acodec",
+    "-scodec",
+    "-vf",
+    "-af",
+    "-filter",
+    "-lavfi",
+    "-f",
+    "-ss",
+    "-t",
+    "-to",
+    "-vn",
+    "-an",
+    "-sn",
+)
+
+
+def fold_ffmpeg_cmd(cmd):
+    """Output options of a user ffmpeg cmd that can be added to the metadata
+    and watermark pass, or None if it can't be merged.
+
+    Only in-place edits of mkv files qualify: `-i mltb.mkv ... mltb.mkv -del`
+    (or `mltb` as output), without input, stream selection, codec or filter
+    options.
+    """
+    if "-del" not in cmd or cmd.count("-i") != 1:
+        return None
+    cmd = [arg for arg in cmd if arg != "-del"]
+    if cmd[0] != "-i" or len(cmd) < 2 or cmd[1].lower() != "mltb.mkv":
+        return None
+    args = cmd[2:]
+    if not args or args[-1].lower() not in ("mltb", "mltb.mkv"):
+        return None
+    args = args[:-1]
+    if any(arg.startswith(FOLD_BLOCKED_OPTS) for arg in args if arg[:1] == "-"):
+        return None
+    return args
+
+
+async def get_combined_cmd(file_path, watermark="", metadata="", extra_args=()):
+    """Single ffmpeg cmd applying metadata tags, the watermark and folded
+    FFMPEG_CMDS options to file_path, so it's rewritten only once."""
+    cmd = None
+    if metadata:
+        cmd, temp_file = await get_metadata_cmd(file_path, metadata)
+    if cmd is None:
+        if not watermark:
+            if not extra_args:
+                return None, None
+            # Nothing to tag or watermark, the folded cmds run on their own
+            temp_file = f"{file_path}.temp.mkv"
+            return [
+                "xtra",
+                "-hide_banner",
+                "-loglevel",
+                "error",
+                "-progress",
+                "pipe:1",
+                "-i",
+                file_path,
+                *extra_args,
+                "-threads",
+                f"{max(1, os.cpu_count() // 2)}",
+                temp_file,
+            ], temp_file
+        cmd, temp_file = await get_watermark_cmd(file_path, watermark)
+    elif watermark:
+        index = cmd.index("-c") + 2
+        cmd[index:index] = ["-c:v", "libx264", "-vf", _watermark_filter(watermark)]
+    if extra_args:
+        index = cmd.index("-threads")
+        cmd[index:index] = extra_args
+    return cmd, temp_file
+
+
 # later
 async def get_embed_thumb_cmd(file, attachment_path):
     temp_file = f"{file}.temp.mkv"
@@ -1,20 +1,20 @@
 import contextlib
 import os
-from asyncio import gather, sleep
+from asyncio import CancelledError, gather, sleep
 from os import path as ospath
 from os import walk
-from re import IGNORECASE, sub
+from re import IGNORECASE, escape, fullmatch, sub
 from secrets import token_hex
 from shlex import split
 
 from aiofiles.os import listdir, makedirs, remove
 from aiofiles.os import path as aiopath
 from aioshutil import move, rmtree
+from natsort import natsorted
 from pyrogram.enums import ChatAction
 
 from bot import (
     LOGGER,
-    cpu_eater_lock,
     extension_filter,
     intervals,
     multi_tags,
@@ -25,21 +25,22 @@ from bot import (
 from bot.core.aeon_client import TgClient
 from bot.core.config_manager import Config
 from bot.helper.aeon_utils.metadata_editor import (
+    fold_ffmpeg_cmd,
+    get_combined_cmd,
     get_embed_thumb_cmd,
-    get_metadata_cmd,
-    get_watermark_cmd,
 )
 
 from .ext_utils.bot_utils import get_size_bytes, new_task, sync_to_async
 from .ext_utils.bulk_links import extract_bulk_links
+from .ext_utils.cpu_scheduler import cpu_scheduler
 from .ext_utils.files_utils import (
     SevenZ,
+    byte_ranges,
     get_base_name,
     get_path_size,
     is_archive,
     is_archive_split,
     is_first_archive_split,
-    split_file,
 )
 from .ext_utils.links_utils import (
     is_gdrive_id,
@@ -51,6 +52,7 @@ from .ext_utils.media_utils import (
     FFMpeg,
     create_thumb,
     get_document_type,
+    invalidate_probe,
     is_mkv,
     take_ss,
 )
@@ -65,6 +67,41 @@ from .telegram_helper.message_utils import (
 )
 
 
+class PipelineState:
+    """The listener as seen by the processing half of a leech pipeline.
+
+    It has its own file name, size, progress flag and ffmpeg process, so
+    processing the next file doesn't overwrite what the upload's status
+    shows. Everything else, cancellation included, is the listener's.
+    """
+
+    def __init__(self, listener):
+        self._listener = listener
+        self.subname = ""
+        self.subsize = 0
+        self.proceed_count = 0
+        self.progress = True
+        self.subproc = None
+        self.cpu_threads = 0
+
+    def __getattr__(self, name):
+        return getattr(self._listener, name)
+
+    @property
+    def is_cancelled(self):
+        return self._listener.is_cancelled
+
+    @is_cancelled.setter
+    def is_cancelled(self, value):
+        self._listener.is_cancelled = value
+
+
+def _kill_subproc(listener):
+    if listener.subproc is not None and listener.subproc.returncode is None:
+        with contextlib.suppress(ProcessLookupError):
+            listener.subproc.kill()
+
+
 class TaskConfig:
     def __init__(self):
         self.mid = self.message.id
@@ -86,6 +123,8 @@ class TaskConfig:
         self.folder_name = ""
         self.split_size = 0
         self.max_split_size = 0
+        self.byte_splits = {}
+        self.cpu_threads = 0
         self.multi = 0
         self.size = 0
         self.subsize = 0
@@ -117,6 +156,7 @@ class TaskConfig:
         self.is_torrent = False
         self.as_med = False
         self.as_doc = False
+        self.no_cache = False
         self.is_file = False
         self.progress = True
         self.ffmpeg_cmds = None
@@ -608,7 +648,8 @@ class TaskConfig:
                     t_path = get_base_name(f_path) if self.is_file else dirpath
                     if not self.is_file:
                         self.subname = file_
-                    code = await sevenz.extract(f_path, t_path, pswd)
+                    async with cpu_scheduler.slot(self, cpu_scheduler.light):
+                        code = await sevenz.extract(f_path, t_path, pswd)
             if code == 0:
                 for file_ in files:
                     if is_archive_split(file_) or is_archive(file_):
@@ -625,148 +666,145 @@ class TaskConfig:
             [part.strip() for part in split(item) if part.strip()]
             for item in self.ffmpeg_cmds
         ]
-        try:
-            ffmpeg = FFMpeg(self)
-            for ffmpeg_cmd in cmds:
-                self.proceed_count = 0
-                cmd = [
-                    "xtra",
-                    "-hide_banner",
-                    "-loglevel",
-                    "error",
-                    "-progress",
-                    "pipe:1",
-                    "-threads",  # Should work
-                    "4",
-                    *ffmpeg_cmd,
-                ]
-                if "-del" in cmd:
-                    cmd.remove("-del")
-                    delete_files = True
-                else:
-                    delete_files = False
-                index = cmd.index("-i")
-                input_file = cmd[index + 1]
-                if input_file.endswith(".video"):
-                    ext = "video"
-                elif input_file.endswith(".audio"):
-                    ext = "audio"
-                elif "." not in input_file:
-                    ext = "all"
-                else:
-                    ext = ospath.splitext(input_file)[-1].lower()
-                if await aiopath.isfile(dl_path):
-                    is_video, is_audio, _ = await get_document_type(dl_path)
-                    if (not is_video and not is_audio) or (
-                        is_video and ext == "audio"
-                    ):
-                        break
-                    if (is_audio and not is_video and ext == "video") or (
-                        ext
-                        not in [
-                            "all",
-                            "audio",
-                            "video",
-                        ]
-                        and not dl_path.lower().endswith(ext)
-                    ):
-                        break
-                    new_folder = ospath.splitext(dl_path)[0]
-                    name = ospath.basename(dl_path)
-                    await makedirs(new_folder, exist_ok=True)
-                    file_path = f"{new_folder}/{name}"
-                    await move(dl_path, file_path)
-                    if not checked:
-                        checked = True
-                        async with task_dict_lock:
-                            task_dict[self.mid] = FFmpegStatus(
-                                self,
-                                ffmpeg,
-                                gid,
-                                "FFmpeg",
-                            )
-                        self.progress = False
-                        await cpu_eater_lock.acquire()
-                        self.progress = True
-                    LOGGER.info(f"Running ffmpeg cmd for: {file_path}")
-                    cmd[index + 1] = file_path
-                    self.subsize = self.size
+        ffmpeg = FFMpeg(self)
+        for ffmpeg_cmd in cmds:
+            self.proceed_count = 0
+            cmd = [
+                "xtra",
+                "-hide_banner",
+                "-loglevel",
+                "error",
+                "-progress",
+                "pipe:1",
+                "-threads",  # Should work
+                "4",
+                *ffmpeg_cmd,
+            ]
+            if "-del" in cmd:
+                cmd.remove("-del")
+                delete_files = True
+            else:
+                delete_files = False
+            index = cmd.index("-i")
+            input_file = cmd[index + 1]
+            if input_file.endswith(".video"):
+                ext = "video"
+            elif input_file.endswith(".audio"):
+                ext = "audio"
+            elif "." not in input_file:
+                ext = "all"
+            else:
+                ext = ospath.splitext(input_file)[-1].lower()
+            if await aiopath.isfile(dl_path):
+                is_video, is_audio, _ = await get_document_type(dl_path)
+                if (not is_video and not is_audio) or (is_video and ext == "audio"):
+                    break
+                if (is_audio and not is_video and ext == "video") or (
+                    ext
+                    not in [
+                        "all",
+                        "audio",
+                        "video",
+                    ]
+                    and not dl_path.lower().endswith(ext)
+                ):
+                    break
+                new_folder = ospath.splitext(dl_path)[0]
+                name = ospath.basename(dl_path)
+                await makedirs(new_folder, exist_ok=True)
+                file_path = f"{new_folder}/{name}"
+                await move(dl_path, file_path)
+                if not checked:
+                    checked = True
+                    async with task_dict_lock:
+                        task_dict[self.mid] = FFmpegStatus(
+                            self,
+                            ffmpeg,
+                            gid,
+                            "FFmpeg",
+                        )
+                LOGGER.info(f"Running ffmpeg cmd for: {file_path}")
+                cmd[index + 1] = file_path
+                self.subsize = self.size
+                self.progress = False
+                async with cpu_scheduler.slot(self, cpu_scheduler.cmd_slots(cmd)):
+                    self.progress = True
                     res = await ffmpeg.ffmpeg_cmds(cmd, file_path)
-                    if res:
-                        if delete_files:
-                            await remove(file_path)
-                            if len(await listdir(new_folder)) == 1:
-                                folder = new_folder.rsplit("/", 1)[0]
-                                self.name = ospath.basename(res[0])
-                                if self.name.startswith("ffmpeg"):
-                                    self.name = self.name.split(".", 1)[-1]
-                                dl_path = ospath.join(folder, self.name)
-                                await move(res[0], dl_path)
-                                await rmtree(new_folder)
-                            else:
-                                dl_path = new_folder
-                                self.name = new_folder.rsplit("/", 1)[-1]
+                if res:
+                    if delete_files:
+                        await remove(file_path)
+                        if len(await listdir(new_folder)) == 1:
+                            folder = new_folder.rsplit("/", 1)[0]
+                            self.name = ospath.basename(res[0])
+                            if self.name.startswith("ffmpeg"):
+                                self.name = self.name.split(".", 1)[-1]
+                            dl_path = ospath.join(folder, self.name)
+                            await move(res[0], dl_path)
+                            await rmtree(new_folder)
                         else:
                             dl_path = new_folder
                             self.name = new_folder.rsplit("/", 1)[-1]
                     else:
-                        await move(file_path, dl_path)
-                        await rmtree(new_folder)
+                        dl_path = new_folder
+                        self.name = new_folder.rsplit("/", 1)[-1]
                 else:
-                    for dirpath, _, files in await sync_to_async(
-                        walk,
-                        dl_path,
-                        topdown=False,
-                    ):
-                        for file_ in files:
-                            var_cmd = cmd.copy()
-                            if self.is_cancelled:
-                                return False
-                            f_path = ospath.join(dirpath, file_)
-                            is_video, is_audio, _ = await get_document_type(f_path)
-                            if (not is_video and not is_audio) or (
-                                is_video and ext == "audio"
-                            ):
-                                continue
-                            if (is_audio and not is_video and ext == "video") or (
-                                ext
-                                not in [
-                                    "all",
-                                    "audio",
-                                    "video",
-                                ]
-                                and not f_path.lower().endswith(ext)
-                            ):
-                                continue
-                            self.proceed_count += 1
-                            var_cmd[index + 1] = f_path
-                            if not checked:
-                                checked = True
-                                async with task_dict_lock:
-                                    task_dict[self.mid] = FFmpegStatus(
-                                        self,
-                                        ffmpeg,
-                                        gid,
-                                        "FFmpeg",
-                                    )
-                                self.progress = False
-                                await cpu_eater_lock.acquire()
-                                self.progress = True
-                            LOGGER.info(f"Running ffmpeg cmd for: {f_path}")
-                            self.subsize = await get_path_size(f_path)
-                            self.subname = file_
+                    await move(file_path, dl_path)
+                    await rmtree(new_folder)
+            else:
+                for dirpath, _, files in await sync_to_async(
+                    walk,
+                    dl_path,
+                    topdown=False,
+                ):
+                    for file_ in files:
+                        var_cmd = cmd.copy()
+                        if self.is_cancelled:
+                            return False
+                        f_path = ospath.join(dirpath, file_)
+                        is_video, is_audio, _ = await get_document_type(f_path)
+                        if (not is_video and not is_audio) or (
+                            is_video and ext == "audio"
+                        ):
+                            continue
+                        if (is_audio and not is_video and ext == "video") or (
+                            ext
+                            not in [
+                                "all",
+                                "audio",
+                                "video",
+                            ]
+                            and not f_path.lower().endswith(ext)
+                        ):
+                            continue
+                        self.proceed_count += 1
+                        var_cmd[index + 1] = f_path
+                        if not checked:
+                            checked = True
+                            async with task_dict_lock:
+                                task_dict[self.mid] = FFmpegStatus(
+                                    self,
+                                    ffmpeg,
+                                    gid,
+                                    "FFmpeg",
+                                )
+                        LOGGER.info(f"Running ffmpeg cmd for: {f_path}")
+                        self.subsize = await get_path_size(f_path)
+                        self.subname = file_
+                        self.progress = False
+                        async with cpu_scheduler.slot(
+                            self,
+                            cpu_scheduler.cmd_slots(var_cmd),
+                        ):
+                            self.progress = True
                             res = await ffmpeg.ffmpeg_cmds(var_cmd, f_path)
-                            if res and delete_files:
-                                await remove(f_path)
-                                if len(res) == 1:
-                                    file_name = ospath.basename(res[0])
-                                    if file_name.startswith("ffmpeg"):
-                                        newname = file_name.split(".", 1)[-1]
-                                        newres = ospath.join(dirpath, newname)
-                                        await move(res[0], newres)
-        finally:
-            if checked:
-                cpu_eater_lock.release()
+                        if res and delete_files:
+                            await remove(f_path)
+                            if len(res) == 1:
+                                file_name = ospath.basename(res[0])
+                                if file_name.startswith("ffmpeg"):
+                                    newname = file_name.split(".", 1)[-1]
+                                    newres = ospath.join(dirpath, newname)
+                                    await move(res[0], newres)
         return dl_path
 
     async def substitute(self, dl_path):
@@ -929,7 +967,7 @@ class TaskConfig:
             async with task_dict_lock:
                 task_dict[self.mid] = FFmpegStatus(self, ffmpeg, gid, "Convert")
             self.progress = False
-            async with cpu_eater_lock:
+            async with cpu_scheduler.slot(self, cpu_scheduler.total):
                 self.progress = True
                 for f_path, f_type in self.files_to_proceed.items():
                     self.proceed_count += 1
@@ -949,6 +987,7 @@ class TaskConfig:
                         except Exception:
                             self.is_cancelled = True
                             return False
+                        invalidate_probe(f_path)
                         if self.is_file:
                             return res
         return dl_path
@@ -985,7 +1024,7 @@ class TaskConfig:
             async with task_dict_lock:
                 task_dict[self.mid] = FFmpegStatus(self, ffmpeg, gid, "Sample Video")
             self.progress = False
-            async with cpu_eater_lock:
+            async with cpu_scheduler.slot(self, cpu_scheduler.total):
                 self.progress = True
                 LOGGER.info(f"Creating Sample video: {self.name}")
                 for f_path, file_ in self.files_to_proceed.items():
@@ -1026,7 +1065,8 @@ class TaskConfig:
         sevenz = SevenZ(self)
         async with task_dict_lock:
             task_dict[self.mid] = SevenZStatus(self, sevenz, gid, "Zip")
-        return await sevenz.zip(dl_path, up_path, pswd)
+        async with cpu_scheduler.slot(self, cpu_scheduler.light):
+            return await sevenz.zip(dl_path, up_path, pswd)
 
     async def proceed_split(self, dl_path, gid):
         self.files_to_proceed = {}
@@ -1057,157 +1097,196 @@ class TaskConfig:
                 else:
                     self.subsize = f_size
                     self.subname = file_
-                parts = -(-f_size // self.split_size)
-                split_size = self.split_size
-                if not self.as_doc and (await get_document_type(f_path))[0]:
-                    self.progress = True
-                    res = await ffmpeg.split(f_path, file_, parts, split_size)
-                else:
-                    self.progress = False
-                    res = await split_file(f_path, split_size, self)
+                await self._split_one(self, ffmpeg, f_path, f_size, file_)
                 if self.is_cancelled:
                     return False
-                if res or f_size >= self.max_split_size:
-                    try:
-                        await remove(f_path)
-                    except Exception:
-                        self.is_cancelled = True
             return None
         return None
 
-    async def proceed_metadata(self, dl_path, gid):
-        key = self.metadata
-        ffmpeg = FFMpeg(self)
-        checked = False
-        if self.is_file:
-            if is_mkv(dl_path):
-                cmd, temp_file = await get_metadata_cmd(dl_path, key)
-                if cmd:
-                    if not checked:
-                        checked = True
-                        async with task_dict_lock:
-                            task_dict[self.mid] = FFmpegStatus(
-                                self,
-                                ffmpeg,
-                                gid,
-                                "Metadata",
-                            )
-                        self.progress = False
-                        await cpu_eater_lock.acquire()
-                        self.progress = True
-                    self.subsize = self.size
-                    res = await ffmpeg.metadata_watermark_cmds(cmd, dl_path)
-                    if res:
-                        os.replace(temp_file, dl_path)
-                    else:
-                        os.remove(temp_file)
+    async def _split_one(self, state, ffmpeg, f_path, f_size, file_):
+        """Split one file, returning True if it was replaced by its parts.
+
+        Non-media files aren't copied into part files; their byte ranges are
+        recorded in `byte_splits` and streamed from the original on upload.
+        `state` is the listener, or the PipelineState of a leech pipeline.
+        """
+        parts = -(-f_size // self.split_size)
+        split_size = self.split_size
+        if not self.as_doc and (await get_document_type(f_path))[0]:
+            async with cpu_scheduler.slot(state, cpu_scheduler.light):
+                state.progress = True
+                res = await ffmpeg.split(f_path, file_, parts, split_size)
         else:
-            for dirpath, _, files in await sync_to_async(
-                walk,
-                dl_path,
-                topdown=False,
-            ):
-                for file_ in files:
-                    file_path = ospath.join(dirpath, file_)
+            self.byte_splits[f_path] = byte_ranges(
+                f_path,
+                f_size,
+                split_size,
+            )
+            return True
+        if self.is_cancelled:
+            return False
+        if res or f_size >= self.max_split_size:
+            try:
+                await remove(f_path)
+            except Exception:
+                self.is_cancelled = True
+            invalidate_probe(f_path)
+            return True
+        return False
+
+    async def _run_file_cmd(self, state, ffmpeg, cmd, temp_file, file_path):
+        state.progress = False
+        try:
+            async with cpu_scheduler.slot(state, cpu_scheduler.cmd_slots(cmd)):
+                state.progress = True
+                res = await ffmpeg.metadata_watermark_cmds(cmd, file_path)
+        except CancelledError:
+            _kill_subproc(state)
+            with contextlib.suppress(OSError):
+                os.remove(temp_file)
+            raise
+        if res:
+            os.replace(temp_file, file_path)
+            invalidate_probe(file_path)
+        elif await aiopath.exists(temp_file):
+            await remove(temp_file)
+
+    async def _pipeline_file(self, state, ffmpeg, dirpath, file_, extra_args):
+        f_path = ospath.join(dirpath, file_)
+        state.subname = file_
+        if (self.watermark or self.metadata) and is_mkv(f_path):
+            cmd, temp_file = await get_combined_cmd(
+                f_path,
+                self.watermark,
+                self.metadata,
+                extra_args,
+            )
+            if cmd:
+                LOGGER.info(f"Running cmd for: {f_path}")
+                state.subsize = await aiopath.getsize(f_path)
+                await self._run_file_cmd(state, ffmpeg, cmd, temp_file, f_path)
+            if self.is_cancelled:
+                return []
+        f_size = await aiopath.getsize(f_path)
+        if f_size > self.split_size:
+            state.subsize = f_size
+            if await self._split_one(state, ffmpeg, f_path, f_size, file_):
+                if f_path in self.byte_splits:
+                    return [file_]
+                base_name, extension = ospath.splitext(file_)
+                pattern = (
+                    rf"{escape(base_name)}\.part\d+{escape(extension)}"
+                    rf"|{escape(file_)}\.\d+"
+                )
+                return natsorted(
+                    name
+                    for name in await listdir(dirpath)
+                    if fullmatch(pattern, name)
+                )
+        return [] if self.is_cancelled else [file_]
+
+    async def proceed_pipeline(self, up_dir, files_queue, extra_args=()):
+        """Watermark, metadata and split files one at a time in upload order,
+        putting each finished (dirpath, file_) on `files_queue` so uploading
+        overlaps processing of the next file. `None` ends the stream and an
+        exception put in its place stops the upload with that error."""
+        state = PipelineState(self)
+        ffmpeg = FFMpeg(state)
+        end = None
+        try:
+            for dirpath, _, files in natsorted(await sync_to_async(walk, up_dir)):
+                if dirpath.endswith("/yt-dlp-thumb"):
+                    continue
+                for file_ in natsorted(files):
                     if self.is_cancelled:
-                        cpu_eater_lock.release()
-                        return ""
-                    self.proceed_count += 1
-                    if is_mkv(file_path):
-                        cmd, temp_file = await get_metadata_cmd(file_path, key)
-                        if cmd:
-                            if not checked:
-                                checked = True
-                                async with task_dict_lock:
-                                    task_dict[self.mid] = FFmpegStatus(
-                                        self,
-                                        ffmpeg,
-                                        gid,
-                                        "Metadata",
-                                    )
-                                self.progress = False
-                                await cpu_eater_lock.acquire()
-                                self.progress = True
-                            LOGGER.info(f"Running metadata cmd for: {file_path}")
-                            self.subsize = await aiopath.getsize(file_path)
-                            self.subname = file_
-                            res = await ffmpeg.metadata_watermark_cmds(
-                                cmd,
-                                file_path,
-                            )
-                            if res:
-                                os.replace(temp_file, file_path)
-                            else:
-                                os.remove(temp_file)
-        if checked:
-            cpu_eater_lock.release()
-        return dl_path
+                        return
+                    if file_.lower().endswith(tuple(self.extension_filter)):
+                        names = [file_]
+                    else:
+                        state.proceed_count += 1
+                        names = await self._pipeline_file(
+                            state,
+                            ffmpeg,
+                            dirpath,
+                            file_,
+                            extra_args,
+                        )
+                    for name in names:
+                        await files_queue.put((dirpath, name))
+        except CancelledError:
+            # Only cancelled once the uploader stopped reading the queue
+            _kill_subproc(state)
+            end = False
+            raise
+        except Exception as e:
+            LOGGER.error(f"Processing pipeline stopped: {e}. Path: {up_dir}")
+            end = e
+        finally:
+            # Any other exit, the is_cancelled return included, has to end the
+            # stream or the uploader waits on the queue forever
+            if end is not False:
+                await files_queue.put(end)
 
-    async def proceed_watermark(self, dl_path, gid):
-        key = self.watermark
+    def folded_ffmpeg_args(self):
+        """Options of FFMPEG_CMDS that can ride along the metadata/watermark
+        pass, or None if any of the cmds needs a run of its own."""
+        if not self.ffmpeg_cmds or not (self.watermark or self.metadata):
+            return None
+        args = []
+        for item in self.ffmpeg_cmds:
+            folded = fold_ffmpeg_cmd(
+                [part.strip() for part in split(item) if part.strip()],
+            )
+            if folded is None:
+                return None
+            args.extend(folded)
+        return args
+
+    async def proceed_metadata_watermark(self, dl_path, gid, extra_args=()):
         ffmpeg = FFMpeg(self)
         checked = False
         if self.is_file:
-            if is_mkv(dl_path):
-                cmd, temp_file = await get_watermark_cmd(dl_path, key)
-                if cmd:
-                    if not checked:
-                        checked = True
-                        async with task_dict_lock:
-                            task_dict[self.mid] = FFmpegStatus(
-                                self,
-                                ffmpeg,
-                                gid,
-                                "Watermark",
-                            )
-                        self.progress = False
-                        await cpu_eater_lock.acquire()
-                        self.progress = True
-                    self.subsize = self.size
-                    res = await ffmpeg.metadata_watermark_cmds(cmd, dl_path)
-                    if res:
-                        os.replace(temp_file, dl_path)
-                    else:
-                        os.remove(temp_file)
+            files = [(dl_path, ospath.basename(dl_path))]
         else:
-            for dirpath, _, files in await sync_to_async(
-                walk,
-                dl_path,
-                topdown=False,
-            ):
-                for file_ in files:
-                    file_path = ospath.join(dirpath, file_)
-                    if self.is_cancelled:
-                        cpu_eater_lock.release()
-                        return ""
-                    if is_mkv(file_path):
-                        cmd, temp_file = await get_watermark_cmd(file_path, key)
-                        if cmd:
-                            if not checked:
-                                checked = True
-                                async with task_dict_lock:
-                                    task_dict[self.mid] = FFmpegStatus(
-                                        self,
-                                        ffmpeg,
-                                        gid,
-                                        "Watermark",
-                                    )
-                                self.progress = False
-                                await cpu_eater_lock.acquire()
-                                self.progress = True
-                            LOGGER.info(f"Running cmd for: {file_path}")
-                            self.subsize = await aiopath.getsize(file_path)
-                            self.subname = file_
-                            res = await ffmpeg.metadata_watermark_cmds(
-                                cmd,
-                                file_path,
-                            )
-                            if res:
-                                os.replace(temp_file, file_path)
-                            else:
-                                os.remove(temp_file)
-        if checked:
-            cpu_eater_lock.release()
+            files = [
+                (ospath.join(dirpath, file_), file_)
+                for dirpath, _, dir_files in await sync_to_async(
+                    walk,
+                    dl_path,
+                    topdown=False,
+                )
+                for file_ in dir_files
+            ]
+        for file_path, file_ in files:
+            if self.is_cancelled:
+                return ""
+            self.proceed_count += 1
+            if not is_mkv(file_path):
+                continue
+            cmd, temp_file = await get_combined_cmd(
+                file_path,
+                self.watermark,
+                self.metadata,
+                extra_args,
+            )
+            if not cmd:
+                continue
+            if not checked:
+                checked = True
+                async with task_dict_lock:
+                    task_dict[self.mid] = FFmpegStatus(
+                        self,
+                        ffmpeg,
+                        gid,
+                        "Watermark" if self.watermark else "Metadata",
+                    )
+            LOGGER.info(f"Running cmd for: {file_path}")
+            if self.is_file:
+                self.subsize = self.size
+            else:
+                self.subsize = await aiopath.getsize(file_path)
+                self.subname = file_
+            await self._run_file_cmd(self, ffmpeg, cmd, temp_file, file_path)
         return dl_path
 
     async def proceed_embed_thumb(self, dl_path, gid):
@@ -1227,13 +1306,17 @@ class TaskConfig:
                                 gid,
                                 "E_thumb",
                             )
-                        self.progress = False
-                        await cpu_eater_lock.acquire()
-                        self.progress = True
                     self.subsize = self.size
-                    res = await ffmpeg.metadata_watermark_cmds(cmd, dl_path)
+                    self.progress = False
+                    async with cpu_scheduler.slot(
+                        self,
+                        cpu_scheduler.cmd_slots(cmd),
+                    ):
+                        self.progress = True
+                        res = await ffmpeg.metadata_watermark_cmds(cmd, dl_path)
                     if res:
                         os.replace(temp_file, dl_path)
+                        invalidate_probe(dl_path)
                     else:
                         os.remove(temp_file)
         else:
@@ -1245,7 +1328,6 @@ class TaskConfig:
                 for file_ in files:
                     file_path = ospath.join(dirpath, file_)
                     if self.is_cancelled:
-                        cpu_eater_lock.release()
                         return ""
                     if is_mkv(file_path):
                         cmd, temp_file = await get_embed_thumb_cmd(file_path, thumb)
@@ -1259,20 +1341,22 @@ class TaskConfig:
                                         gid,
                                         "E_thumb",
                                     )
-                                self.progress = False
-                                await cpu_eater_lock.acquire()
-                                self.progress = True
                             LOGGER.info(f"Running cmd for: {file_path}")
                             self.subsize = await aiopath.getsize(file_path)
                             self.subname = file_
-                            res = await ffmpeg.metadata_watermark_cmds(
-                                cmd,
-                                file_path,
-                            )
+                            self.progress = False
+                            async with cpu_scheduler.slot(
+                                self,
+                                cpu_scheduler.cmd_slots(cmd),
+                            ):
+                                self.progress = True
+                                res = await ffmpeg.metadata_watermark_cmds(
+                                    cmd,
+                                    file_path,
+                                )
                             if res:
                                 os.replace(temp_file, file_path)
+                                invalidate_probe(file_path)
                             else:
                                 os.remove(temp_file)
-        if checked:
-            cpu_eater_lock.release()
         return dl_path
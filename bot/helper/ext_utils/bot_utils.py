@@ -1,12 +1,16 @@
 from asyncio import (
     create_subprocess_exec,
     create_subprocess_shell,
+    get_running_loop,
     run_coroutine_threadsafe,
     sleep,
 )
 from asyncio.subprocess import PIPE
 from concurrent.futures import ThreadPoolExecutor
 from functools import partial, wraps
+from os import cpu_count
+from threading import Lock
+from time import time
 
 from httpx import AsyncClient
 
@@ -23,7 +27,84 @@ from .telegraph_helper import telegraph
 
 COMMAND_USAGE = {}
 
-THREAD_POOL = ThreadPoolExecutor(max_workers=3000)
+
+class WorkloadPool:
+    """Bounded thread pool for one class of blocking work.
+
+    Tracks how many calls are queued/running and a histogram of how long
+    calls waited for a free worker, so saturation of one class is visible
+    and can't spill over into the others.
+    """
+
+    WAIT_BUCKETS = (0.01, 0.1, 0.5, 1, 5, 30, float("inf"))
+
+    def __init__(self, name, max_workers):
+        self.name = name
+        self.max_workers = max_workers
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix=name,
+        )
+        self._lock = Lock()
+        self.queued = 0
+        self.running = 0
+        self.max_wait = 0
+        self.wait_histogram = [0] * len(self.WAIT_BUCKETS)
+
+    def _run(self, submitted, func):
+        waited = time() - submitted
+        with self._lock:
+            self.queued -= 1
+            self.running += 1
+            self.max_wait = max(self.max_wait, waited)
+            for index, bucket in enumerate(self.WAIT_BUCKETS):
+                if waited <= bucket:
+                    self.wait_histogram[index] += 1
+                    break
+        try:
+            return func()
+        finally:
+            with self._lock:
+                self.running -= 1
+
+    def submit(self, func):
+        with self._lock:
+            self.queued += 1
+        return bot_loop.run_in_executor(
+            self.executor,
+            partial(self._run, time(), func),
+        )
+
+    def stats(self):
+        with self._lock:
+            return {
+                "workers": self.max_workers,
+                "running": self.running,
+                "queued": self.queued,
+                "max_wait": self.max_wait,
+                "wait_histogram": {
+                    (
+                        f"≤{bucket}s"
+                        if bucket != float("inf")
+                        else f">{self.WAIT_BUCKETS[-2]}s"
+                    ): count
+                    for bucket, count in zip(
+                        self.WAIT_BUCKETS,
+                        self.wait_histogram,
+                        strict=True,
+                    )
+                },
+            }
+
+
+# io-long: transfers and other calls that may block for minutes or hours,
+# io-short: RPCs to local daemons, filesystem walks, small network calls,
+# cpu: pure computation like libmagic and image encoding.
+THREAD_POOLS = {
+    "io-long": WorkloadPool("io-long", 1000),
+    "io-short": WorkloadPool("io-short", 200),
+    "cpu": WorkloadPool("cpu", max(2, cpu_count() or 1)),
+}
 
 
 class SetInterval:
@@ -114,6 +195,7 @@ def arg_parser(items, arg_base):
         "-ml",
         "-doc",
         "-med",
+        "-nc",
     }
 
     while i < total:
@@ -131,6 +213,7 @@ def arg_parser(items, arg_base):
                 "-ml",
                 "-doc",
                 "-med",
+                "-nc",
             ]:
                 arg_base[part] = True
             else:
@@ -216,13 +299,21 @@ def new_task(func):
     return wrapper
 
 
-async def sync_to_async(func, *args, wait=True, **kwargs):
+async def sync_to_async(func, *args, wait=True, workload="io-short", **kwargs):
     pfunc = partial(func, *args, **kwargs)
-    future = bot_loop.run_in_executor(THREAD_POOL, pfunc)
+    future = THREAD_POOLS[workload].submit(pfunc)
     return await future if wait else future
 
 
 def async_to_sync(func, *args, wait=True, **kwargs):
+    if wait:
+        try:
+            loop = get_running_loop()
+        except RuntimeError:
+            loop = None
+        # Waiting from the loop's own thread would block it forever
+        if loop is bot_loop:
+            raise RuntimeError(f"{func.__name__} waited on from the event loop")
     future = run_coroutine_threadsafe(func(*args, **kwargs), bot_loop)
     return future.result() if wait else future
 
@@ -0,0 +1,122 @@
+from asyncio import CancelledError
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from os import cpu_count, getloadavg
+
+from bot import bot_loop
+
+COPY_CODECS = ("copy",)
+
+
+class CpuScheduler:
+    """Shares the machine's cores between ffmpeg and 7z jobs.
+
+    Each job asks for a number of thread slots out of `os.cpu_count()`.
+    Stream-copy jobs need a couple, re-encodes ask for every core and so run
+    alone. Load that the bot's own jobs don't account for shrinks the pool.
+    Waiting jobs are queued per user and served round-robin, so one user's
+    batch can't hold everyone else back. A job at the head of the line is
+    never overtaken, which keeps heavy jobs from starving.
+    """
+
+    def __init__(self):
+        self.total = cpu_count() or 1
+        self.light = min(2, self.total)
+        self._used = 0
+        self._running = {}
+        self._queues = OrderedDict()
+
+    def _capacity(self):
+        try:
+            external = getloadavg()[0] - self._used
+        except OSError:
+            external = 0
+        return max(self.light, self.total - max(0, int(external)))
+
+    def _fits(self, slots):
+        return not self._used or self._used + slots <= self._capacity()
+
+    def _grant(self, listener, slots):
+        self._used += slots
+        self._running[listener.mid] = slots
+        listener.cpu_threads = slots
+
+    def _schedule(self):
+        while self._queues:
+            user_id, queue = next(iter(self._queues.items()))
+            listener, slots, future = queue[0]
+            if future.done():
+                queue.popleft()
+            elif self._fits(slots):
+                queue.popleft()
+                self._grant(listener, slots)
+                future.set_result(slots)
+                self._queues.move_to_end(user_id)
+            else:
+                break
+            if not queue:
+                del self._queues[user_id]
+
+    async def acquire(self, listener, slots):
+        """Wait for `slots` threads and return how many were granted."""
+        slots = max(1, min(slots, self.total))
+        if not self._queues and self._fits(slots):
+            self._grant(listener, slots)
+            return slots
+        future = bot_loop.create_future()
+        self._queues.setdefault(listener.user_id, deque()).append(
+            (listener, slots, future),
+        )
+        try:
+            return await future
+        except CancelledError:
+            if future.done() and not future.cancelled():
+                self.release(listener)
+            self._schedule()
+            raise
+
+    def release(self, listener):
+        if (slots := self._running.pop(listener.mid, None)) is not None:
+            self._used -= slots
+            listener.cpu_threads = 0
+        self._schedule()
+
+    @asynccontextmanager
+    async def slot(self, listener, slots):
+        threads = await self.acquire(listener, slots)
+        try:
+            yield threads
+        finally:
+            self.release(listener)
+
+    def cmd_slots(self, cmd):
+        """Slots for an ffmpeg command: light if every stream is copied."""
+        codecs = [
+            cmd[i + 1]
+            for i, arg in enumerate(cmd[:-1])
+            if arg in ("-c", "-codec", "-vcodec", "-acodec")
+            or arg.startswith(("-c:", "-codec:"))
+        ]
+        if codecs and all(codec in COPY_CODECS for codec in codecs):
+            return self.light
+        return self.total
+
+    def waiting(self):
+        return sum(
+            not future.done()
+            for queue in self._queues.values()
+            for _, _, future in queue
+        )
+
+    def stats(self):
+        return self._used, self.total, self.waiting()
+
+
+def set_threads(cmd, threads):
+    """Point the `-threads` value of cmd at the slots granted to its job."""
+    if threads and "-threads" in cmd:
+        cmd[cmd.index("-threads") + 1] = str(threads)
+    return cmd
+
+
+cpu_scheduler = CpuScheduler()
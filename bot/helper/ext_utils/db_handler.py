@@ -251,6 +251,27 @@ class DbManager:
         await self.db.tasks[TgClient.ID].drop()
         return notifier_dict
 
+    async def get_leech_cache(self, key):
+        if self._return:
+            return None
+        if row := await self.db.leech_cache[TgClient.ID].find_one({"_id": key}):
+            return row["cid"], row["mid"]
+        return None
+
+    async def update_leech_cache(self, key, cid, mid):
+        if self._return:
+            return
+        await self.db.leech_cache[TgClient.ID].replace_one(
+            {"_id": key},
+            {"cid": cid, "mid": mid},
+            upsert=True,
+        )
+
+    async def rm_leech_cache(self, key):
+        if self._return:
+            return
+        await self.db.leech_cache[TgClient.ID].delete_one({"_id": key})
+
     async def trunc_table(self, name):
         if self._return:
             return
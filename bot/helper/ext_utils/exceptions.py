@@ -13,3 +13,11 @@ class RssShutdownException(Exception):
 
 class TgLinkException(Exception):
     """No Access granted for this chat"""
+
+
+class Aria2Error(Exception):
+    """aria2 answered a JSON-RPC call with an error"""
+
+
+class RcloneError(Exception):
+    """rclone rcd answered an RC call with an error"""
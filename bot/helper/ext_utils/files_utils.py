@@ -1,6 +1,8 @@
 from asyncio import create_subprocess_exec, sleep, wait_for
 from asyncio.subprocess import PIPE
-from os import makedirs, readlink, walk
+from hashlib import file_digest
+from io import RawIOBase
+from os import SEEK_CUR, SEEK_END, makedirs, readlink, walk
 from os import path as ospath
 from re import IGNORECASE, escape
 from re import search as re_search
@@ -29,6 +31,7 @@ from magic import Magic
 
 from bot import LOGGER, aria2, xnox_client
 from bot.core.config_manager import Config
+from bot.core.rclone_client import RcloneClient
 
 from .bot_utils import cmd_exec, sync_to_async
 from .exceptions import NotSupportedExtractionArchive
@@ -155,6 +158,7 @@ def exit_clean_up(_, __):
     try:
         LOGGER.info("Please wait! Bot clean up and stop the running downloads...")
         clean_all()
+        RcloneClient.stop_all()
         srun(
             ["pkill", "-9", "-f", "gunicorn|xria|xnox|xtra|xone|java|7z|split"],
             check=False,
@@ -250,6 +254,7 @@ async def join_files(opath):
         if re_search(r"\.0+2$", file_) and await sync_to_async(
             get_mime_type,
             f"{opath}/{file_}",
+            workload="cpu",
         ) not in ["application/x-7z-compressed", "application/zip"]:
             exists = True
             final_name = file_.rsplit(".", 1)[0]
@@ -273,33 +278,74 @@ async def join_files(opath):
                     await remove(f"{opath}/{file_}")
 
 
-async def split_file(f_path, split_size, listener):
-    out_path = f"{f_path}."
-    if listener.is_cancelled:
-        return False
-    listener.subproc = await create_subprocess_exec(
-        "split",
-        "--numeric-suffixes=1",
-        "--suffix-length=3",
-        f"--bytes={split_size}",
-        f_path,
-        out_path,
-        stderr=PIPE,
-    )
-    _, stderr = await listener.subproc.communicate()
-    code = listener.subproc.returncode
-    if listener.is_cancelled:
-        return False
-    if code == -9:
-        listener.is_cancelled = True
-        return False
-    if code != 0:
-        try:
-            stderr = stderr.decode().strip()
-        except Exception:
-            stderr = "Unable to decode the error!"
-        LOGGER.error(f"{stderr}. Split Document: {f_path}")
-    return True
+def byte_ranges(f_path, f_size, split_size):
+    """Byte-range parts of f_path as (part_path, offset, length), named
+    `.001`, `.002`, ... so `join_files` can put them back together."""
+    return [
+        (f"{f_path}.{i:03}", offset, min(split_size, f_size - offset))
+        for i, offset in enumerate(range(0, f_size, split_size), start=1)
+    ]
+
+
+def get_file_digest(path, byte_range=None):
+    """SHA-256 of a file, or of the (path, offset, length) part of one."""
+    with (
+        FileRange(*byte_range, ospath.basename(path))
+        if byte_range
+        else open(path, "rb")
+    ) as f:
+        return file_digest(f, "sha256").hexdigest()
+
+
+class FileRange(RawIOBase):
+    """Read-only file object exposing `length` bytes of `path` from `offset`,
+    so a byte-range part can be uploaded without writing it to disk."""
+
+    def __init__(self, path, offset, length, name):
+        super().__init__()
+        self.name = name
+        self._offset = offset
+        self._length = length
+        self._pos = 0
+        self._file = open(path, "rb")
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._pos
+
+    def seek(self, pos, whence=0):
+        if whence == SEEK_CUR:
+            pos += self._pos
+        elif whence == SEEK_END:
+            pos += self._length
+        self._pos = max(0, min(pos, self._length))
+        return self._pos
+
+    def read(self, size=-1):
+        remaining = self._length - self._pos
+        if size is None or size < 0 or size > remaining:
+            size = remaining
+        if size <= 0:
+            return b""
+        self._file.seek(self._offset + self._pos)
+        data = self._file.read(size)
+        self._pos += len(data)
+        return data
+
+    def readinto(self, buffer):
+        data = self.read(len(buffer))
+        buffer[: len(data)] = data
+        return len(data)
+
+    def close(self):
+        if not self.closed:
+            self._file.close()
+        super().close()
 
 
 class SevenZ:
@@ -198,6 +198,7 @@ convert_media = """<b>Convert Media</b>: -ca -cv
 /cmd link -cv mkv - webm flv (convert all videos to mp4 except webm and flv)"""
 
 force_start = """<b>Force Start</b>: -f -fd -fu
+Put the task at the front of the queue instead of waiting for its turn.
 /cmd link -f (force download and upload)
 /cmd link -fd (force download only)
 /cmd link -fu (force upload directly after download finish)"""
@@ -236,9 +237,10 @@ mixed_leech = """<b>Mixed leech</b>: -ml
 thumbnail_layout = """Thumbnail Layout: -tl
 /cmd link -tl 3x3 (widthxheight) 3 photos in row and 3 photos in column"""
 
-leech_as = """<b>Leech as</b>: -doc -med
+leech_as = """<b>Leech as</b>: -doc -med -nc
 /cmd link -doc (Leech as document)
-/cmd link -med (Leech as media)"""
+/cmd link -med (Leech as media)
+/cmd link -nc (Upload again even if the same file was leeched before)"""
 
 ffmpeg_cmds = """<b>FFmpeg Commands</b>: -ff
 list of lists of ffmpeg commands. You can set multiple ffmpeg commands for all files before upload. Don't write ffmpeg at beginning, start directly with the arguments.
@@ -360,7 +362,7 @@ NOTE: Try each command without any argument to see more detalis.
 /{BotCommands.UserSetCommand[0]} or /{BotCommands.UserSetCommand} [query]: Users settings.
 /{BotCommands.BotSetCommand[0]} or /{BotCommands.BotSetCommand} [query]: Bot settings.
 /{BotCommands.SelectCommand}: Select files from torrents by gid or reply.
-/{BotCommands.ForceStartCommand[0]} or /{BotCommands.ForceStartCommand[1]} [gid]: Force start task by gid or reply.
+/{BotCommands.ForceStartCommand[0]} or /{BotCommands.ForceStartCommand[1]} [gid]: Move task to the front of the queue by gid or reply.
 /{BotCommands.CancelAllCommand} [query]: Cancel all [status] tasks.
 /{BotCommands.ListCommand} [query]: Search in Google Drive(s).
 /{BotCommands.SearchCommand} [query]: Search for torrents with API.
@@ -1,6 +1,8 @@
 import contextlib
-from asyncio import create_subprocess_exec, gather, sleep, wait_for
+import json
+from asyncio import create_subprocess_exec, gather, shield, sleep, wait_for
 from asyncio.subprocess import PIPE
+from collections import OrderedDict
 from os import cpu_count
 from os import path as ospath
 from re import escape
@@ -9,16 +11,21 @@ from time import time
 
 from aiofiles.os import makedirs, remove
 from aiofiles.os import path as aiopath
+from aiofiles.os import stat as aiostat
 from aioshutil import rmtree
 from PIL import Image
 
-from bot import LOGGER
+from bot import LOGGER, bot_loop
 from bot.core.config_manager import Config
 
 from .bot_utils import cmd_exec, sync_to_async
+from .cpu_scheduler import set_threads
 from .files_utils import get_mime_type, is_archive, is_archive_split
 from .status_utils import time_to_seconds
 
+PROBE_CACHE_SIZE = 2048
+_probe_cache = OrderedDict()
+
 
 async def create_thumb(msg, _id=""):
     if not _id:
@@ -29,39 +36,161 @@ async def create_thumb(msg, _id=""):
     await makedirs(path, exist_ok=True)
     photo_dir = await msg.download()
     output = ospath.join(path, f"{_id}.jpg")
-    await sync_to_async(Image.open(photo_dir).convert("RGB").save, output, "JPEG")
+    await sync_to_async(
+        Image.open(photo_dir).convert("RGB").save,
+        output,
+        "JPEG",
+        workload="cpu",
+    )
     await remove(photo_dir)
     return output
 
 
-async def get_media_info(path):
+def _probe_key(st, path):
+    return (path, st.st_ino, st.st_size, st.st_mtime_ns)
+
+
+async def _run_probe(path):
+    result = await cmd_exec(
+        [
+            "ffprobe",
+            "-hide_banner",
+            "-loglevel",
+            "error",
+            "-print_format",
+            "json",
+            "-show_format",
+            "-show_streams",
+            path,
+        ],
+    )
+    if result[0] and result[2] == 0:
+        try:
+            data = json.loads(result[0])
+        except ValueError:
+            data = {}
+    else:
+        data = {}
+    if result[1]:
+        data["stderr"] = result[1]
+    return data
+
+
+async def get_probe_data(path):
+    """Return the ffprobe format/streams json for path, probing at most once
+    per (path, inode, size, mtime). Returns None if the file can't be stat'ed.
+    """
     try:
-        result = await cmd_exec(
-            [
-                "ffprobe",
-                "-hide_banner",
-                "-loglevel",
-                "error",
-                "-print_format",
-                "json",
-                "-show_format",
-                path,
-            ],
-        )
+        st = await aiostat(path)
     except Exception as e:
-        LOGGER.error(f"Get Media Info: {e}. Mostly File not found! - File: {path}")
+        LOGGER.error(f"Get Probe Data: {e}. Mostly File not found! - File: {path}")
+        return None
+    key = _probe_key(st, path)
+    if key in _probe_cache:
+        _probe_cache.move_to_end(key)
+        # Shielded so a cancelled waiter doesn't cancel the shared probe
+        return await shield(_probe_cache[key])
+    future = bot_loop.create_future()
+    _probe_cache[key] = future
+    while len(_probe_cache) > PROBE_CACHE_SIZE:
+        _probe_cache.popitem(last=False)
+    data = None
+    try:
+        data = await _run_probe(path)
+    except Exception as e:
+        LOGGER.error(f"Get Probe Data: {e}. File: {path}")
+    finally:
+        # Also reached on cancellation, waiters must never be left hanging
+        if data is None and _probe_cache.get(key) is future:
+            del _probe_cache[key]
+        future.set_result(data)
+    return data
+
+
+def invalidate_probe(path):
+    for key in [k for k in _probe_cache if k[0] == path]:
+        del _probe_cache[key]
+
+
+def _parse_keyframes(output, start_time):
+    keyframes = []
+    last_pos = -1
+    for line in output.splitlines():
+        fields = dict(f.split("=", 1) for f in line.split("|") if "=" in f)
+        if "K" not in fields.get("flags", ""):
+            continue
+        try:
+            pts, pos = float(fields["pts_time"]) - start_time, int(fields["pos"])
+        except (KeyError, ValueError):
+            continue
+        if pos > last_pos:
+            keyframes.append((pts, pos))
+            last_pos = pos
+    return keyframes
+
+
+async def get_keyframe_index(path):
+    """(seconds, byte offset) of every keyframe of the first video stream,
+    read in a single ffprobe packet pass. Times are relative to the file's
+    start time, which is what ffmpeg's segment muxer compares against."""
+    data = await get_probe_data(path) or {}
+    try:
+        start_time = float(data.get("format", {}).get("start_time", 0))
+    except ValueError:
+        start_time = 0
+    stdout, stderr, code = await cmd_exec(
+        [
+            "ffprobe",
+            "-hide_banner",
+            "-loglevel",
+            "error",
+            "-select_streams",
+            "v:0",
+            "-show_entries",
+            "packet=pts_time,pos,flags",
+            "-of",
+            "compact=p=0",
+            path,
+        ],
+    )
+    if code != 0:
+        LOGGER.error(f"Keyframe index: {stderr}. Path: {path}")
+        return []
+    return await sync_to_async(
+        _parse_keyframes,
+        stdout,
+        start_time,
+        workload="cpu",
+    )
+
+
+def plan_split_cuts(keyframes, f_size, budget):
+    """Keyframe timestamps to cut at so every part holds at most `budget`
+    bytes of the source. A single GOP larger than budget gets its own part."""
+    cuts = []
+    start_pos = 0
+    prev = None
+    for pts, pos in [*keyframes, (None, f_size)]:
+        if pos - start_pos > budget and prev and prev[1] > start_pos and prev[0] > 0:
+            cuts.append(prev[0])
+            start_pos = prev[1]
+        prev = (pts, pos)
+    return cuts
+
+
+async def get_media_info(path):
+    data = await get_probe_data(path)
+    if data is None:
         return 0, None, None
-    if result[0] and result[2] == 0:
-        fields = eval(result[0]).get("format")
-        if fields is None:
-            LOGGER.error(f"get_media_info: {result}")
-            return 0, None, None
-        duration = round(float(fields.get("duration", 0)))
-        tags = fields.get("tags", {})
-        artist = tags.get("artist") or tags.get("ARTIST") or tags.get("Artist")
-        title = tags.get("title") or tags.get("TITLE") or tags.get("Title")
-        return duration, artist, title
-    return 0, None, None
+    fields = data.get("format")
+    if fields is None:
+        LOGGER.error(f"get_media_info: {data.get('stderr', 'No format')} - {path}")
+        return 0, None, None
+    duration = round(float(fields.get("duration", 0)))
+    tags = fields.get("tags", {})
+    artist = tags.get("artist") or tags.get("ARTIST") or tags.get("Artist")
+    title = tags.get("title") or tags.get("TITLE") or tags.get("Title")
+    return duration, artist, title
 
 
 async def get_document_type(path):
@@ -72,28 +201,11 @@ async def get_document_type(path):
         or re_search(r".+(\.|_)(rar|7z|zip|bin)(\.0*\d+)?$", path)
     ):
         return is_video, is_audio, is_image
-    mime_type = await sync_to_async(get_mime_type, path)
+    mime_type = await sync_to_async(get_mime_type, path, workload="cpu")
     if mime_type.startswith("image"):
         return False, False, True
-    try:
-        result = await cmd_exec(
-            [
-                "ffprobe",
-                "-hide_banner",
-                "-loglevel",
-                "error",
-                "-print_format",
-                "json",
-                "-show_streams",
-                path,
-            ],
-        )
-        if result[1] and mime_type.startswith("video"):
-            is_video = True
-    except Exception as e:
-        LOGGER.error(
-            f"Get Document Type: {e}. Mostly File not found! - File: {path}",
-        )
+    data = await get_probe_data(path)
+    if data is None:
         if mime_type.startswith("audio"):
             return False, True, False
         if not mime_type.startswith("video") and not mime_type.endswith(
@@ -103,17 +215,20 @@ async def get_document_type(path):
         if mime_type.startswith("video"):
             is_video = True
         return is_video, is_audio, is_image
-    if result[0] and result[2] == 0:
-        fields = eval(result[0]).get("streams")
-        if fields is None:
-            LOGGER.error(f"get_document_type: {result}")
-            return is_video, is_audio, is_image
-        is_video = False
-        for stream in fields:
-            if stream.get("codec_type") == "video":
-                is_video = True
-            elif stream.get("codec_type") == "audio":
-                is_audio = True
+    if data.get("stderr") and mime_type.startswith("video"):
+        is_video = True
+    fields = data.get("streams")
+    if fields is None:
+        LOGGER.error(
+            f"get_document_type: {data.get('stderr', 'No streams')} - {path}",
+        )
+        return is_video, is_audio, is_image
+    is_video = False
+    for stream in fields:
+        if stream.get("codec_type") == "video":
+            is_video = True
+        elif stream.get("codec_type") == "audio":
+            is_audio = True
     return is_video, is_audio, is_image
 
 
@@ -336,6 +451,9 @@ class FFMpeg:
         self._last_processed_time = 0
         self._last_processed_bytes = 0
 
+    def _threads(self):
+        return str(self._listener.cpu_threads or max(1, cpu_count() // 2))
+
     async def _ffmpeg_progress(self):
         while not (
             self._listener.subproc.returncode is not None
@@ -379,6 +497,7 @@ class FFMpeg:
 
     async def ffmpeg_cmds(self, ffmpeg, f_path):
         self.clear()
+        set_threads(ffmpeg, self._listener.cpu_threads)
         self._total_time = (await get_media_info(f_path))[0]
         base_name, ext = ospath.splitext(f_path)
         dir, base_name = base_name.rsplit("/", 1)
@@ -436,6 +555,7 @@ class FFMpeg:
 
     async def metadata_watermark_cmds(self, ffmpeg, f_path):
         self.clear()
+        set_threads(ffmpeg, self._listener.cpu_threads)
         self._total_time = (await get_media_info(f_path))[0]
         if self._listener.is_cancelled:
             return False
@@ -485,7 +605,7 @@ class FFMpeg:
                 "-c:a",
                 "aac",
                 "-threads",
-                f"{max(1, cpu_count() // 2)}",
+                self._threads(),
                 output,
             ]
             if ext == "mp4":
@@ -509,7 +629,7 @@ class FFMpeg:
                 "-c",
                 "copy",
                 "-threads",
-                f"{max(1, cpu_count() // 2)}",
+                self._threads(),
                 output,
             ]
         if self._listener.is_cancelled:
@@ -557,7 +677,7 @@ class FFMpeg:
             "-i",
             audio_file,
             "-threads",
-            f"{max(1, cpu_count() // 2)}",
+            self._threads(),
             output,
         ]
         if self._listener.is_cancelled:
@@ -638,7 +758,7 @@ class FFMpeg:
             "-c:a",
             "aac",
             "-threads",
-            f"{max(1, cpu_count() // 2)}",
+            self._threads(),
             output_file,
         ]
 
@@ -671,6 +791,116 @@ class FFMpeg:
         return False
 
     async def split(self, f_path, file_, parts, split_size):
+        if keyframes := await get_keyframe_index(f_path):
+            res = await self._segment_split(f_path, file_, keyframes, split_size)
+            if res is not None:
+                return res
+        return await self._split_by_size(f_path, file_, parts, split_size)
+
+    async def _segment_split(self, f_path, file_, keyframes, split_size):
+        """Cut at keyframes planned from the packet index, writing all parts
+        in one segment muxer run. Returns None if the caller should fall back
+        to size based splitting."""
+        self.clear()
+        self._total_time = (await get_media_info(f_path))[0]
+        base_name, extension = ospath.splitext(file_)
+        f_size = await aiopath.getsize(f_path)
+        cuts = plan_split_cuts(keyframes, f_size, split_size - 3000000)
+        if not cuts:
+            return None
+        out_dir = ospath.dirname(f_path)
+        # The muxer formats the whole path, so any % in it has to be escaped
+        pattern = (
+            ospath.join(out_dir, base_name).replace("%", "%%")
+            + f".part%03d{extension}"
+        )
+        out_paths = [
+            ospath.join(out_dir, f"{base_name}.part{i:03}{extension}")
+            for i in range(1, len(cuts) + 2)
+        ]
+        for multi_streams in (True, False):
+            cmd = [
+                "xtra",
+                "-hide_banner",
+                "-loglevel",
+                "error",
+                "-progress",
+                "pipe:1",
+                "-i",
+                f_path,
+                "-map",
+                "0",
+                "-map_chapters",
+                "-1",
+                "-strict",
+                "-2",
+                "-c",
+                "copy",
+                "-f",
+                "segment",
+                "-segment_times",
+                ",".join(f"{cut:.6f}" for cut in cuts),
+                "-segment_time_delta",
+                "0.05",
+                "-segment_start_number",
+                "1",
+                "-reset_timestamps",
+                "1",
+                "-threads",
+                self._threads(),
+                pattern,
+            ]
+            if not multi_streams:
+                del cmd[8]
+                del cmd[8]
+            if self._listener.is_cancelled:
+                return False
+            self._listener.subproc = await create_subprocess_exec(
+                *cmd,
+                stdout=PIPE,
+                stderr=PIPE,
+            )
+            await self._ffmpeg_progress()
+            _, stderr = await self._listener.subproc.communicate()
+            code = self._listener.subproc.returncode
+            if self._listener.is_cancelled:
+                return False
+            if code == -9:
+                self._listener.is_cancelled = True
+                return False
+            if code == 0:
+                break
+            try:
+                stderr = stderr.decode().strip()
+            except Exception:
+                stderr = "Unable to decode the error!"
+            for out_path in out_paths:
+                with contextlib.suppress(Exception):
+                    await remove(out_path)
+            if multi_streams:
+                LOGGER.warning(
+                    f"{stderr}. Retrying without map, -map 0 not working in all situations. Path: {f_path}",
+                )
+                continue
+            LOGGER.warning(
+                f"{stderr}. Unable to split this video, if it's size less than {self._listener.max_split_size} will be uploaded as it is. Path: {f_path}",
+            )
+            return False
+        for out_path in out_paths:
+            if (
+                not await aiopath.exists(out_path)
+                or await aiopath.getsize(out_path) > self._listener.max_split_size
+            ):
+                LOGGER.warning(
+                    f"Planned split doesn't fit the size limit, splitting by size instead. Path: {f_path}",
+                )
+                for path in out_paths:
+                    with contextlib.suppress(Exception):
+                        await remove(path)
+                return None
+        return True
+
+    async def _split_by_size(self, f_path, file_, parts, split_size):
         self.clear()
         multi_streams = True
         self._total_time = duration = (await get_media_info(f_path))[0]
@@ -704,7 +934,7 @@ class FFMpeg:
                 "-c",
                 "copy",
                 "-threads",
-                f"{max(1, cpu_count() // 2)}",
+                self._threads(),
                 out_path,
             ]
             if not multi_streams:
@@ -0,0 +1,83 @@
+from threading import Lock
+from time import time
+
+from aria2p import Download
+
+from bot import LOGGER, aria2, xnox_client
+from bot.core.aria2_client import Aria2Client
+
+from .bot_utils import async_to_sync
+
+
+class StatusSnapshot:
+    """Per-tick view of all qBittorrent torrents and aria2 downloads.
+
+    Status objects read their info from here instead of issuing one RPC per
+    task, so a status render costs one `torrents_info` call and one aria2
+    `system.multicall` regardless of the number of tasks. Data is refreshed
+    lazily once it's older than `ttl` seconds. The aria2 query goes through
+    the async client, so lookups must happen in executor threads.
+    """
+
+    def __init__(self, ttl=1):
+        self.ttl = ttl
+        self._qb_lock = Lock()
+        self._aria2_lock = Lock()
+        self._qb_torrents = {}
+        self._aria2_downloads = {}
+        self._qb_time = 0
+        self._aria2_time = 0
+
+    def _refresh_qbit(self):
+        try:
+            torrents = xnox_client.torrents_info()
+        except Exception as e:
+            LOGGER.error(f"{e}: Qbittorrent, while getting torrents snapshot")
+            return
+        qb_torrents = {}
+        for tor in torrents:
+            for tag in tor.tags.split(","):
+                if tag := tag.strip():
+                    qb_torrents[tag] = tor
+        self._qb_torrents = qb_torrents
+        self._qb_time = time()
+
+    def _refresh_aria2(self):
+        try:
+            results = async_to_sync(
+                Aria2Client.multicall,
+                [
+                    ("aria2.tellActive", []),
+                    ("aria2.tellWaiting", [0, 1000]),
+                    ("aria2.tellStopped", [0, 1000]),
+                ],
+            )
+        except Exception as e:
+            LOGGER.error(f"{e}: Aria2c, while getting downloads snapshot")
+            return
+        self._aria2_downloads = {
+            struct["gid"]: Download(aria2, struct)
+            for res in results
+            if not isinstance(res, Exception)
+            for struct in res
+        }
+        self._aria2_time = time()
+
+    def qbit_info(self, tag):
+        with self._qb_lock:
+            if time() - self._qb_time > self.ttl:
+                self._refresh_qbit()
+            return self._qb_torrents.get(tag)
+
+    def aria2_download(self, gid):
+        with self._aria2_lock:
+            if time() - self._aria2_time > self.ttl:
+                self._refresh_aria2()
+            return self._aria2_downloads.get(gid)
+
+    def expire(self):
+        self._qb_time = 0
+        self._aria2_time = 0
+
+
+status_snapshot = StatusSnapshot()
@@ -1,5 +1,5 @@
 import contextlib
-from asyncio import iscoroutinefunction
+from asyncio import gather, iscoroutinefunction
 from html import escape
 from time import time
 
@@ -10,6 +10,7 @@ from bot.core.config_manager import Config
 from bot.helper.telegram_helper.button_build import ButtonMaker
 
 from .bot_utils import sync_to_async
+from .cpu_scheduler import cpu_scheduler
 
 SIZE_UNITS = ["B", "KB", "MB", "GB", "TB", "PB"]
 
@@ -55,37 +56,25 @@ STATUSES = {
 
 async def get_task_by_gid(gid: str):
     async with task_dict_lock:
-        for task in task_dict.values():
-            if hasattr(task, "seeding"):
-                await sync_to_async(task.update)
-            if task.gid().startswith(gid):
-                return task
-        return None
+        if (task := task_dict.by_gid(gid)) is None:
+            seeding = [tk for tk in task_dict.values() if hasattr(tk, "seeding")]
+    if task is None:
+        # Only aria2 knows when a download was followed by a new gid
+        await gather(*(sync_to_async(tk.update) for tk in seeding))
+        async with task_dict_lock:
+            return task_dict.by_gid(gid)
+    if hasattr(task, "seeding"):
+        await sync_to_async(task.update)
+    return task
 
 
 def get_specific_tasks(status, user_id):
+    tasks = task_dict.by_user(user_id) if user_id else list(task_dict.values())
     if status == "All":
-        if user_id:
-            return [
-                tk for tk in task_dict.values() if tk.listener.user_id == user_id
-            ]
-        return list(task_dict.values())
-    if user_id:
-        return [
-            tk
-            for tk in task_dict.values()
-            if tk.listener.user_id == user_id
-            and (
-                ((st := tk.status()) and st == status)
-                or (
-                    status == MirrorStatus.STATUS_DOWNLOAD
-                    and st not in STATUSES.values()
-                )
-            )
-        ]
+        return tasks
     return [
         tk
-        for tk in task_dict.values()
+        for tk in tasks
         if ((st := tk.status()) and st == status)
         or (status == MirrorStatus.STATUS_DOWNLOAD and st not in STATUSES.values())
     ]
@@ -185,36 +174,49 @@ def source(self):
     )
 
 
-async def get_readable_message(sid, is_user, page_no=1, status="All", page_step=1):
-    msg = ""
-    button = None
+class StatusSnapshot:
+    """The tasks of one status tick, shared by every status message.
 
-    tasks = await sync_to_async(get_specific_tasks, status, sid if is_user else None)
+    Each task's status and text are computed at most once per snapshot, so
+    chats showing the same tasks don't render them again. Callers hold
+    task_dict_lock while they use it.
+    """
 
-    STATUS_LIMIT = 4
-    tasks_no = len(tasks)
-    pages = (max(tasks_no, 1) + STATUS_LIMIT - 1) // STATUS_LIMIT
-    if page_no > pages:
-        page_no = (page_no - 1) % pages + 1
-        status_dict[sid]["page_no"] = page_no
-    elif page_no < 1:
-        page_no = pages - (abs(page_no) % pages)
-        status_dict[sid]["page_no"] = page_no
-    start_position = (page_no - 1) * STATUS_LIMIT
+    def __init__(self):
+        self.tasks = list(task_dict.values())
+        self._statuses = {}
+        self._blocks = {}
+        self._footer = None
 
-    for index, task in enumerate(
-        tasks[start_position : STATUS_LIMIT + start_position],
-        start=1,
-    ):
-        tstatus = await sync_to_async(task.status) if status == "All" else status
-        if task.listener.is_super_chat:
-            msg += f"<b>{index + start_position}. <a href='{task.listener.message.link}'>{tstatus}</a>: </b>"
-        else:
-            msg += f"<b>{index + start_position}. {tstatus}: </b>"
-        msg += f"<code>{escape(f'{task.name()}')}</code>"
+    async def status(self, task):
+        if (tstatus := self._statuses.get(task)) is None:
+            tstatus = self._statuses[task] = await sync_to_async(task.status)
+        return tstatus
+
+    async def select(self, status, user_id):
+        """Like get_specific_tasks, from the snapshot."""
+        tasks = task_dict.by_user(user_id) if user_id else self.tasks
+        if status == "All":
+            return tasks
+        return [
+            tk
+            for tk in tasks
+            if (st := await self.status(tk)) == status
+            or (
+                status == MirrorStatus.STATUS_DOWNLOAD
+                and st not in STATUSES.values()
+            )
+        ]
+
+    async def block(self, task, tstatus):
+        """Text of task below its header and its whole progress percent."""
+        if (key := (task, tstatus)) in self._blocks:
+            return self._blocks[key]
+        msg = f"<code>{escape(f'{task.name()}')}</code>"
         if task.listener.subname:
             msg += f"\n<i>{task.listener.subname}</i>"
         msg += f"\n<b>by: {source(task.listener)}</b>"
+        percent = None
         if (
             tstatus not in [MirrorStatus.STATUS_SEED, MirrorStatus.STATUS_QUEUEUP]
             and task.listener.progress
@@ -224,6 +226,8 @@ async def get_readable_message(sid, is_user, page_no=1, status="All", page_step=
                 if iscoroutinefunction(task.progress)
                 else task.progress()
             )
+            with contextlib.suppress(ValueError):
+                percent = int(float(str(progress).strip("%")))
             msg += f"\n{get_progress_bar_string(progress)} {progress}"
             if task.listener.subname:
                 subsize = f"/{get_readable_file_size(task.listener.subsize)}"
@@ -248,10 +252,68 @@ async def get_readable_message(sid, is_user, page_no=1, status="All", page_step=
         else:
             msg += f"\n<b>🗂Size: </b>{task.size()}"
         msg += f"\n/stop_{task.gid()[:8]}\n\n"
+        self._blocks[key] = (msg, percent)
+        return msg, percent
+
+    def footer(self):
+        if self._footer is None:
+            msg = f"<blockquote><b>CPU:</b> {cpu_percent()}% | <b>FREE:</b> {get_readable_file_size(disk_usage(Config.DOWNLOAD_DIR).free)}</blockquote>"
+            used, total, waiting = cpu_scheduler.stats()
+            if used or waiting:
+                msg += f"<blockquote><b>CPU SLOTS:</b> {used}/{total} | <b>WAITING:</b> {waiting}</blockquote>"
+            msg += f"<blockquote>\n<b>RAM:</b> {virtual_memory().percent}% | <b>UPTIME:</b> {get_readable_time(time() - bot_start_time)}</blockquote>"
+            self._footer = msg
+        return self._footer
+
+
+async def get_status_page(
+    sid,
+    is_user,
+    page_no=1,
+    status="All",
+    page_step=1,
+    snapshot=None,
+):
+    """Status text and buttons of sid, plus a signature of what they show.
+
+    The signature only holds the tasks, their states and whole progress
+    percents, so it changes when the message is worth editing and not with
+    every speed or ETA update.
+    """
+    msg = ""
+    button = None
+    snapshot = snapshot or StatusSnapshot()
+
+    tasks = await snapshot.select(status, sid if is_user else None)
+
+    STATUS_LIMIT = 4
+    tasks_no = len(tasks)
+    pages = (max(tasks_no, 1) + STATUS_LIMIT - 1) // STATUS_LIMIT
+    if page_no > pages:
+        page_no = (page_no - 1) % pages + 1
+        status_dict[sid]["page_no"] = page_no
+    elif page_no < 1:
+        page_no = pages - (abs(page_no) % pages)
+        status_dict[sid]["page_no"] = page_no
+    start_position = (page_no - 1) * STATUS_LIMIT
+    signature = [page_no, pages, tasks_no, status, page_step]
+
+    for index, task in enumerate(
+        tasks[start_position : STATUS_LIMIT + start_position],
+        start=1,
+    ):
+        tstatus = await snapshot.status(task) if status == "All" else status
+        if task.listener.is_super_chat:
+            msg += f"<b>{index + start_position}. <a href='{task.listener.message.link}'>{tstatus}</a>: </b>"
+        else:
+            msg += f"<b>{index + start_position}. {tstatus}: </b>"
+        block, percent = await snapshot.block(task, tstatus)
+        msg += block
+        signature.append((task.gid(), tstatus, percent))
 
     if len(msg) == 0:
         if status == "All":
-            return None, None
+            return None, None, None
         msg = f"b>No Active {status} Tasks!</b>\n\n"
     buttons = None
     if len(tasks) > STATUS_LIMIT:
@@ -269,6 +331,10 @@ async def get_readable_message(sid, is_user, page_no=1, status="All", page_step=
                     buttons = ButtonMaker()
                 buttons.data_button(label, f"status {sid} st {status_value}")
     button = buttons.build_menu(8) if buttons else None
-    msg += f"<blockquote><b>CPU:</b> {cpu_percent()}% | <b>FREE:</b> {get_readable_file_size(disk_usage(Config.DOWNLOAD_DIR).free)}</blockquote>"
-    msg += f"<blockquote>\n<b>RAM:</b> {virtual_memory().percent}% | <b>UPTIME:</b> {get_readable_time(time() - bot_start_time)}</blockquote>"
+    msg += snapshot.footer()
+    return msg, button, tuple(signature)
+
+
+async def get_readable_message(sid, is_user, page_no=1, status="All", page_step=1):
+    msg, button, _ = await get_status_page(sid, is_user, page_no, status, page_step)
     return msg, button
@@ -7,14 +7,22 @@ from bot import (
     queue_dict_lock,
     queued_dl,
     queued_up,
+    user_data,
 )
 from bot.core.config_manager import Config
+from bot.helper.aeon_utils.access_check import is_paid
 from bot.helper.mirror_leech_utils.gdrive_utils.search import GoogleDriveSearch
 
 from .bot_utils import get_telegraph_list, sync_to_async
 from .files_utils import get_base_name
 from .links_utils import is_gdrive_id
 
+# Shares of the queue each class of user gets against the others
+OWNER_WEIGHT = 8
+SUDO_WEIGHT = 4
+PAID_WEIGHT = 2
+FREE_WEIGHT = 1
+
 
 async def stop_duplicate_check(listener):
     if (
@@ -45,6 +53,7 @@ async def stop_duplicate_check(listener):
             name,
             listener.up_dest,
             listener.user_id,
+            workload="io-long",
         )
         if telegraph_content:
             msg = f"File/Folder is already available in Drive.\nHere are {contents_no} list results:"
@@ -54,20 +63,26 @@ async def stop_duplicate_check(listener):
     return False, None
 
 
+async def _queue_weight(user_id):
+    if user_id == Config.OWNER_ID:
+        return OWNER_WEIGHT
+    if user_data.get(user_id, {}).get("is_sudo"):
+        return SUDO_WEIGHT
+    if Config.PAID_CHANNEL_ID and await is_paid(user_id):
+        return PAID_WEIGHT
+    return FREE_WEIGHT
+
+
 async def check_running_tasks(listener, state="dl"):
     all_limit = Config.QUEUE_ALL
     state_limit = Config.QUEUE_DOWNLOAD if state == "dl" else Config.QUEUE_UPLOAD
+    weight = await _queue_weight(listener.user_id) if all_limit or state_limit else 0
     event = None
     is_over_limit = False
     async with queue_dict_lock:
         if state == "up" and listener.mid in non_queued_dl:
             non_queued_dl.remove(listener.mid)
-        if (
-            (all_limit or state_limit)
-            and not listener.force_run
-            and not (listener.force_upload and state == "up")
-            and not (listener.force_download and state == "dl")
-        ):
+        if all_limit or state_limit:
             dl_count = len(non_queued_dl)
             up_count = len(non_queued_up)
             t_count = dl_count if state == "dl" else up_count
@@ -78,10 +93,16 @@ async def check_running_tasks(listener, state="dl"):
             ) or (state_limit and t_count >= state_limit)
             if is_over_limit:
                 event = Event()
-                if state == "dl":
-                    queued_dl[listener.mid] = event
-                else:
-                    queued_up[listener.mid] = event
+                (queued_dl if state == "dl" else queued_up).add(
+                    listener.mid,
+                    event,
+                    listener.user_id,
+                    weight,
+                    listener.size,
+                    listener.force_run
+                    or (listener.force_upload and state == "up")
+                    or (listener.force_download and state == "dl"),
+                )
         if not is_over_limit:
             if state == "up":
                 non_queued_up.add(listener.mid)
@@ -91,67 +112,29 @@ async def check_running_tasks(listener, state="dl"):
     return is_over_limit, event
 
 
-async def start_dl_from_queued(mid: int):
-    queued_dl[mid].set()
-    del queued_dl[mid]
-    non_queued_dl.add(mid)
-
-
-async def start_up_from_queued(mid: int):
-    queued_up[mid].set()
-    del queued_up[mid]
-    non_queued_up.add(mid)
+def _start_queued(queue, running, limit):
+    """Start up to limit tasks of queue, or all of them without a limit."""
+    started = 0
+    while (limit is None or started < limit) and (task := queue.pop()):
+        mid, event = task
+        event.set()
+        running.add(mid)
+        started += 1
+    return started
 
 
 async def start_from_queued():
-    if all_limit := Config.QUEUE_ALL:
-        dl_limit = Config.QUEUE_DOWNLOAD
-        up_limit = Config.QUEUE_UPLOAD
-        async with queue_dict_lock:
-            dl = len(non_queued_dl)
-            up = len(non_queued_up)
-            all_ = dl + up
-            if all_ < all_limit:
-                f_tasks = all_limit - all_
-                if queued_up and (not up_limit or up < up_limit):
-                    for index, mid in enumerate(list(queued_up.keys()), start=1):
-                        await start_up_from_queued(mid)
-                        f_tasks -= 1
-                        if f_tasks == 0 or (up_limit and index >= up_limit - up):
-                            break
-                if queued_dl and (not dl_limit or dl < dl_limit) and f_tasks != 0:
-                    for index, mid in enumerate(list(queued_dl.keys()), start=1):
-                        await start_dl_from_queued(mid)
-                        if (dl_limit and index >= dl_limit - dl) or index == f_tasks:
-                            break
-        return
-
-    if up_limit := Config.QUEUE_UPLOAD:
-        async with queue_dict_lock:
-            up = len(non_queued_up)
-            if queued_up and up < up_limit:
-                f_tasks = up_limit - up
-                for index, mid in enumerate(list(queued_up.keys()), start=1):
-                    await start_up_from_queued(mid)
-                    if index == f_tasks:
-                        break
-    else:
-        async with queue_dict_lock:
-            if queued_up:
-                for mid in list(queued_up.keys()):
-                    await start_up_from_queued(mid)
-
-    if dl_limit := Config.QUEUE_DOWNLOAD:
-        async with queue_dict_lock:
-            dl = len(non_queued_dl)
-            if queued_dl and dl < dl_limit:
-                f_tasks = dl_limit - dl
-                for index, mid in enumerate(list(queued_dl.keys()), start=1):
-                    await start_dl_from_queued(mid)
-                    if index == f_tasks:
-                        break
-    else:
-        async with queue_dict_lock:
-            if queued_dl:
-                for mid in list(queued_dl.keys()):
-                    await start_dl_from_queued(mid)
+    all_limit = Config.QUEUE_ALL
+    dl_limit = Config.QUEUE_DOWNLOAD
+    up_limit = Config.QUEUE_UPLOAD
+    async with queue_dict_lock:
+        up_free = max(0, up_limit - len(non_queued_up)) if up_limit else None
+        dl_free = max(0, dl_limit - len(non_queued_dl)) if dl_limit else None
+        if all_limit:
+            free = max(0, all_limit - len(non_queued_dl) - len(non_queued_up))
+            up_free = free if up_free is None else min(up_free, free)
+            free -= _start_queued(queued_up, non_queued_up, up_free)
+            dl_free = free if dl_free is None else min(dl_free, free)
+        else:
+            _start_queued(queued_up, non_queued_up, up_free)
+        _start_queued(queued_dl, non_queued_dl, dl_free)
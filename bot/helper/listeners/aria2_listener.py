@@ -4,14 +4,12 @@ from time import time
 
 from aiofiles.os import path as aiopath
 from aiofiles.os import remove
+from aria2p import Download
 
 from bot import LOGGER, aria2, intervals, task_dict, task_dict_lock
+from bot.core.aria2_client import Aria2Client
 from bot.core.config_manager import Config
-from bot.helper.ext_utils.bot_utils import (
-    bt_selection_buttons,
-    loop_thread,
-    sync_to_async,
-)
+from bot.helper.ext_utils.bot_utils import bt_selection_buttons
 from bot.helper.ext_utils.files_utils import clean_unwanted
 from bot.helper.ext_utils.status_utils import get_task_by_gid
 from bot.helper.ext_utils.task_manager import stop_duplicate_check
@@ -23,11 +21,18 @@ from bot.helper.telegram_helper.message_utils import (
 )
 
 
-@loop_thread
-async def _on_download_started(api, gid):
-    download = await sync_to_async(api.get_download, gid)
-    if download.options.follow_torrent == "false":
+async def _get_download(gid):
+    return Download(aria2, await Aria2Client.tell_status(gid))
+
+
+async def _follows_torrent(gid):
+    return (await Aria2Client.get_option(gid)).get("follow-torrent") != "false"
+
+
+async def _on_download_started(gid):
+    if not await _follows_torrent(gid):
         return
+    download = await _get_download(gid)
     if download.is_metadata:
         LOGGER.info(f"onDownloadStarted: {gid} METADATA")
         await sleep(1)
@@ -41,31 +46,29 @@ async def _on_download_started(api, gid):
                     if download.is_removed or download.followed_by_ids:
                         await delete_message(meta)
                         break
-                    await sync_to_async(download.update)
+                    download = await _get_download(gid)
         return
     LOGGER.info(f"onDownloadStarted: {download.name} - Gid: {gid}")
     await sleep(1)
 
     await sleep(2)
     if task := await get_task_by_gid(gid):
-        download = await sync_to_async(api.get_download, gid)
-        await sync_to_async(download.update)
+        download = await _get_download(gid)
         task.listener.name = download.name
         msg, button = await stop_duplicate_check(task.listener)
         if msg:
             await task.listener.on_download_error(msg, button)
-            await sync_to_async(api.remove, [download], force=True, files=True)
+            await Aria2Client.remove(gid, files=True)
             return
 
 
-@loop_thread
-async def _on_download_complete(api, gid):
+async def _on_download_complete(gid):
     try:
-        download = await sync_to_async(api.get_download, gid)
+        if not await _follows_torrent(gid):
+            return
+        download = await _get_download(gid)
     except Exception:
         return
-    if download.options.follow_torrent == "false":
-        return
     if download.followed_by_ids:
         new_gid = download.followed_by_ids[0]
         LOGGER.info(f"Gid changed from {gid} to {new_gid}")
@@ -73,7 +76,7 @@ async def _on_download_complete(api, gid):
             task.listener.is_torrent = True
             if Config.BASE_URL and task.listener.select:
                 if not task.queued:
-                    await sync_to_async(api.client.force_pause, new_gid)
+                    await Aria2Client.force_pause(new_gid)
                 SBUTTONS = bt_selection_buttons(new_gid)
                 msg = "Your download paused. Choose files then press Done Selecting button to start downloading."
                 await send_message(task.listener.message, msg, SBUTTONS)
@@ -85,21 +88,20 @@ async def _on_download_complete(api, gid):
                 await task.listener.on_upload_error(
                     f"Seeding stopped with Ratio: {task.ratio()} and Time: {task.seeding_time()}",
                 )
-                await sync_to_async(api.remove, [download], force=True, files=True)
+                await Aria2Client.remove(gid, files=True)
     else:
         LOGGER.info(f"onDownloadComplete: {download.name} - Gid: {gid}")
         if task := await get_task_by_gid(gid):
             await task.listener.on_download_complete()
             if intervals["stopAll"]:
                 return
-            await sync_to_async(api.remove, [download], force=True, files=True)
+            await Aria2Client.remove(gid, files=True)
 
 
-@loop_thread
-async def _on_bt_download_complete(api, gid):
+async def _on_bt_download_complete(gid):
     seed_start_time = time()
     await sleep(1)
-    download = await sync_to_async(api.get_download, gid)
+    download = await _get_download(gid)
     LOGGER.info(f"onBtDownloadComplete: {download.name} - Gid: {gid}")
     if task := await get_task_by_gid(gid):
         task.listener.is_torrent = True
@@ -113,24 +115,20 @@ async def _on_bt_download_complete(api, gid):
             await clean_unwanted(download.dir)
         if task.listener.seed:
             try:
-                await sync_to_async(
-                    api.set_options,
-                    {"max-upload-limit": "0"},
-                    [download],
-                )
+                await Aria2Client.change_option(gid, {"max-upload-limit": "0"})
             except Exception as e:
                 LOGGER.error(
                     f"{e} You are not able to seed because you added global option seed-time=0 without adding specific seed_time for this torrent GID: {gid}",
                 )
         else:
             try:
-                await sync_to_async(api.client.force_pause, gid)
+                await Aria2Client.force_pause(gid)
             except Exception as e:
                 LOGGER.error(f"{e} GID: {gid}")
         await task.listener.on_download_complete()
         if intervals["stopAll"]:
             return
-        await sync_to_async(download.update)
+        download = await _get_download(gid)
         if (
             task.listener.seed
             and download.is_complete
@@ -140,7 +138,7 @@ async def _on_bt_download_complete(api, gid):
             await task.listener.on_upload_error(
                 f"Seeding stopped with Ratio: {task.ratio()} and Time: {task.seeding_time()}",
             )
-            await sync_to_async(api.remove, [download], force=True, files=True)
+            await Aria2Client.remove(gid, files=True)
         elif (
             task.listener.seed
             and download.is_complete
@@ -150,38 +148,30 @@ async def _on_bt_download_complete(api, gid):
         elif task.listener.seed and not task.listener.is_cancelled:
             async with task_dict_lock:
                 if task.listener.mid not in task_dict:
-                    await sync_to_async(
-                        api.remove,
-                        [download],
-                        force=True,
-                        files=True,
-                    )
+                    await Aria2Client.remove(gid, files=True)
                     return
                 task_dict[task.listener.mid] = Aria2Status(task.listener, gid, True)
                 task_dict[task.listener.mid].start_time = seed_start_time
             LOGGER.info(f"Seeding started: {download.name} - Gid: {gid}")
             await update_status_message(task.listener.message.chat.id)
         else:
-            await sync_to_async(api.remove, [download], force=True, files=True)
+            await Aria2Client.remove(gid, files=True)
 
 
-@loop_thread
-async def _on_download_stopped(_, gid):
+async def _on_download_stopped(gid):
     await sleep(4)
     if task := await get_task_by_gid(gid):
         await task.listener.on_download_error("Dead torrent!")
 
 
-@loop_thread
-async def _on_download_error(api, gid):
+async def _on_download_error(gid):
     await sleep(1)
     LOGGER.info(f"onDownloadError: {gid}")
     error = "None"
     try:
-        download = await sync_to_async(api.get_download, gid)
-        if download.options.follow_torrent == "false":
+        if not await _follows_torrent(gid):
             return
-        error = download.error_message
+        error = (await _get_download(gid)).error_message
         LOGGER.info(f"Download Error: {error}")
     except Exception:
         pass
@@ -189,13 +179,10 @@ async def _on_download_error(api, gid):
         await task.listener.on_download_error(error)
 
 
-def start_aria2_listener():
-    aria2.listen_to_notifications(
-        threaded=False,
-        on_download_start=_on_download_started,
-        on_download_error=_on_download_error,
-        on_download_stop=_on_download_stopped,
-        on_download_complete=_on_download_complete,
-        on_bt_download_complete=_on_bt_download_complete,
-        timeout=60,
-    )
+async def start_aria2_listener():
+    Aria2Client.on("onDownloadStart", _on_download_started)
+    Aria2Client.on("onDownloadError", _on_download_error)
+    Aria2Client.on("onDownloadStop", _on_download_stopped)
+    Aria2Client.on("onDownloadComplete", _on_download_complete)
+    Aria2Client.on("onBtDownloadComplete", _on_bt_download_complete)
+    await Aria2Client.start()
@@ -1,7 +1,16 @@
-from time import sleep
+from asyncio import sleep, wait
 
-from bot import LOGGER, aria2
-from bot.helper.ext_utils.bot_utils import async_to_sync, sync_to_async
+from bot import LOGGER
+from bot.core.aria2_client import Aria2Client
+
+STATUS_KEYS = [
+    "gid",
+    "status",
+    "totalLength",
+    "completedLength",
+    "downloadSpeed",
+    "errorMessage",
+]
 
 
 class DirectListener:
@@ -17,14 +26,43 @@ class DirectListener:
     @property
     def processed_bytes(self):
         if self.download_task:
-            return self._proc_bytes + self.download_task.completed_length
+            return self._proc_bytes + int(
+                self.download_task.get("completedLength", 0),
+            )
         return self._proc_bytes
 
     @property
     def speed(self):
-        return self.download_task.download_speed if self.download_task else 0
+        return (
+            int(self.download_task.get("downloadSpeed", 0))
+            if self.download_task
+            else 0
+        )
 
-    def download(self, contents):
+    async def _wait_download(self, gid):
+        done = Aria2Client.wait_for_gid(gid)
+        try:
+            while True:
+                if self.listener.is_cancelled:
+                    return
+                try:
+                    self.download_task = await Aria2Client.tell_status(
+                        gid,
+                        STATUS_KEYS,
+                    )
+                except Exception as e:
+                    LOGGER.error(f"Aria2c tellStatus: {e}. GID: {gid}")
+                    self.download_task = {"gid": gid, "status": "error"}
+                if self.download_task["status"] in ["complete", "error", "removed"]:
+                    return
+                if done.done():
+                    await sleep(1)
+                else:
+                    await wait([done], timeout=1)
+        finally:
+            Aria2Client.discard_waiter(gid, done)
+
+    async def download(self, contents):
         self.is_downloading = True
         for content in contents:
             if self.listener.is_cancelled:
@@ -36,7 +74,7 @@ class DirectListener:
             filename = content["filename"]
             self._a2c_opt["out"] = filename
             try:
-                self.download_task = aria2.add_uris(
+                gid = await Aria2Client.add_uris(
                     [content["url"]],
                     self._a2c_opt,
                     position=0,
@@ -45,39 +83,34 @@ class DirectListener:
                 self._failed += 1
                 LOGGER.error(f"Unable to download {filename} due to: {e}")
                 continue
-            self.download_task = self.download_task.live
-            while True:
-                if self.listener.is_cancelled:
-                    if self.download_task:
-                        self.download_task.remove(True, True)
-                    break
-                self.download_task = self.download_task.live
-                if error_message := self.download_task.error_message:
-                    self._failed += 1
-                    LOGGER.error(
-                        f"Unable to download {self.download_task.name} due to: {error_message}",
-                    )
-                    self.download_task.remove(True, True)
-                    break
-                if self.download_task.is_complete:
-                    self._proc_bytes += self.download_task.total_length
-                    self.download_task.remove(True)
-                    break
-                sleep(1)
+            self.download_task = {"gid": gid, "status": "waiting"}
+            await self._wait_download(gid)
+            if self.listener.is_cancelled:
+                await Aria2Client.remove(gid, files=True)
+                break
+            status = self.download_task["status"]
+            if status == "complete":
+                self._proc_bytes += int(self.download_task.get("totalLength", 0))
+                await Aria2Client.remove(gid)
+            else:
+                self._failed += 1
+                LOGGER.error(
+                    f"Unable to download {filename} due to: {self.download_task.get('errorMessage') or status}",
+                )
+                await Aria2Client.remove(gid, files=True)
             self.download_task = None
         if self.listener.is_cancelled:
             return
         if self._failed == len(contents):
-            async_to_sync(
-                self.listener.on_download_error,
+            await self.listener.on_download_error(
                 "All files are failed to download!",
             )
             return
-        async_to_sync(self.listener.on_download_complete)
+        await self.listener.on_download_complete()
 
     async def cancel_task(self):
         self.listener.is_cancelled = True
         LOGGER.info(f"Cancelling Download: {self.listener.name}")
         await self.listener.on_download_error("Download Cancelled by User!")
         if self.download_task:
-            await sync_to_async(self.download_task.remove, force=True, files=True)
+            await Aria2Client.remove(self.download_task["gid"], files=True)
@@ -4,6 +4,7 @@ from time import time
 
 from aiofiles.os import path as aiopath
 from aiofiles.os import remove
+from qbittorrentapi import TorrentDictionary
 
 from bot import (
     LOGGER,
@@ -117,16 +118,55 @@ async def _on_download_complete(tor):
         await _remove_torrent(ext_hash, tag)
 
 
+class _TorrentsTable:
+    """Local copy of qBittorrent's torrent list kept up to date from
+    `/sync/maindata` deltas, so each poll only transfers what changed."""
+
+    def __init__(self):
+        self.rid = 0
+        self.torrents = {}
+
+    def reset(self):
+        self.rid = 0
+        self.torrents.clear()
+
+    def apply(self, data):
+        if data.get("full_update"):
+            self.torrents.clear()
+        for hash_, changes in (data.get("torrents") or {}).items():
+            info = self.torrents.get(hash_, {"hash": hash_})
+            self.torrents[hash_] = TorrentDictionary(
+                data={**info, **changes},
+                client=xnox_client,
+            )
+        for hash_ in data.get("torrents_removed") or []:
+            self.torrents.pop(hash_, None)
+        self.rid = data.get("rid", 0)
+
+
+_table = _TorrentsTable()
+
+
 @new_task
 async def _qb_listener():
     while True:
+        try:
+            data = await sync_to_async(xnox_client.sync_maindata, rid=_table.rid)
+        except Exception as e:
+            LOGGER.error(str(e))
+            _table.reset()
+            await sleep(3)
+            continue
         async with qb_listener_lock:
             try:
-                torrents = await sync_to_async(xnox_client.torrents_info)
-                if len(torrents) == 0:
+                _table.apply(data)
+                if not qb_torrents:
                     intervals["qb"] = ""
+                    _table.reset()
                     break
-                for tor_info in torrents:
+                reannounce = []
+                recheck = []
+                for tor_info in list(_table.torrents.values()):
                     tag = tor_info.tags
                     if tag not in qb_torrents:
                         continue
@@ -140,10 +180,7 @@ async def _qb_listener():
                         ):
                             await _on_download_error("Dead Torrent!", tor_info)
                         else:
-                            await sync_to_async(
-                                xnox_client.torrents_reannounce,
-                                torrent_hashes=tor_info.hash,
-                            )
+                            reannounce.append(tor_info.hash)
                     elif state == "downloading":
                         qb_torrents[tag]["stalled_time"] = time()
                         if not qb_torrents[tag]["stop_dup_check"]:
@@ -158,10 +195,7 @@ async def _qb_listener():
                             msg += f"{tor_info.hash} Downloaded Bytes: {tor_info.downloaded} "
                             msg += f"Size: {tor_info.size} Total Size: {tor_info.total_size}"
                             LOGGER.warning(msg)
-                            await sync_to_async(
-                                xnox_client.torrents_recheck,
-                                torrent_hashes=tor_info.hash,
-                            )
+                            recheck.append(tor_info.hash)
                             qb_torrents[tag]["rechecked"] = True
                         elif (
                             Config.TORRENT_TIMEOUT
@@ -170,15 +204,9 @@ async def _qb_listener():
                         ):
                             await _on_download_error("Dead Torrent!", tor_info)
                         else:
-                            await sync_to_async(
-                                xnox_client.torrents_reannounce,
-                                torrent_hashes=tor_info.hash,
-                            )
+                            reannounce.append(tor_info.hash)
                     elif state == "missingFiles":
-                        await sync_to_async(
-                            xnox_client.torrents_recheck,
-                            torrent_hashes=tor_info.hash,
-                        )
+                        recheck.append(tor_info.hash)
                     elif state == "error":
                         await _on_download_error(
                             "No enough space for this torrent on device",
@@ -199,6 +227,16 @@ async def _qb_listener():
                         qb_torrents[tag]["seeding"] = False
                         await _on_seed_finish(tor_info)
                         await sleep(0.5)
+                if reannounce:
+                    await sync_to_async(
+                        xnox_client.torrents_reannounce,
+                        torrent_hashes=reannounce,
+                    )
+                if recheck:
+                    await sync_to_async(
+                        xnox_client.torrents_recheck,
+                        torrent_hashes=recheck,
+                    )
             except Exception as e:
                 LOGGER.error(str(e))
         await sleep(3)
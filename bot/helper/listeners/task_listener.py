@@ -1,4 +1,4 @@
-from asyncio import create_task, gather, sleep
+from asyncio import Queue, create_task, gather, sleep
 from html import escape
 
 from aiofiles.os import listdir, makedirs, remove
@@ -58,9 +58,8 @@ class TaskListener(TaskConfig):
     async def clean(self):
         try:
             if st := intervals["status"]:
-                for intvl in list(st.values()):
-                    intvl.cancel()
-            intervals["status"].clear()
+                st.cancel()
+            intervals["status"] = ""
             await gather(sync_to_async(aria2.purge), delete_status())
         except Exception:
             pass
@@ -182,6 +181,18 @@ class TaskListener(TaskConfig):
         if self.join and not self.is_file:
             await join_files(up_path)
 
+        # Leech tasks whose remaining stages all work on one file at a time
+        # run them per file while earlier files are already uploading.
+        folded_args = self.folded_ffmpeg_args()
+        pipeline = self.is_leech and not (
+            self.compress
+            or (self.ffmpeg_cmds and folded_args is None)
+            or self.screen_shots
+            or self.convert_audio
+            or self.convert_video
+            or self.sample_video
+        )
+
         if self.extract:
             up_path = await self.proceed_extract(up_path, gid)
             if self.is_cancelled:
@@ -195,10 +206,11 @@ class TaskListener(TaskConfig):
             self.proceed_count = 0
             self.progress = True
 
-        if self.watermark:
-            up_path = await self.proceed_watermark(
+        if (self.watermark or self.metadata) and not pipeline:
+            up_path = await self.proceed_metadata_watermark(
                 up_path,
                 gid,
+                folded_args or (),
             )
             if self.is_cancelled:
                 return
@@ -211,23 +223,7 @@ class TaskListener(TaskConfig):
             self.proceed_count = 0
             self.progress = True
 
-        if self.metadata:
-            up_path = await self.proceed_metadata(
-                up_path,
-                gid,
-            )
-            if self.is_cancelled:
-                return
-            self.is_file = await aiopath.isfile(up_path)
-            up_dir, self.name = up_path.rsplit("/", 1)
-            self.size = await get_path_size(up_dir)
-            self.subname = ""
-            self.subsize = 0
-            self.files_to_proceed = []
-            self.proceed_count = 0
-            self.progress = True
-
-        if self.ffmpeg_cmds:
+        if self.ffmpeg_cmds and folded_args is None:
             up_path = await self.proceed_ffmpeg(
                 up_path,
                 gid,
@@ -307,7 +303,7 @@ class TaskListener(TaskConfig):
         up_dir, self.name = up_path.rsplit("/", 1)
         self.size = await get_path_size(up_dir)
 
-        if self.is_leech and not self.compress:
+        if self.is_leech and not self.compress and not pipeline:
             await self.proceed_split(
                 up_path,
                 gid,
@@ -335,13 +331,22 @@ class TaskListener(TaskConfig):
 
         if self.is_leech:
             LOGGER.info(f"Leech Name: {self.name}")
-            tg = TelegramUploader(self, up_dir)
+            files_queue = Queue(maxsize=2) if pipeline else None
+            tg = TelegramUploader(self, up_dir, files_queue)
             async with task_dict_lock:
                 task_dict[self.mid] = TelegramStatus(self, tg, gid, "up")
-            await gather(
-                update_status_message(self.message.chat.id),
-                tg.upload(),
-            )
+            if pipeline:
+                producer = create_task(
+                    self.proceed_pipeline(up_dir, files_queue, folded_args or ()),
+                )
+            try:
+                await gather(
+                    update_status_message(self.message.chat.id),
+                    tg.upload(),
+                )
+            finally:
+                if pipeline:
+                    producer.cancel()
         elif is_gdrive_id(self.up_dest):
             LOGGER.info(f"Gdrive Upload Name: {self.name}")
             drive = GoogleDriveUpload(self, up_path)
@@ -349,7 +354,7 @@ class TaskListener(TaskConfig):
                 task_dict[self.mid] = GoogleDriveStatus(self, drive, gid, "up")
             await gather(
                 update_status_message(self.message.chat.id),
-                sync_to_async(drive.upload),
+                sync_to_async(drive.upload, workload="io-long"),
             )
         else:
             LOGGER.info(f"Rclone Upload Name: {self.name}")
@@ -499,12 +504,10 @@ class TaskListener(TaskConfig):
             await database.rm_complete_task(self.message.link)
 
         async with queue_dict_lock:
-            if self.mid in queued_dl:
-                queued_dl[self.mid].set()
-                del queued_dl[self.mid]
-            if self.mid in queued_up:
-                queued_up[self.mid].set()
-                del queued_up[self.mid]
+            if event := queued_dl.remove(self.mid):
+                event.set()
+            if event := queued_up.remove(self.mid):
+                event.set()
             if self.mid in non_queued_dl:
                 non_queued_dl.remove(self.mid)
             if self.mid in non_queued_up:
@@ -538,12 +541,10 @@ class TaskListener(TaskConfig):
             await database.rm_complete_task(self.message.link)
 
         async with queue_dict_lock:
-            if self.mid in queued_dl:
-                queued_dl[self.mid].set()
-                del queued_dl[self.mid]
-            if self.mid in queued_up:
-                queued_up[self.mid].set()
-                del queued_up[self.mid]
+            if event := queued_dl.remove(self.mid):
+                event.set()
+            if event := queued_up.remove(self.mid):
+                event.set()
             if self.mid in non_queued_dl:
                 non_queued_dl.remove(self.mid)
             if self.mid in non_queued_up:
@@ -1,7 +1,8 @@
 from aiofiles.os import path as aiopath
 from aiofiles.os import remove
 
-from bot import LOGGER, aria2, task_dict, task_dict_lock
+from bot import LOGGER, task_dict, task_dict_lock
+from bot.core.aria2_client import Aria2Client, download_name
 from bot.core.config_manager import Config
 from bot.helper.ext_utils.bot_utils import bt_selection_buttons, sync_to_async
 from bot.helper.ext_utils.task_manager import check_running_tasks
@@ -33,26 +34,28 @@ async def add_aria2c_download(listener, dpath, header, ratio, seed_time):
             a2c_opt["pause"] = "true"
 
     try:
-        download = (await sync_to_async(aria2.add, listener.link, a2c_opt))[0]
+        gid = await Aria2Client.add(listener.link, a2c_opt)
+        download = await Aria2Client.tell_status(gid)
     except Exception as e:
         LOGGER.info(f"Aria2c Download Error: {e}")
         await listener.on_download_error(f"{e}")
         return
     if await aiopath.exists(listener.link):
         await remove(listener.link)
-    if download.error_message:
-        error = str(download.error_message).replace("<", " ").replace(">", " ")
+    if error_message := download.get("errorMessage"):
+        error = str(error_message).replace("<", " ").replace(">", " ")
         LOGGER.info(f"Aria2c Download Error: {error}")
         await listener.on_download_error(error)
         return
 
-    gid = download.gid
-    name = download.name
+    name = download_name(download)
+    is_torrent = "bittorrent" in download
+    is_metadata = name.startswith("[METADATA]")
     async with task_dict_lock:
         task_dict[listener.mid] = Aria2Status(listener, gid, queued=add_to_queue)
     if add_to_queue:
         LOGGER.info(f"Added to Queue/Download: {name}. Gid: {gid}")
-        if (not listener.select or not download.is_torrent) and listener.multi <= 1:
+        if (not listener.select or not is_torrent) and listener.multi <= 1:
             await send_status_message(listener.message)
     else:
         LOGGER.info(f"Aria2Download started: {name}. Gid: {gid}")
@@ -65,9 +68,9 @@ async def add_aria2c_download(listener, dpath, header, ratio, seed_time):
         and listener.multi <= 1
     ):
         await send_status_message(listener.message)
-    elif listener.select and download.is_torrent and not download.is_metadata:
+    elif listener.select and is_torrent and not is_metadata:
         if not add_to_queue:
-            await sync_to_async(aria2.client.force_pause, gid)
+            await Aria2Client.force_pause(gid)
         SBUTTONS = bt_selection_buttons(gid)
         msg = "Your download paused. Choose files then press Done Selecting button to start downloading."
         await send_message(listener.message, msg, SBUTTONS)
@@ -82,5 +85,5 @@ async def add_aria2c_download(listener, dpath, header, ratio, seed_time):
             await sync_to_async(task.update)
             new_gid = task.gid()
 
-        await sync_to_async(aria2.client.unpause, new_gid)
+        await Aria2Client.unpause(new_gid)
         LOGGER.info(f"Start Queued Download from Aria2c: {name}. Gid: {gid}")
@@ -21,6 +21,7 @@ async def add_gd_download(listener, path):
         drive.count,
         listener.link,
         listener.user_id,
+        workload="io-long",
     )
     if mime_type is None:
         await listener.on_download_error(name)
@@ -58,4 +59,4 @@ async def add_gd_download(listener, path):
         if listener.multi <= 1:
             await send_status_message(listener.message)
 
-    await sync_to_async(drive.download)
+    await sync_to_async(drive.download, workload="io-long")
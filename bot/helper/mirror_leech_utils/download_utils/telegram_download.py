@@ -1,10 +1,20 @@
-from asyncio import Lock, sleep
+from asyncio import CancelledError, Lock, TaskGroup, shield, sleep, wait
+from contextlib import aclosing
+from os import O_CREAT, O_WRONLY, close, ftruncate, pwrite
+from os import open as osopen
+from os import path as ospath
 from secrets import token_hex
 from time import time
 
+from aiofiles.os import makedirs
+from pyrogram import raw
 from pyrogram.errors import FloodPremiumWait, FloodWait
+from pyrogram.file_id import FileId
+from pyrogram.session import Auth, Session
 
 from bot import LOGGER, task_dict, task_dict_lock
+from bot.core.config_manager import Config
+from bot.helper.ext_utils.bot_utils import sync_to_async
 from bot.helper.ext_utils.task_manager import (
     check_running_tasks,
     stop_duplicate_check,
@@ -16,6 +26,9 @@ from bot.helper.telegram_helper.message_utils import send_status_message
 global_lock = Lock()
 GLOBAL_GID = set()
 
+CHUNK_SIZE = 1024 * 1024
+MIN_PART_CHUNKS = 16
+
 
 class TelegramDownloadHelper:
     def __init__(self, listener):
@@ -70,18 +83,180 @@ class TelegramDownloadHelper:
         async with global_lock:
             GLOBAL_GID.remove(self._id)
 
-    async def _download(self, message, path):
+    def _connections(self, f_size):
+        return max(
+            1,
+            min(
+                Config.TELEGRAM_DL_CONNECTIONS,
+                self.session.max_concurrent_transmissions,
+                -(-f_size // (CHUNK_SIZE * MIN_PART_CHUNKS)),
+            ),
+        )
+
+    async def _media_session(self, dc_id):
+        """A media session to dc_id for the caller to stop, authorized the
+        way get_file authorizes its own."""
+        client = self.session
+        test_mode = await client.storage.test_mode()
+        home = dc_id == await client.storage.dc_id()
+        session = Session(
+            client,
+            dc_id,
+            await client.storage.auth_key()
+            if home
+            else await Auth(client, dc_id, test_mode).create(),
+            test_mode,
+            is_media=True,
+        )
+        await session.start()
         try:
-            download = await message.download(
-                file_name=path,
-                progress=self._on_download_progress,
+            if not home:
+                exported = await client.invoke(
+                    raw.functions.auth.ExportAuthorization(dc_id=dc_id),
+                )
+                await session.invoke(
+                    raw.functions.auth.ImportAuthorization(
+                        id=exported.id,
+                        bytes=exported.bytes,
+                    ),
+                )
+        except BaseException:
+            await session.stop()
+            raise
+        return session
+
+    async def _range_chunks(self, session, file_id, start, end):
+        """Chunks [start, end) over session. Files served from a CDN are
+        left to get_file."""
+        location = raw.types.InputDocumentFileLocation(
+            id=file_id.media_id,
+            access_hash=file_id.access_hash,
+            file_reference=file_id.file_reference,
+            thumb_size=file_id.thumbnail_size,
+        )
+        while start < end:
+            r = await session.invoke(
+                raw.functions.upload.GetFile(
+                    location=location,
+                    offset=start * CHUNK_SIZE,
+                    limit=CHUNK_SIZE,
+                ),
+                sleep_threshold=30,
             )
+            if not isinstance(r, raw.types.upload.File):
+                async with aclosing(
+                    self.session.get_file(file_id, 0, end - start, start),
+                ) as chunks:
+                    async for chunk in chunks:
+                        yield chunk
+                return
+            yield r.bytes
+            start += 1
+            if len(r.bytes) < CHUNK_SIZE:
+                return
+
+    async def _fetch_range(self, file_id, fd, progress, index, start, end):
+        """Fetch chunks [start, end) over a media session of its own and write
+        them in place, resuming from the last written chunk on errors."""
+        session = None
+        retries = 0
+        try:
+            while start < end:
+                try:
+                    if session is None:
+                        session = await self._media_session(file_id.dc_id)
+                    async with aclosing(
+                        self._range_chunks(session, file_id, start, end),
+                    ) as chunks:
+                        async for chunk in chunks:
+                            if self._listener.is_cancelled:
+                                return
+                            write = await sync_to_async(
+                                pwrite,
+                                fd,
+                                chunk,
+                                start * CHUNK_SIZE,
+                                wait=False,
+                            )
+                            try:
+                                await shield(write)
+                            except CancelledError:
+                                # The thread still writes, fd must outlive it
+                                await wait([write])
+                                raise
+                            progress[index] += len(chunk)
+                            self._processed_bytes = sum(progress)
+                            start += 1
+                            retries = 0
+                    if start < end:
+                        raise ValueError(
+                            f"Telegram returned a short chunk at {start}",
+                        )
+                except (FloodWait, FloodPremiumWait) as f:
+                    LOGGER.warning(str(f))
+                    await sleep(f.value)
+                except Exception:
+                    if self._listener.is_cancelled:
+                        return
+                    retries += 1
+                    if retries > 3:
+                        raise
+                    await sleep(retries)
+        finally:
+            if session is not None:
+                await session.stop()
+
+    async def _parallel_download(self, media, path):
+        """Split the file in contiguous chunk ranges, one per connection, and
+        write them with positional writes into a preallocated file."""
+        f_size = media.file_size
+        directory, file_name = ospath.split(path)
+        path = ospath.join(directory, file_name or media.file_name)
+        await makedirs(directory, exist_ok=True)
+        fd = await sync_to_async(osopen, path, O_WRONLY | O_CREAT, 0o644)
+        try:
+            await sync_to_async(ftruncate, fd, f_size)
+            chunks = -(-f_size // CHUNK_SIZE)
+            connections = self._connections(f_size)
+            step = -(-chunks // connections)
+            bounds = [
+                (start, min(start + step, chunks))
+                for start in range(0, chunks, step)
+            ]
+            progress = [0] * len(bounds)
+            file_id = FileId.decode(media.file_id)
+            # A failing range cancels the others so none writes after close
+            try:
+                async with TaskGroup() as tg:
+                    for index, bound in enumerate(bounds):
+                        tg.create_task(
+                            self._fetch_range(file_id, fd, progress, index, *bound),
+                        )
+            except ExceptionGroup as eg:
+                raise eg.exceptions[0] from None
+        finally:
+            await sync_to_async(close, fd)
+        return None if self._listener.is_cancelled else path
+
+    async def _download(self, message, media, path):
+        try:
+            if (
+                Config.TELEGRAM_DL_CONNECTIONS > 1
+                and getattr(media, "file_name", None)
+                and self._connections(media.file_size) > 1
+            ):
+                download = await self._parallel_download(media, path)
+            else:
+                download = await message.download(
+                    file_name=path,
+                    progress=self._on_download_progress,
+                )
             if self._listener.is_cancelled:
                 return
         except (FloodWait, FloodPremiumWait) as f:
             LOGGER.warning(str(f))
             await sleep(f.value)
-            await self._download(message, path)
+            await self._download(message, media, path)
             return
         except Exception as e:
             LOGGER.error(str(e))
@@ -151,7 +326,7 @@ class TelegramDownloadHelper:
                         return
 
                 await self._on_download_start(gid, add_to_queue)
-                await self._download(message, path)
+                await self._download(message, media, path)
             else:
                 await self._on_download_error("File already being downloaded!")
         else:
@@ -242,7 +242,7 @@ class YoutubeDLHelper:
 
         self.opts["format"] = qual
 
-        await sync_to_async(self._extract_meta_data)
+        await sync_to_async(self._extract_meta_data, workload="io-long")
         if self._listener.is_cancelled:
             return
 
@@ -347,7 +347,7 @@ class YoutubeDLHelper:
         if not add_to_queue:
             LOGGER.info(f"Download with YT_DLP: {self._listener.name}")
 
-        await sync_to_async(self._download, path)
+        await sync_to_async(self._download, path, workload="io-long")
 
     async def cancel_task(self):
         self._listener.is_cancelled = True
@@ -1,6 +1,9 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from logging import getLogger
 from os import path as ospath
-from time import time
+from queue import Queue
+from threading import Lock
+from time import sleep, time
 
 from googleapiclient.errors import HttpError
 from tenacity import (
@@ -11,6 +14,7 @@ from tenacity import (
     wait_exponential,
 )
 
+from bot.core.config_manager import Config
 from bot.helper.ext_utils.bot_utils import async_to_sync
 from bot.helper.mirror_leech_utils.gdrive_utils.helper import GoogleDriveHelper
 
@@ -21,6 +25,7 @@ class GoogleDriveClone(GoogleDriveHelper):
     def __init__(self, listener):
         self.listener = listener
         self._start_time = time()
+        self._lock = Lock()
         super().__init__()
         self.is_cloning = True
         self.user_setting()
@@ -110,28 +115,115 @@ class GoogleDriveClone(GoogleDriveHelper):
             return None, None, None, None, None
 
     def _clone_folder(self, folder_name, folder_id, dest_id):
-        LOGGER.info(f"Syncing: {folder_name}")
-        files = self.get_files_by_folder_id(folder_id)
-        if len(files) == 0:
-            return dest_id
-        for file in files:
-            if file.get("mimeType") == self.G_DRIVE_DIR_MIME_TYPE:
-                self.total_folders += 1
-                file_path = ospath.join(folder_name, file.get("name"))
-                current_dir_id = self.create_directory(file.get("name"), dest_id)
-                self._clone_folder(file_path, file.get("id"), current_dir_id)
-            elif (
-                not file.get("name")
-                .lower()
-                .endswith(tuple(self.listener.extension_filter))
-            ):
-                self.total_files += 1
-                self._copy_file(file.get("id"), dest_id)
-                self.proc_bytes += int(file.get("size", 0))
-                self.total_time = int(time() - self._start_time)
+        count = max(1, Config.GDRIVE_CLONE_WORKERS)
+        workers = Queue()
+        for index in range(count):
+            worker = self.new_worker(index)
+            worker.sa_step = count
+            workers.put(worker)
+
+        def run(func, *args):
+            worker = workers.get()
+            try:
+                return func(worker, *args)
+            finally:
+                workers.put(worker)
+
+        with ThreadPoolExecutor(max_workers=count) as pool:
+            copies = []
+            level = [(folder_name, folder_id, dest_id)]
+            while level and not self.listener.is_cancelled:
+                LOGGER.info(f"Syncing: {len(level)} folders of {folder_name}")
+                listings = pool.map(
+                    lambda item: run(
+                        GoogleDriveHelper.get_files_by_folder_id,
+                        item[1],
+                    ),
+                    level,
+                )
+                folders = {}
+                for (path, _, dest), files in zip(level, listings, strict=True):
+                    for file in files:
+                        name = file.get("name")
+                        if file.get("mimeType") == self.G_DRIVE_DIR_MIME_TYPE:
+                            folders[(ospath.join(path, name), file.get("id"))] = (
+                                name,
+                                dest,
+                            )
+                        elif not name.lower().endswith(
+                            tuple(self.listener.extension_filter),
+                        ):
+                            copies.append(
+                                (file.get("id"), dest, int(file.get("size", 0))),
+                            )
+                created = self.create_directories(folders)
+                self.total_folders += len(created)
+                level = [(path, src, created[(path, src)]) for path, src in created]
+            futures = [
+                pool.submit(run, self._copy_batch, copies[start : start + 100])
+                for start in range(0, len(copies), 100)
+            ]
+            try:
+                for future in as_completed(futures):
+                    future.result()
+            except Exception:
+                pool.shutdown(cancel_futures=True)
+                raise
+
+    def _copy_batch(self, worker, items):
+        """Copy [(file_id, dest_id, size)] with one batch request, retrying
+        only the items that failed."""
+        pending = dict(enumerate(items))
+        for attempt in range(5):
             if self.listener.is_cancelled:
-                break
-        return None
+                return
+            results = worker.batch_execute(
+                {
+                    key: worker.service.files().copy(
+                        fileId=file_id,
+                        body={"parents": [dest_id]},
+                        supportsAllDrives=True,
+                        fields="id",
+                    )
+                    for key, (file_id, dest_id, _) in pending.items()
+                },
+            )
+            failed = {}
+            error = None
+            for key, response in results.items():
+                if not isinstance(response, Exception):
+                    with self._lock:
+                        self.total_files += 1
+                        self.proc_bytes += pending[key][2]
+                        self.total_time = int(time() - self._start_time)
+                    continue
+                reason = self.error_reason(response)
+                if reason == "cannotCopyFile":
+                    LOGGER.error(response)
+                    continue
+                if reason in ["userRateLimitExceeded", "dailyLimitExceeded"]:
+                    if not worker.use_sa:
+                        LOGGER.error(f"Got: {reason}")
+                        raise response
+                    error = response
+                elif not (
+                    isinstance(response, HttpError)
+                    and response.resp.status in [500, 502, 503, 504, 429]
+                ):
+                    raise response
+                failed[key] = pending[key]
+            if not (pending := failed):
+                return
+            if error is not None:
+                if worker.sa_count >= worker.sa_switch_limit:
+                    LOGGER.info(
+                        f"Reached maximum number of service accounts switching, which is {worker.sa_count}",
+                    )
+                    raise error
+                worker.switch_service_account()
+            else:
+                sleep(2**attempt)
+        raise Exception(f"Failed to copy {len(pending)} files after 5 attempts")
 
     @retry(
         wait=wait_exponential(multiplier=2, min=3, max=6),
@@ -147,10 +239,7 @@ class GoogleDriveClone(GoogleDriveHelper):
                 .execute()
             )
         except HttpError as err:
-            if err.resp.get("content-type", "").startswith("application/json"):
-                reason = (
-                    eval(err.content).get("error").get("errors")[0].get("reason")
-                )
+            if reason := self.error_reason(err):
                 if reason not in [
                     "userRateLimitExceeded",
                     "dailyLimitExceeded",
@@ -160,7 +249,7 @@ class GoogleDriveClone(GoogleDriveHelper):
                 if reason == "cannotCopyFile":
                     LOGGER.error(err)
                 elif self.use_sa:
-                    if self.sa_count >= self.sa_number:
+                    if self.sa_count >= self.sa_switch_limit:
                         LOGGER.info(
                             f"Reached maximum number of service accounts switching, which is {self.sa_count}",
                         )
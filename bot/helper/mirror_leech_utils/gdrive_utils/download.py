@@ -1,7 +1,11 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from io import FileIO
 from logging import getLogger
-from os import makedirs
+from os import O_WRONLY, close, makedirs, pwrite
+from os import open as osopen
 from os import path as ospath
+from queue import Queue
+from threading import Lock
 
 from googleapiclient.errors import HttpError
 from googleapiclient.http import MediaIoBaseDownload
@@ -13,11 +17,15 @@ from tenacity import (
     wait_exponential,
 )
 
+from bot.core.config_manager import Config
 from bot.helper.ext_utils.bot_utils import SetInterval, async_to_sync
 from bot.helper.mirror_leech_utils.gdrive_utils.helper import GoogleDriveHelper
 
 LOGGER = getLogger(__name__)
 
+RANGE_SIZE = 32 * 1024 * 1024
+QUOTA_REASONS = ["downloadQuotaExceeded", "dailyLimitExceeded"]
+
 
 class GoogleDriveDownload(GoogleDriveHelper):
     def __init__(self, listener, path):
@@ -26,6 +34,19 @@ class GoogleDriveDownload(GoogleDriveHelper):
         self._path = path
         super().__init__()
         self.is_downloading = True
+        self._workers = []
+        self._failed = False
+        self._downloaded_bytes = 0
+        self._bytes_lock = Lock()
+
+    async def progress(self):
+        in_flight = sum(
+            worker.status.resumable_progress
+            for worker in self._workers
+            if worker.status is not None
+        )
+        self.proc_bytes = self._downloaded_bytes + in_flight
+        self.total_time += self.update_interval
 
     def download(self):
         file_id = self.get_id_from_url(self.listener.link, self.listener.user_id)
@@ -34,15 +55,19 @@ class GoogleDriveDownload(GoogleDriveHelper):
         try:
             meta = self.get_file_metadata(file_id)
             if meta.get("mimeType") == self.G_DRIVE_DIR_MIME_TYPE:
-                self._download_folder(file_id, self._path, self.listener.name)
+                files = self._list_folder(file_id, self._path, self.listener.name)
             else:
                 makedirs(self._path, exist_ok=True)
-                self._download_file(
-                    file_id,
-                    self._path,
-                    self.listener.name,
-                    meta.get("mimeType"),
-                )
+                files = [
+                    (
+                        file_id,
+                        self._path,
+                        self.listener.name,
+                        meta.get("mimeType"),
+                        int(meta.get("size", 0)),
+                    ),
+                ]
+            self._download_files(files)
         except Exception as err:
             if isinstance(err, RetryError):
                 LOGGER.info(f"Total Attempts: {err.last_attempt.attempt_number}")
@@ -65,52 +90,94 @@ class GoogleDriveDownload(GoogleDriveHelper):
             if not self.listener.is_cancelled:
                 async_to_sync(self.listener.on_download_complete)
 
-    def _download_folder(self, folder_id, path, folder_name):
+    def _list_folder(self, folder_id, path, folder_name):
+        """Create the local tree of a Drive folder and return its files as
+        (file_id, path, filename, mime_type, size)."""
         folder_name = folder_name.replace("/", "")
-        if not ospath.exists(f"{path}/{folder_name}"):
-            makedirs(f"{path}/{folder_name}")
         path += f"/{folder_name}"
-        result = self.get_files_by_folder_id(folder_id)
-        if len(result) == 0:
-            return
-        result = sorted(result, key=lambda k: k["name"])
-        for item in result:
+        makedirs(path, exist_ok=True)
+        files = []
+        for item in sorted(
+            self.get_files_by_folder_id(folder_id),
+            key=lambda k: k["name"],
+        ):
             file_id = item["id"]
             filename = item["name"]
-            shortcut_details = item.get("shortcutDetails")
-            if shortcut_details is not None:
+            size = int(item.get("size", 0))
+            if shortcut_details := item.get("shortcutDetails"):
                 file_id = shortcut_details["targetId"]
                 mime_type = shortcut_details["targetMimeType"]
+                size = 0
             else:
                 mime_type = item.get("mimeType")
             if mime_type == self.G_DRIVE_DIR_MIME_TYPE:
-                self._download_folder(file_id, path, filename)
+                files.extend(self._list_folder(file_id, path, filename))
             elif not ospath.isfile(
-                f"{path}{filename}",
+                f"{path}/{filename}",
             ) and not filename.lower().endswith(
                 tuple(self.listener.extension_filter),
             ):
-                self._download_file(file_id, path, filename, mime_type)
+                files.append((file_id, path, filename, mime_type, size))
             if self.listener.is_cancelled:
                 break
+        return files
 
-    @retry(
-        wait=wait_exponential(multiplier=2, min=3, max=6),
-        stop=stop_after_attempt(3),
-        retry=(retry_if_exception_type(Exception)),
-    )
-    def _download_file(self, file_id, path, filename, mime_type, export=False):
-        if export:
-            request = self.service.files().export_media(
-                fileId=file_id,
-                mimeType="application/pdf",
-            )
-        else:
-            request = self.service.files().get_media(
-                fileId=file_id,
-                supportsAllDrives=True,
-                acknowledgeAbuse=True,
-            )
+    def _download_files(self, files):
+        """Download the files over a pool of workers. Files big enough are
+        split in RANGE_SIZE jobs fetched with HTTP Range requests into a
+        preallocated file, the rest are streamed whole."""
+        count = max(1, Config.GDRIVE_DOWNLOAD_WORKERS)
+        jobs = []
+        for file_id, path, filename, mime_type, size in files:
+            if count > 1 and size > RANGE_SIZE:
+                f_path = f"{path}/{self._file_name(filename)}"
+                with open(f_path, "wb") as f:
+                    f.truncate(size)
+                jobs.extend(
+                    (
+                        self._download_range,
+                        file_id,
+                        f_path,
+                        start,
+                        min(start + RANGE_SIZE, size) - 1,
+                    )
+                    for start in range(0, size, RANGE_SIZE)
+                )
+            else:
+                jobs.append(
+                    (self._download_file, file_id, path, filename, mime_type),
+                )
+        count = min(count, len(jobs)) or 1
+        self._workers = []
+        workers = Queue()
+        for index in range(count):
+            worker = self.new_worker(index)
+            worker.sa_step = count
+            self._workers.append(worker)
+            workers.put(worker)
+
+        def run(func, *args):
+            worker = workers.get()
+            try:
+                if not self._should_stop():
+                    func(worker, *args)
+            finally:
+                workers.put(worker)
+
+        with ThreadPoolExecutor(max_workers=count) as pool:
+            futures = [pool.submit(run, *job) for job in jobs]
+            try:
+                for future in as_completed(futures):
+                    future.result()
+            except Exception:
+                self._failed = True
+                pool.shutdown(cancel_futures=True)
+                raise
+
+    def _should_stop(self):
+        return self.listener.is_cancelled or self._failed
+
+    def _file_name(self, filename, export=False):
         filename = filename.replace("/", "")
         if export:
             filename = f"{filename}.pdf"
@@ -120,57 +187,117 @@ class GoogleDriveDownload(GoogleDriveHelper):
 
             if self.listener.name.endswith(ext):
                 self.listener.name = filename
-        if self.listener.is_cancelled:
-            return None
-        fh = FileIO(f"{path}/{filename}", "wb")
-        downloader = MediaIoBaseDownload(fh, request, chunksize=50 * 1024 * 1024)
-        done = False
+        return filename
+
+    def _switch_account(self, worker, err, reason):
+        if reason not in QUOTA_REASONS:
+            raise err
+        if not worker.use_sa:
+            LOGGER.error(f"Got: {reason}")
+            raise err
+        if worker.sa_count >= worker.sa_switch_limit:
+            LOGGER.info(
+                f"Reached maximum number of service accounts switching, which is {worker.sa_count}",
+            )
+            raise err
+        worker.switch_service_account()
+        LOGGER.info(f"Got: {reason}, Trying Again...")
+
+    def _download_range(self, worker, file_id, f_path, start, end):
         retries = 0
-        while not done:
-            if self.listener.is_cancelled:
-                fh.close()
-                break
+        while start <= end and not self._should_stop():
+            request = worker.service.files().get_media(
+                fileId=file_id,
+                supportsAllDrives=True,
+                acknowledgeAbuse=True,
+            )
+            request.headers["range"] = f"bytes={start}-{end}"
             try:
-                self.status, done = downloader.next_chunk()
+                content = request.execute()
             except HttpError as err:
                 LOGGER.error(err)
                 if err.resp.status in [500, 502, 503, 504, 429] and retries < 10:
                     retries += 1
                     continue
-                if err.resp.get("content-type", "").startswith("application/json"):
-                    reason = (
-                        eval(err.content).get("error").get("errors")[0].get("reason")
-                    )
+                self._switch_account(worker, err, self.error_reason(err))
+                continue
+            if not content:
+                raise Exception(
+                    f"Empty response for bytes {start}-{end} of {f_path}",
+                )
+            fd = osopen(f_path, O_WRONLY)
+            try:
+                pwrite(fd, content, start)
+            finally:
+                close(fd)
+            with self._bytes_lock:
+                self._downloaded_bytes += len(content)
+            start += len(content)
+            retries = 0
+
+    @retry(
+        wait=wait_exponential(multiplier=2, min=3, max=6),
+        stop=stop_after_attempt(3),
+        retry=(retry_if_exception_type(Exception)),
+    )
+    def _download_file(
+        self,
+        worker,
+        file_id,
+        path,
+        filename,
+        mime_type,
+        export=False,
+    ):
+        if export:
+            request = worker.service.files().export_media(
+                fileId=file_id,
+                mimeType="application/pdf",
+            )
+        else:
+            request = worker.service.files().get_media(
+                fileId=file_id,
+                supportsAllDrives=True,
+                acknowledgeAbuse=True,
+            )
+        filename = self._file_name(filename, export)
+        if self._should_stop():
+            return None
+        with FileIO(f"{path}/{filename}", "wb") as fh:
+            downloader = MediaIoBaseDownload(fh, request, chunksize=50 * 1024 * 1024)
+            done = False
+            retries = 0
+            while not done:
+                if self._should_stop():
+                    worker.status = None
+                    return None
+                try:
+                    worker.status, done = downloader.next_chunk()
+                except HttpError as err:
+                    LOGGER.error(err)
+                    if err.resp.status in [500, 502, 503, 504, 429] and retries < 10:
+                        retries += 1
+                        continue
+                    worker.status = None
+                    reason = self.error_reason(err)
                     if "fileNotDownloadable" in reason and "document" in mime_type:
                         return self._download_file(
+                            worker,
                             file_id,
                             path,
                             filename,
                             mime_type,
                             True,
                         )
-                    if reason not in [
-                        "downloadQuotaExceeded",
-                        "dailyLimitExceeded",
-                    ]:
-                        raise err
-                    if self.use_sa:
-                        if self.sa_count >= self.sa_number:
-                            LOGGER.info(
-                                f"Reached maximum number of service accounts switching, which is {self.sa_count}",
-                            )
-                            raise err
-                        if self.listener.is_cancelled:
-                            return None
-                        self.switch_service_account()
-                        LOGGER.info(f"Got: {reason}, Trying Again...")
-                        return self._download_file(
-                            file_id,
-                            path,
-                            filename,
-                            mime_type,
-                        )
-                    LOGGER.error(f"Got: {reason}")
-                    raise err
-        self.file_processed_bytes = 0
+                    self._switch_account(worker, err, reason)
+                    return self._download_file(
+                        worker,
+                        file_id,
+                        path,
+                        filename,
+                        mime_type,
+                    )
+        with self._bytes_lock:
+            worker.status = None
+            self._downloaded_bytes += ospath.getsize(f"{path}/{filename}")
         return None
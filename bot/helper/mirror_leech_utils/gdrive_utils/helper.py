@@ -1,3 +1,4 @@
+from json import loads
 from logging import ERROR, getLogger
 from os import listdir
 from os import path as ospath
@@ -9,6 +10,7 @@ from urllib.parse import parse_qs, urlparse
 from google.oauth2 import service_account
 from google_auth_httplib2 import AuthorizedHttp
 from googleapiclient.discovery import build
+from googleapiclient.errors import HttpError
 from googleapiclient.http import build_http
 from tenacity import (
     retry,
@@ -41,6 +43,7 @@ class GoogleDriveHelper:
         self.sa_index = 0
         self.sa_count = 1
         self.sa_number = 100
+        self.sa_step = 1
         self.alt_auth = False
         self.service = None
         self.total_files = 0
@@ -75,12 +78,16 @@ class GoogleDriveHelper:
             self.proc_bytes += chunk_size
             self.total_time += self.update_interval
 
-    def authorize(self):
+    def authorize(self, sa_index=None):
         credentials = None
         if self.use_sa:
             json_files = listdir("accounts")
             self.sa_number = len(json_files)
-            self.sa_index = randrange(self.sa_number)
+            self.sa_index = (
+                randrange(self.sa_number)
+                if sa_index is None
+                else sa_index % self.sa_number
+            )
             LOGGER.info(
                 f"Authorizing with {json_files[self.sa_index]} service account",
             )
@@ -98,14 +105,55 @@ class GoogleDriveHelper:
         authorized_http.http.disable_ssl_certificate_validation = True
         return build("drive", "v3", http=authorized_http, cache_discovery=False)
 
+    @property
+    def sa_switch_limit(self):
+        """Accounts one helper goes through, parallel workers that step
+        through them by sa_step each get their share."""
+        return -(-self.sa_number // self.sa_step)
+
     def switch_service_account(self):
-        if self.sa_index == self.sa_number - 1:
-            self.sa_index = 0
-        else:
-            self.sa_index += 1
+        self.sa_index = (self.sa_index + self.sa_step) % self.sa_number
         self.sa_count += 1
         LOGGER.info(f"Switching to {self.sa_index} index")
-        self.service = self.authorize()
+        self.service = self.authorize(self.sa_index)
+
+    def batch_execute(self, requests):
+        """Send {key: request} through Drive batch HTTP, 100 per round trip.
+
+        Returns {key: response}; a failed request maps to its exception.
+        """
+        results = {}
+        keys = list(requests)
+
+        def callback(request_id, response, exception):
+            results[keys[int(request_id)]] = exception or response
+
+        for start in range(0, len(keys), 100):
+            batch = self.service.new_batch_http_request(callback=callback)
+            for index in range(start, min(start + 100, len(keys))):
+                batch.add(requests[keys[index]], request_id=str(index))
+            batch.execute()
+        return results
+
+    def new_worker(self, index):
+        """An own authorized service for another thread, on the index-th
+        service account after this one."""
+        worker = GoogleDriveHelper()
+        worker.token_path = self.token_path
+        worker.use_sa = self.use_sa
+        worker.service = worker.authorize(
+            self.sa_index + index if self.use_sa else None,
+        )
+        return worker
+
+    @staticmethod
+    def error_reason(err):
+        if isinstance(err, HttpError) and err.resp.get(
+            "content-type",
+            "",
+        ).startswith("application/json"):
+            return loads(err.content).get("error").get("errors")[0].get("reason")
+        return ""
 
     def get_id_from_url(self, link, user_id=""):
         if user_id and link.startswith("mtp:"):
@@ -224,6 +272,47 @@ class GoogleDriveHelper:
         )
         return file_id
 
+    def create_directories(self, folders):
+        """Create {key: (name, parent_id)} folders in batches, return {key: id}.
+
+        Folders the batch fails to create are retried one by one.
+        """
+        requests = {
+            key: self.service.files().create(
+                body={
+                    "name": name,
+                    "description": "Uploaded by Mirror-leech-telegram-bot",
+                    "mimeType": self.G_DRIVE_DIR_MIME_TYPE,
+                    "parents": [parent_id],
+                },
+                supportsAllDrives=True,
+                fields="id",
+            )
+            for key, (name, parent_id) in folders.items()
+        }
+        created = {}
+        batched = []
+        for key, response in self.batch_execute(requests).items():
+            if isinstance(response, Exception):
+                created[key] = self.create_directory(*folders[key])
+            else:
+                created[key] = response["id"]
+                batched.append(response["id"])
+        if not Config.IS_TEAM_DRIVE:
+            self.batch_execute(
+                {
+                    file_id: self.service.permissions().create(
+                        fileId=file_id,
+                        body={"role": "reader", "type": "anyone"},
+                        supportsAllDrives=True,
+                    )
+                    for file_id in batched
+                },
+            )
+        if created:
+            LOGGER.info(f"Created {len(created)} G-Drive Folders")
+        return created
+
     def escapes(self, estr):
         chars = ["\\", "'", '"', r"\a", r"\b", r"\f", r"\n", r"\r", r"\t"]
         for char in chars:
@@ -0,0 +1,283 @@
+from asyncio import sleep
+from logging import getLogger
+from sqlite3 import connect
+from threading import Lock
+
+from bot import bot_loop, drives_ids
+from bot.core.config_manager import Config
+from bot.helper.ext_utils.bot_utils import sync_to_async
+from bot.helper.mirror_leech_utils.gdrive_utils.helper import GoogleDriveHelper
+
+LOGGER = getLogger(__name__)
+
+INDEX_DB = "drive_index.db"
+FILE_FIELDS = "id, name, mimeType, size, parents, trashed, ownedByMe"
+
+
+class GoogleDriveIndex(GoogleDriveHelper):
+    """Local SQLite copy of the names, ids, sizes and parents of every
+    configured drive, kept current with the Drive Changes API.
+
+    Only "root" and shared drive ids are indexed, folder ids have no change
+    feed of their own. Queries return None when the index can't answer so
+    callers fall back to a live search. Duplicate checks first apply the
+    changes made since the last refresh, so recent uploads aren't missed.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._lock = Lock()
+        self._update_lock = Lock()
+        self._db = None
+        self._ready = set()
+        self._task = None
+
+    def _connect(self):
+        if self._db is None:
+            self._db = connect(INDEX_DB, check_same_thread=False)
+            self._db.executescript(
+                """
+                PRAGMA journal_mode=WAL;
+                CREATE TABLE IF NOT EXISTS files (
+                    id TEXT PRIMARY KEY,
+                    drive TEXT,
+                    name TEXT,
+                    mime TEXT,
+                    size INTEGER,
+                    parents TEXT
+                );
+                CREATE INDEX IF NOT EXISTS files_drive_name ON files (drive, name);
+                CREATE TABLE IF NOT EXISTS tokens (drive TEXT PRIMARY KEY, token TEXT);
+                """,
+            )
+            self._ready.update(
+                row[0] for row in self._db.execute("SELECT drive FROM tokens")
+            )
+        return self._db
+
+    @staticmethod
+    def _row(drive, file):
+        return (
+            file["id"],
+            drive,
+            file["name"],
+            file.get("mimeType"),
+            int(file["size"]) if "size" in file else None,
+            " ".join(file.get("parents", [])),
+        )
+
+    def refresh(self):
+        """Index new drives and apply the pending changes of indexed ones."""
+        with self._update_lock:
+            self._refresh()
+
+    def _refresh(self):
+        drives = [drive for drive in drives_ids if len(drive) <= 23]
+        db = self._connect()
+        with self._lock:
+            for (drive,) in db.execute("SELECT drive FROM tokens").fetchall():
+                if drive not in drives:
+                    self._ready.discard(drive)
+                    db.execute("DELETE FROM files WHERE drive = ?", (drive,))
+                    db.execute("DELETE FROM tokens WHERE drive = ?", (drive,))
+            db.commit()
+        if not drives:
+            return
+        self.use_sa = Config.USE_SERVICE_ACCOUNTS and len(drives_ids) <= 1
+        self.service = self.authorize()
+        for drive in drives:
+            try:
+                with self._lock:
+                    token = db.execute(
+                        "SELECT token FROM tokens WHERE drive = ?",
+                        (drive,),
+                    ).fetchone()
+                if token is None:
+                    self._build(drive)
+                else:
+                    self._apply_changes(drive, token[0])
+                    self._ready.add(drive)
+            except Exception as e:
+                LOGGER.error(f"Drive index {drive}: {e}")
+
+    def _build(self, drive):
+        LOGGER.info(f"Building Drive index of {drive}")
+        shared = {} if drive == "root" else {"driveId": drive}
+        token = (
+            self.service.changes()
+            .getStartPageToken(supportsAllDrives=True, **shared)
+            .execute()["startPageToken"]
+        )
+        if drive == "root":
+            query = {"q": "'me' in owners and trashed = false"}
+        else:
+            query = {
+                "q": "trashed = false",
+                "corpora": "drive",
+                "includeItemsFromAllDrives": True,
+                **shared,
+            }
+        rows = []
+        page_token = None
+        while True:
+            response = (
+                self.service.files()
+                .list(
+                    supportsAllDrives=True,
+                    spaces="drive",
+                    pageSize=1000,
+                    fields=f"nextPageToken, files({FILE_FIELDS})",
+                    pageToken=page_token,
+                    **query,
+                )
+                .execute()
+            )
+            rows.extend(self._row(drive, file) for file in response.get("files", []))
+            page_token = response.get("nextPageToken")
+            if page_token is None:
+                break
+        db = self._connect()
+        with self._lock:
+            db.execute("DELETE FROM files WHERE drive = ?", (drive,))
+            db.executemany(
+                "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            db.execute("INSERT OR REPLACE INTO tokens VALUES (?, ?)", (drive, token))
+            db.commit()
+            self._ready.add(drive)
+        LOGGER.info(f"Indexed {len(rows)} items of {drive}")
+
+    def _apply_changes(self, drive, token):
+        shared = (
+            {}
+            if drive == "root"
+            else {"driveId": drive, "includeItemsFromAllDrives": True}
+        )
+        db = self._connect()
+        while True:
+            response = (
+                self.service.changes()
+                .list(
+                    pageToken=token,
+                    supportsAllDrives=True,
+                    spaces="drive",
+                    pageSize=1000,
+                    fields="nextPageToken, newStartPageToken, "
+                    f"changes(fileId, removed, file({FILE_FIELDS}))",
+                    **shared,
+                )
+                .execute()
+            )
+            removed = []
+            rows = []
+            for change in response.get("changes", []):
+                file = change.get("file")
+                if (
+                    change.get("removed")
+                    or file is None
+                    or file.get("trashed")
+                    or (drive == "root" and not file.get("ownedByMe"))
+                ):
+                    removed.append((change["fileId"],))
+                else:
+                    rows.append(self._row(drive, file))
+            token = response.get("newStartPageToken") or response["nextPageToken"]
+            with self._lock:
+                db.executemany("DELETE FROM files WHERE id = ?", removed)
+                db.executemany(
+                    "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?)",
+                    rows,
+                )
+                db.execute(
+                    "INSERT OR REPLACE INTO tokens VALUES (?, ?)",
+                    (drive, token),
+                )
+                db.commit()
+            if "newStartPageToken" in response:
+                return
+
+    def _catch_up(self):
+        """Apply the pending changes of every indexed drive. False if a
+        refresh is running or the changes couldn't be fetched."""
+        if self.service is None or not self._update_lock.acquire(blocking=False):
+            return False
+        try:
+            db = self._connect()
+            with self._lock:
+                tokens = db.execute("SELECT drive, token FROM tokens").fetchall()
+            for drive, token in tokens:
+                self._apply_changes(drive, token)
+            return True
+        except Exception as e:
+            LOGGER.error(f"Drive index catch up: {e}")
+            return False
+        finally:
+            self._update_lock.release()
+
+    def query(self, dir_id, file_name, is_recursive, stop_dup=False, item_type=""):
+        """Indexed counterpart of GoogleDriveSearch._drive_query."""
+        if not Config.GDRIVE_INDEX_INTERVAL or not self._ready:
+            return None
+        if stop_dup and not self._catch_up():
+            return None
+        db = self._connect()
+        if is_recursive:
+            if dir_id not in self._ready:
+                return None
+            sql = "SELECT id, name, mime, size, parents FROM files WHERE drive = ?"
+        else:
+            with self._lock:
+                if (
+                    db.execute(
+                        "SELECT 1 FROM files WHERE id = ?",
+                        (dir_id,),
+                    ).fetchone()
+                    is None
+                ):
+                    return None
+            sql = "SELECT id, name, mime, size, parents FROM files WHERE instr(parents, ?)"
+        args = [dir_id]
+        if stop_dup:
+            sql += " AND name = ?"
+            args.append(file_name)
+        else:
+            for word in file_name.split():
+                sql += " AND instr(lower(name), ?)"
+                args.append(word.lower())
+        if item_type == "files":
+            sql += " AND mime != ?"
+            args.append(self.G_DRIVE_DIR_MIME_TYPE)
+        elif item_type == "folders":
+            sql += " AND mime = ?"
+            args.append(self.G_DRIVE_DIR_MIME_TYPE)
+        sql += " ORDER BY mime != ?, name LIMIT 200"
+        args.append(self.G_DRIVE_DIR_MIME_TYPE)
+        with self._lock:
+            rows = db.execute(sql, args).fetchall()
+        files = []
+        for file_id, name, mime_type, size, parents in rows:
+            file = {
+                "id": file_id,
+                "name": name,
+                "mimeType": mime_type,
+                "parents": parents.split(),
+            }
+            if size is not None:
+                file["size"] = size
+            files.append(file)
+        return {"files": files}
+
+    async def _run(self):
+        while Config.GDRIVE_INDEX_INTERVAL:
+            await sync_to_async(self.refresh, workload="io-long")
+            await sleep(Config.GDRIVE_INDEX_INTERVAL)
+        self._ready.clear()
+        self._task = None
+
+    async def start(self):
+        if Config.GDRIVE_INDEX_INTERVAL and self._task is None:
+            self._task = bot_loop.create_task(self._run())
+
+
+drive_index = GoogleDriveIndex()
@@ -3,6 +3,7 @@ from logging import getLogger
 from bot import drives_ids, drives_names, index_urls, user_data
 from bot.helper.ext_utils.status_utils import get_readable_file_size
 from bot.helper.mirror_leech_utils.gdrive_utils.helper import GoogleDriveHelper
+from bot.helper.mirror_leech_utils.gdrive_utils.index import drive_index
 
 LOGGER = getLogger(__name__)
 
@@ -98,7 +99,8 @@ class GoogleDriveSearch(GoogleDriveHelper):
 
     def drive_list(self, file_name, target_id="", user_id=""):
         msg = ""
-        file_name = self.escapes(str(file_name))
+        name = str(file_name)
+        file_name = self.escapes(name)
         contents_no = 0
         telegraph_content = []
         Title = False
@@ -128,7 +130,17 @@ class GoogleDriveSearch(GoogleDriveHelper):
                 if self._is_recursive and len(dir_id) > 23
                 else self._is_recursive
             )
-            response = self._drive_query(dir_id, file_name, isRecur)
+            response = None
+            if not target_id.startswith("mtp:"):
+                response = drive_index.query(
+                    dir_id,
+                    name,
+                    isRecur,
+                    self._stop_dup,
+                    self._item_type,
+                )
+            if response is None:
+                response = self._drive_query(dir_id, file_name, isRecur)
             if not response["files"]:
                 if self._no_multi:
                     break
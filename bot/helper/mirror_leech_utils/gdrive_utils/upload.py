@@ -1,10 +1,14 @@
 import contextlib
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from logging import getLogger
-from os import listdir, remove
+from os import listdir, remove, walk
 from os import path as ospath
+from queue import Queue
+from threading import Lock
 
 from googleapiclient.errors import HttpError
 from googleapiclient.http import MediaFileUpload
+from natsort import natsorted
 from tenacity import (
     RetryError,
     retry,
@@ -29,6 +33,20 @@ class GoogleDriveUpload(GoogleDriveHelper):
         self._is_errored = False
         super().__init__()
         self.is_uploading = True
+        self._workers = [self]
+        self._worker_count = 1
+        self._failed = False
+        self._uploaded_bytes = 0
+        self._bytes_lock = Lock()
+
+    async def progress(self):
+        in_flight = sum(
+            worker.status.resumable_progress
+            for worker in self._workers
+            if worker.status is not None
+        )
+        self.proc_bytes = self._uploaded_bytes + in_flight
+        self.total_time += self.update_interval
 
     def user_setting(self):
         if self.listener.up_dest.startswith("mtp:"):
@@ -60,6 +78,7 @@ class GoogleDriveUpload(GoogleDriveHelper):
                     )
                 mime_type = get_mime_type(self._path)
                 link = self._upload_file(
+                    self,
                     self._path,
                     self.listener.name,
                     mime_type,
@@ -73,6 +92,7 @@ class GoogleDriveUpload(GoogleDriveHelper):
                 LOGGER.info(f"Uploaded To G-Drive: {self._path}")
             else:
                 mime_type = "Folder"
+                self._workers = []
                 dir_id = self.create_directory(
                     ospath.basename(ospath.abspath(self.listener.name)),
                     self.listener.up_dest,
@@ -116,37 +136,75 @@ class GoogleDriveUpload(GoogleDriveHelper):
             dir_id=self.get_id_from_url(link) if link else None,
         )
 
+    def _create_tree(self, input_directory, dest_id):
+        """Create every sub folder of input_directory, one batch per depth."""
+        folders = {input_directory: dest_id}
+        level = [input_directory]
+        while level and not self.listener.is_cancelled:
+            created = self.create_directories(
+                {
+                    ospath.join(parent, item): (item, folders[parent])
+                    for parent in level
+                    for item in natsorted(listdir(parent))
+                    if ospath.isdir(ospath.join(parent, item))
+                },
+            )
+            folders.update(created)
+            self.total_folders += len(created)
+            level = list(created)
+        return folders
+
     def _upload_dir(self, input_directory, dest_id):
-        list_dirs = listdir(input_directory)
-        if len(list_dirs) == 0:
-            return dest_id
-        new_id = None
-        for item in list_dirs:
-            current_file_name = ospath.join(input_directory, item)
-            if ospath.isdir(current_file_name):
-                current_dir_id = self.create_directory(item, dest_id)
-                new_id = self._upload_dir(
-                    current_file_name,
-                    current_dir_id,
-                )
-                self.total_folders += 1
-            elif not item.lower().endswith(tuple(self.listener.extension_filter)):
-                mime_type = get_mime_type(current_file_name)
-                file_name = current_file_name.split("/")[-1]
+        folders = self._create_tree(input_directory, dest_id)
+        files = []
+        for dirpath, _, filenames in walk(input_directory):
+            for item in filenames:
+                file_path = ospath.join(dirpath, item)
+                if item.lower().endswith(tuple(self.listener.extension_filter)):
+                    remove(file_path)
+                else:
+                    files.append((file_path, ospath.getsize(file_path)))
+        # Biggest files first so a large one doesn't start last and run alone
+        files.sort(key=lambda item: item[1], reverse=True)
+        self._worker_count = max(1, min(Config.GDRIVE_UPLOAD_WORKERS, len(files)))
+        workers = Queue()
+        for index in range(self._worker_count):
+            worker = self if index == 0 else self.new_worker(index)
+            worker.sa_step = self._worker_count
+            self._workers.append(worker)
+            workers.put(worker)
+
+        def upload(file_path):
+            worker = workers.get()
+            try:
+                if self._should_stop():
+                    return
                 self._upload_file(
-                    current_file_name,
-                    file_name,
-                    mime_type,
-                    dest_id,
+                    worker,
+                    file_path,
+                    ospath.basename(file_path),
+                    get_mime_type(file_path),
+                    folders[ospath.dirname(file_path)],
                 )
-                self.total_files += 1
-                new_id = dest_id
-            else:
-                remove(current_file_name)
-                new_id = "filter"
-            if self.listener.is_cancelled:
-                break
-        return new_id
+            finally:
+                workers.put(worker)
+
+        with ThreadPoolExecutor(max_workers=self._worker_count) as pool:
+            futures = [pool.submit(upload, file_path) for file_path, _ in files]
+            try:
+                for future in as_completed(futures):
+                    future.result()
+                    self.total_files += 1
+            except Exception:
+                self._failed = True
+                pool.shutdown(cancel_futures=True)
+                raise
+        if self.listener.is_cancelled:
+            return None
+        return dest_id
+
+    def _should_stop(self):
+        return self.listener.is_cancelled or self._failed
 
     @retry(
         wait=wait_exponential(multiplier=2, min=3, max=6),
@@ -155,6 +213,7 @@ class GoogleDriveUpload(GoogleDriveHelper):
     )
     def _upload_file(
         self,
+        worker,
         file_path,
         file_name,
         mime_type,
@@ -177,7 +236,7 @@ class GoogleDriveUpload(GoogleDriveHelper):
                 resumable=False,
             )
             response = (
-                self.service.files()
+                worker.service.files()
                 .create(
                     body=file_metadata,
                     media_body=media_body,
@@ -186,10 +245,10 @@ class GoogleDriveUpload(GoogleDriveHelper):
                 .execute()
             )
             if not Config.IS_TEAM_DRIVE:
-                self.set_permission(response["id"])
+                worker.set_permission(response["id"])
 
             drive_file = (
-                self.service.files()
+                worker.service.files()
                 .get(fileId=response["id"], supportsAllDrives=True)
                 .execute()
             )
@@ -202,40 +261,38 @@ class GoogleDriveUpload(GoogleDriveHelper):
         )
 
         # Insert a file
-        drive_file = self.service.files().create(
+        drive_file = worker.service.files().create(
             body=file_metadata,
             media_body=media_body,
             supportsAllDrives=True,
         )
         response = None
         retries = 0
-        while response is None and not self.listener.is_cancelled:
+        while response is None and not self._should_stop():
             try:
-                self.status, response = drive_file.next_chunk()
+                worker.status, response = drive_file.next_chunk()
             except HttpError as err:
                 if err.resp.status in [500, 502, 503, 504, 429] and retries < 10:
                     retries += 1
                     continue
-                if err.resp.get("content-type", "").startswith("application/json"):
-                    reason = (
-                        eval(err.content).get("error").get("errors")[0].get("reason")
-                    )
+                if reason := self.error_reason(err):
                     if reason not in [
                         "userRateLimitExceeded",
                         "dailyLimitExceeded",
                     ]:
                         raise err
-                    if self.use_sa:
-                        if self.sa_count >= self.sa_number:
+                    if worker.use_sa:
+                        if worker.sa_count >= worker.sa_switch_limit:
                             LOGGER.info(
-                                f"Reached maximum number of service accounts switching, which is {self.sa_count}",
+                                f"Reached maximum number of service accounts switching, which is {worker.sa_count}",
                             )
                             raise err
-                        if self.listener.is_cancelled:
+                        if self._should_stop():
                             return None
-                        self.switch_service_account()
+                        worker.switch_service_account()
                         LOGGER.info(f"Got: {reason}, Trying Again.")
                         return self._upload_file(
+                            worker,
                             file_path,
                             file_name,
                             mime_type,
@@ -244,18 +301,20 @@ class GoogleDriveUpload(GoogleDriveHelper):
                         )
                     LOGGER.error(f"Got: {reason}")
                     raise err
-        if self.listener.is_cancelled:
+        worker.status = None
+        if self._should_stop():
             return None
+        with self._bytes_lock:
+            self._uploaded_bytes += ospath.getsize(file_path)
         with contextlib.suppress(Exception):
             remove(file_path)
-        self.file_processed_bytes = 0
         # Insert new permissions
         if not Config.IS_TEAM_DRIVE:
-            self.set_permission(response["id"])
+            worker.set_permission(response["id"])
         # Define file instance and get url for download
         if not in_dir:
             drive_file = (
-                self.service.files()
+                worker.service.files()
                 .get(fileId=response["id"], supportsAllDrives=True)
                 .execute()
             )
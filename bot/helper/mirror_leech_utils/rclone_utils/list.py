@@ -1,4 +1,5 @@
-from asyncio import Event, gather, wait_for
+from asyncio import Event, Semaphore, gather, wait_for
+from collections import OrderedDict
 from configparser import RawConfigParser
 from functools import partial
 from json import loads
@@ -9,7 +10,7 @@ from aiofiles.os import path as aiopath
 from pyrogram.filters import regex, user
 from pyrogram.handlers import CallbackQueryHandler
 
-from bot import LOGGER
+from bot import LOGGER, bot_loop
 from bot.core.config_manager import Config
 from bot.helper.ext_utils.bot_utils import cmd_exec, new_task, update_user_ldata
 from bot.helper.ext_utils.db_handler import database
@@ -25,6 +26,88 @@ from bot.helper.telegram_helper.message_utils import (
 )
 
 LIST_LIMIT = 6
+LIST_CACHE_TTL = 300
+LIST_CACHE_SIZE = 256
+
+
+class ListingCache:
+    """TTL + LRU cache of lsjson listings keyed by (config, path, item type).
+
+    Listings are shared between lookups while they run, so a click on a
+    folder that is still being prefetched waits for that listing instead of
+    starting another one.
+    """
+
+    def __init__(self, ttl=LIST_CACHE_TTL, size=LIST_CACHE_SIZE):
+        self._ttl = ttl
+        self._size = size
+        self._entries = OrderedDict()
+        self._pending = {}
+        self._prefetch_slots = Semaphore(3)
+
+    async def _lsjson(self, key):
+        config_path, path, item_type = key
+        cmd = [
+            "xone",
+            "lsjson",
+            item_type,
+            "--fast-list",
+            "--no-mimetype",
+            "--no-modtime",
+            "--config",
+            config_path,
+            path,
+            "-v",
+            "--log-systemd",
+            "--log-file",
+            "rlog.txt",
+        ]
+        try:
+            res, err, code = await cmd_exec(cmd)
+            if code in [0, -9]:
+                self._entries[key] = (time(), loads(res))
+                self._entries.move_to_end(key)
+                while len(self._entries) > self._size:
+                    self._entries.popitem(last=False)
+                return self._entries[key][1], ""
+            return None, err
+        finally:
+            del self._pending[key]
+
+    async def get(self, config_path, path, item_type):
+        """Return (listing, error) for path, from cache when still fresh."""
+        key = (config_path, path, item_type)
+        if entry := self._entries.get(key):
+            if time() - entry[0] < self._ttl:
+                self._entries.move_to_end(key)
+                return entry[1], ""
+            del self._entries[key]
+        if key not in self._pending:
+            self._pending[key] = bot_loop.create_task(self._lsjson(key))
+        return await self._pending[key]
+
+    async def _prefetch_one(self, config_path, path, item_type):
+        async with self._prefetch_slots:
+            await self.get(config_path, path, item_type)
+
+    def prefetch(self, config_path, paths, item_type):
+        """List paths in the background so the next click is a cache hit."""
+        for path in paths:
+            key = (config_path, path, item_type)
+            if key not in self._entries and key not in self._pending:
+                bot_loop.create_task(self._prefetch_one(*key))
+
+    def invalidate(self, config_path, path):
+        """Forget the listings of path and of everything below it."""
+        prefix = path if path.endswith(":") else f"{path}/"
+        for key in list(self._entries):
+            if key[0] == config_path and (
+                key[1] == path or key[1].startswith(prefix)
+            ):
+                del self._entries[key]
+
+
+listing_cache = ListingCache()
 
 
 @new_task
@@ -212,6 +295,19 @@ class RcloneList:
                 ptype = "fi"
                 name = f"[{get_readable_file_size(idict['Size'])}] {name}"
             buttons.data_button(name, f"rcq pa {ptype} {orig_index}")
+        listing_cache.prefetch(
+            self.config_path,
+            [
+                f"{self.remote}{self.path}/{idict['Path']}"
+                if self.path
+                else f"{self.remote}{idict['Path']}"
+                for idict in self.path_list[
+                    self.iter_start : LIST_LIMIT + self.iter_start
+                ]
+                if idict["IsDir"]
+            ],
+            self.item_type,
+        )
         if items_no > LIST_LIMIT:
             for i in [1, 2, 4, 6, 10, 30, 50, 100]:
                 buttons.data_button(i, f"rcq ps {i}", position="header")
@@ -276,26 +372,14 @@ class RcloneList:
             self.item_type = "--dirs-only"
         elif itype:
             self.item_type = itype
-        cmd = [
-            "xone",
-            "lsjson",
-            self.item_type,
-            "--fast-list",
-            "--no-mimetype",
-            "--no-modtime",
-            "--config",
-            self.config_path,
-            f"{self.remote}{self.path}",
-            "-v",
-            "--log-systemd",
-            "--log-file",
-            "rlog.txt",
-        ]
         if self.listener.is_cancelled:
             return
-        res, err, code = await cmd_exec(cmd)
-        if code in [0, -9]:
-            result = loads(res)
+        result, err = await listing_cache.get(
+            self.config_path,
+            f"{self.remote}{self.path}",
+            self.item_type,
+        )
+        if result is not None:
             if (
                 len(result) == 0
                 and itype != self.item_type
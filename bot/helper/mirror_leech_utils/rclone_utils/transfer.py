@@ -1,27 +1,34 @@
 import contextlib
-from asyncio import create_subprocess_exec, gather, sleep, wait_for
-from asyncio.subprocess import PIPE
+from asyncio import gather, sleep
 from configparser import RawConfigParser
-from json import loads
 from logging import getLogger
 from random import randrange
-from re import findall as re_findall
+from re import IGNORECASE
+from re import compile as re_compile
 
 from aiofiles import open as aiopen
 from aiofiles.os import listdir, makedirs
 from aiofiles.os import path as aiopath
 
 from bot.core.config_manager import Config
-from bot.helper.ext_utils.bot_utils import cmd_exec, sync_to_async
+from bot.core.rclone_client import RcloneClient
+from bot.helper.ext_utils.bot_utils import sync_to_async
 from bot.helper.ext_utils.files_utils import count_files_and_folders, get_mime_type
+from bot.helper.ext_utils.status_utils import (
+    get_readable_file_size,
+    get_readable_time,
+)
+from bot.helper.mirror_leech_utils.rclone_utils.list import listing_cache
 
 LOGGER = getLogger(__name__)
 
+RATE_LIMIT = re_compile(r"rate_?limit_?exceeded", IGNORECASE)
+
 
 class RcloneTransferHelper:
     def __init__(self, listener):
         self._listener = listener
-        self._proc = None
+        self._job = None
         self._transferred_size = "0 B"
         self._eta = "-"
         self._percentage = "0%"
@@ -34,6 +41,7 @@ class RcloneTransferHelper:
         self._sa_number = 0
         self._use_service_accounts = Config.USE_SERVICE_ACCOUNTS
         self._rclone_select = False
+        self._options = self._get_options()
 
     @property
     def transferred_size(self):
@@ -55,31 +63,14 @@ class RcloneTransferHelper:
     def size(self):
         return self._size
 
-    async def _progress(self):
-        while not (
-            self._proc.returncode is not None
-            or self._proc.stdout.at_eof()
-            or self._listener.is_cancelled
-        ):
-            try:
-                data = await wait_for(self._proc.stdout.readline(), 60)
-            except Exception:
-                break
-            if not data:
-                break
-            data = data.decode().strip()
-            if data := re_findall(
-                r"Transferred:\s+([\d.]+\s*\w+)\s+/\s+([\d.]+\s*\w+),\s+([\d.]+%)\s*,\s+([\d.]+\s*\w+/s),\s+ETA\s+([\dwdhms]+)",
-                data,
-            ):
-                (
-                    self._transferred_size,
-                    self._size,
-                    self._percentage,
-                    self._speed,
-                    self._eta,
-                ) = data[0]
-            await sleep(0.05)
+    def _update_stats(self, stats):
+        done = stats.get("bytes", 0)
+        total = stats.get("totalBytes", 0)
+        self._transferred_size = get_readable_file_size(done)
+        self._size = get_readable_file_size(total)
+        self._percentage = f"{done / total * 100:.0f}%" if total else "0%"
+        self._speed = f"{get_readable_file_size(stats.get('speed', 0))}/s"
+        self._eta = get_readable_time(stats["eta"]) if stats.get("eta") else "-"
 
     def _switch_service_account(self):
         if self._sa_index == self._sa_number - 1:
@@ -116,50 +107,207 @@ class RcloneTransferHelper:
             await f.write(text)
         return sa_conf_file
 
-    async def _start_download(self, cmd, remote_type):
-        self._proc = await create_subprocess_exec(*cmd, stdout=PIPE, stderr=PIPE)
-        await self._progress()
-        _, stderr = await self._proc.communicate()
-        return_code = self._proc.returncode
-        if self._listener.is_cancelled:
-            return None
+    def _get_options(self):
+        """User flags by name without the leading dashes."""
+        options = {}
+        if rcflags := self._listener.rc_flags or Config.RCLONE_FLAGS:
+            for flag in rcflags.split("|"):
+                key, _, value = flag.partition(":")
+                if key := key.strip().lstrip("-"):
+                    options[key] = value.strip() or "true"
+        return options
 
-        if return_code == 0:
-            await self._listener.on_download_complete()
-            return None
-        if return_code != -9:
-            error = (
-                stderr.decode().strip()
-                or "Use <code>/shell cat rlog.txt</code> to see more information"
+    @staticmethod
+    def _config_value(value):
+        if value in ("true", "false"):
+            return value == "true"
+        for type_ in (int, float):
+            with contextlib.suppress(ValueError):
+                return type_(value)
+        return value
+
+    def _config_options(self):
+        """User flags as rcd `_config` options.
+
+        `_config` takes the main options by their Go field names, which
+        match the flag names case-insensitively once the dashes are dropped.
+        Names it doesn't know, like backend flags, are ignored there.
+        """
+        return {
+            key.replace("-", ""): self._config_value(value)
+            for key, value in self._options.items()
+        }
+
+    def _backend_options(self, remote_type):
+        """User flags of a backend, like --drive-chunk-size, as options of a
+        remote of that type."""
+        prefix = f"{remote_type}-"
+        return {
+            key.removeprefix(prefix).replace("-", "_"): value
+            for key, value in self._options.items()
+            if key.startswith(prefix)
+        }
+
+    @staticmethod
+    def _fs(fs, **options):
+        """Add backend options to a remote, local paths go through :local."""
+        if not options:
+            return fs
+        options = ",".join(
+            f'{key}="{value.replace('"', '""')}"'
+            if "," in value or ":" in value
+            else f"{key}={value}"
+            for key, value in options.items()
+        )
+        if fs.startswith("/"):
+            return f":local,{options}:{fs}"
+        remote, path = fs.split(":", 1)
+        return f"{remote},{options}:{path}"
+
+    @staticmethod
+    def _split_fs(fs):
+        """`remote:dir/name` to (`remote:dir`, `name`)."""
+        if "/" in fs.split(":", 1)[-1]:
+            return tuple(fs.rsplit("/", 1))
+        remote, name = fs.split(":", 1)
+        return f"{remote}:", name
+
+    async def _call(self, config_path, method, **params):
+        return await RcloneClient.call(config_path, method, **params)
+
+    async def _is_file(self, config_path, fs):
+        remote, path = fs.split(":", 1)
+        if not path:
+            return False
+        item = (
+            await self._call(
+                config_path,
+                "operations/stat",
+                fs=f"{remote}:",
+                remote=path,
             )
-            if not error and remote_type == "drive" and self._use_service_accounts:
-                error = (
-                    "Mostly your service accounts don't have access to this drive!"
-                )
-            elif not error:
-                error = (
-                    "Use <code>/shell cat rlog.txt</code> to see more information"
+        ).get("item")
+        return item is not None and not item["IsDir"]
+
+    async def _wait_job(self, config_path, jobid):
+        group = f"job/{jobid}"
+        while True:
+            status, stats = await gather(
+                self._call(config_path, "job/status", jobid=jobid),
+                self._call(config_path, "core/stats", group=group),
+            )
+            self._update_stats(stats)
+            if status["finished"]:
+                with contextlib.suppress(Exception):
+                    await self._call(config_path, "core/stats-delete", group=group)
+                if status["success"]:
+                    return None
+                return (
+                    status.get("error")
+                    or "Use <code>/shell cat rlog.txt</code> to see more information"
                 )
-            LOGGER.error(error)
+            await sleep(1)
 
+    async def _transfer(
+        self,
+        config_path,
+        source,
+        destination,
+        method,
+        is_file=False,
+        config=None,
+    ):
+        """Run a copy/move as an async rcd job. Returns the error or None."""
+        params = {
+            "_async": True,
+            "_config": {
+                "UseListR": True,
+                "LowLevelRetries": 1,
+                "Metadata": True,
+                **(config or {}),
+                **self._config_options(),
+            },
+            "_filter": {"IgnoreCase": True},
+        }
+        if self._rclone_select:
+            params["_filter"]["FilesFrom"] = [self._listener.link]
+        elif self._listener.extension_filter:
+            params["_filter"]["ExcludeRule"] = [
+                "*.{" + ",".join(self._listener.extension_filter) + "}",
+            ]
+        if is_file:
+            src_fs, name = self._split_fs(source)
+            rc_method = f"operations/{method}file"
+            params.update(
+                srcFs=src_fs,
+                srcRemote=name,
+                dstFs=destination,
+                dstRemote=name,
+            )
+        else:
+            rc_method = f"sync/{method}"
+            params.update(srcFs=source, dstFs=destination)
+        error = None
+        # rcd jobs don't retry like the CLI does, so do its 3 tries here
+        for attempt in range(3):
+            if attempt:
+                LOGGER.error(f"Attempt {attempt} failed: {error}")
+                await sleep(3)
+            try:
+                jobid = (await self._call(config_path, rc_method, **params))["jobid"]
+                self._job = (config_path, jobid)
+                error = await self._wait_job(config_path, jobid)
+            except Exception as e:
+                error = str(e)
+            finally:
+                self._job = None
             if (
-                self._sa_number != 0
-                and remote_type == "drive"
-                and "RATE_LIMIT_EXCEEDED" in error
-                and self._use_service_accounts
+                error is None
+                or self._listener.is_cancelled
+                or RATE_LIMIT.search(error)
             ):
-                if self._sa_count < self._sa_number:
-                    remote = self._switch_service_account()
-                    cmd[6] = f"{remote}:{cmd[6].split(':', 1)[1]}"
-                    if self._listener.is_cancelled:
-                        return None
-                    return await self._start_download(cmd, remote_type)
-                LOGGER.info(
-                    f"Reached maximum number of service accounts switching, which is {self._sa_count}",
-                )
-
-            await self._listener.on_download_error(error[:4000])
+                break
+        return error
+
+    async def _start_download(self, config_path, remote, remote_type, path):
+        source = f"{remote}:{'' if self._rclone_select else self._listener.link}"
+        options = {}
+        if remote_type == "drive" and not self._listener.rc_flags:
+            options["acknowledge_abuse"] = "true"
+        source = self._fs(source, **(options | self._backend_options(remote_type)))
+        try:
+            is_file = not self._rclone_select and await self._is_file(
+                config_path,
+                source,
+            )
+        except Exception as e:
+            await self._listener.on_download_error(str(e)[:4000])
+            return None
+        error = await self._transfer(config_path, source, path, "copy", is_file)
+        if self._listener.is_cancelled:
             return None
+        if error is None:
+            await self._listener.on_download_complete()
+            return None
+        LOGGER.error(error)
+        if (
+            self._sa_number != 0
+            and remote_type == "drive"
+            and RATE_LIMIT.search(error)
+            and self._use_service_accounts
+        ):
+            if self._sa_count < self._sa_number:
+                remote = self._switch_service_account()
+                return await self._start_download(
+                    config_path,
+                    remote,
+                    remote_type,
+                    path,
+                )
+            LOGGER.info(
+                f"Reached maximum number of service accounts switching, which is {self._sa_count}",
+            )
+        await self._listener.on_download_error(error[:4000])
         return None
 
     async def download(self, remote, config_path, path):
@@ -186,95 +334,71 @@ class RcloneTransferHelper:
                 remote = f"sa{self._sa_index:03}"
                 LOGGER.info(f"Download with service account {remote}")
 
-        cmd = self._get_updated_command(
-            config_path,
-            f"{remote}:{self._listener.link}",
-            path,
-            "copy",
-        )
-
-        if (
-            remote_type == "drive"
-            and not Config.RCLONE_FLAGS
-            and not self._listener.rc_flags
-        ):
-            cmd.append("--drive-acknowledge-abuse")
-        elif remote_type != "drive":
-            cmd.extend(("--retries-sleep", "3s"))
-
-        await self._start_download(cmd, remote_type)
+        self._rclone_select = self._listener.link.startswith("rclone_select")
+        await self._start_download(config_path, remote, remote_type, path)
 
-    async def _get_gdrive_link(self, config_path, destination, mime_type):
-        epath = (
-            destination.rsplit("/", 1)[0] if mime_type == "Folder" else destination
+    async def _get_link(self, config_path, destination, mime_type, remote_type):
+        fs, path = self._split_fs(destination)
+        try:
+            if remote_type == "drive":
+                item = (
+                    await self._call(
+                        config_path,
+                        "operations/stat",
+                        fs=fs,
+                        remote=path,
+                    )
+                )["item"]
+                if mime_type == "Folder":
+                    return f"https://drive.google.com/drive/folders/{item['ID']}"
+                return f"https://drive.google.com/uc?id={item['ID']}&export=download"
+            return (
+                await self._call(
+                    config_path,
+                    "operations/publiclink",
+                    fs=fs,
+                    remote=path,
+                )
+            )["url"]
+        except Exception as err:
+            LOGGER.error(f"while getting link. Path: {destination} | Error: {err}")
+            return ""
+
+    async def _start_upload(self, config_path, path, remote, rc_path, remote_type):
+        destination = f"{remote}:{rc_path}"
+        options = {}
+        if remote_type == "drive" and not self._listener.rc_flags:
+            options.update(chunk_size="128M", upload_cutoff="128M")
+        destination = self._fs(
+            destination,
+            **(options | self._backend_options(remote_type)),
         )
-
-        cmd = [
-            "xone",
-            "lsjson",
-            "--fast-list",
-            "--no-mimetype",
-            "--no-modtime",
-            "--config",
+        error = await self._transfer(
             config_path,
-            epath,
-            "-v",
-            "--log-systemd",
-            "--log-file",
-            "rlog.txt",
-        ]
-        res, err, code = await cmd_exec(cmd)
-
-        if code == 0:
-            result = loads(res)
-            fid = next(
-                (r["ID"] for r in result if r["Path"] == self._listener.name),
-                "err",
-            )
-            link = (
-                f"https://drive.google.com/drive/folders/{fid}"
-                if mime_type == "Folder"
-                else f"https://drive.google.com/uc?id={fid}&export=download"
-            )
-        elif code != -9:
-            if not err:
-                err = "Use <code>/shell cat rlog.txt</code> to see more information"
-            LOGGER.error(
-                f"while getting drive link. Path: {destination}. Stderr: {err}",
-            )
-            link = ""
-        return link
-
-    async def _start_upload(self, cmd, remote_type):
-        self._proc = await create_subprocess_exec(*cmd, stdout=PIPE, stderr=PIPE)
-        await self._progress()
-        _, stderr = await self._proc.communicate()
-        return_code = self._proc.returncode
-
+            self._fs(path, copy_links="true"),
+            destination,
+            "move",
+            not await aiopath.isdir(path),
+        )
         if self._listener.is_cancelled:
             return False
-        if return_code == -9:
-            return False
-        if return_code == 0:
+        if error is None:
             return True
-        error = (
-            stderr.decode().strip()
-            or "Use <code>/shell cat rlog.txt</code> to see more information"
-        )
         LOGGER.error(error)
         if (
             self._sa_number != 0
             and remote_type == "drive"
-            and "RATE_LIMIT_EXCEEDED" in error
+            and RATE_LIMIT.search(error)
             and self._use_service_accounts
         ):
             if self._sa_count < self._sa_number:
                 remote = self._switch_service_account()
-                cmd[7] = f"{remote}:{cmd[7].split(':', 1)[1]}"
-                return (
-                    False
-                    if self._listener.is_cancelled
-                    else await self._start_upload(cmd, remote_type)
+                return await self._start_upload(
+                    config_path,
+                    path,
+                    remote,
+                    rc_path,
+                    remote_type,
                 )
             LOGGER.info(
                 f"Reached maximum number of service accounts switching, which is {self._sa_count}",
@@ -306,7 +430,7 @@ class RcloneTransferHelper:
                     "This file extension is excluded by extension filter!",
                 )
                 return
-            mime_type = await sync_to_async(get_mime_type, path)
+            mime_type = await sync_to_async(get_mime_type, path, workload="cpu")
             folders = 0
             files = 1
 
@@ -334,23 +458,13 @@ class RcloneTransferHelper:
                 fremote = f"sa{self._sa_index:03}"
                 LOGGER.info(f"Upload with service account {fremote}")
 
-        method = "move"
-        cmd = self._get_updated_command(
+        result = await self._start_upload(
             fconfig_path,
             path,
-            f"{fremote}:{rc_path}",
-            method,
+            fremote,
+            rc_path,
+            remote_type,
         )
-        if (
-            remote_type == "drive"
-            and not Config.RCLONE_FLAGS
-            and not self._listener.rc_flags
-        ):
-            cmd.extend(
-                ("--drive-chunk-size", "128M", "--drive-upload-cutoff", "128M"),
-            )
-
-        result = await self._start_upload(cmd, remote_type)
         if not result:
             return
 
@@ -361,31 +475,13 @@ class RcloneTransferHelper:
         else:
             destination = f"{oremote}:{self._listener.name}"
 
-        if remote_type == "drive":
-            link = await self._get_gdrive_link(oconfig_path, destination, mime_type)
-        else:
-            cmd = [
-                "xone",
-                "link",
-                "--config",
-                oconfig_path,
-                destination,
-                "-v",
-                "--log-systemd",
-                "--log-file",
-                "rlog.txt",
-            ]
-            res, err, code = await cmd_exec(cmd)
-
-            if code == 0:
-                link = res
-            elif code != -9:
-                if not err:
-                    err = "Use <code>/shell cat rlog.txt</code> to see more information"
-                LOGGER.error(
-                    f"while getting link. Path: {destination} | Stderr: {err}",
-                )
-                link = ""
+        listing_cache.invalidate(oconfig_path, self._split_fs(destination)[0])
+        link = await self._get_link(
+            oconfig_path,
+            destination,
+            mime_type,
+            remote_type,
+        )
         if self._listener.is_cancelled:
             return
         LOGGER.info(f"Upload Done. Path: {destination}")
@@ -415,126 +511,52 @@ class RcloneTransferHelper:
             dst_remote_opt["type"],
         )
 
-        cmd = self._get_updated_command(
-            config_path,
-            f"{src_remote}:{src_path}",
-            destination,
-            method,
-        )
-        if not self._listener.rc_flags and not Config.RCLONE_FLAGS:
+        source = f"{src_remote}:{src_path}"
+        config = None
+        if src_path.startswith("rclone_select"):
+            source = f"{src_remote}:"
+            self._rclone_select = True
+        options = {}
+        if not self._listener.rc_flags:
             if src_remote_type == "drive" and dst_remote_type != "drive":
-                cmd.append("--drive-acknowledge-abuse")
+                options["acknowledge_abuse"] = "true"
             elif src_remote_type == "drive":
-                cmd.extend(("--tpslimit", "3", "--transfers", "3"))
+                config = {"TPSLimit": 3, "Transfers": 3}
 
-        self._proc = await create_subprocess_exec(*cmd, stdout=PIPE, stderr=PIPE)
-        await self._progress()
-        _, stderr = await self._proc.communicate()
-        return_code = self._proc.returncode
+        error = await self._transfer(
+            config_path,
+            self._fs(source, **(options | self._backend_options(src_remote_type))),
+            self._fs(destination, **self._backend_options(dst_remote_type)),
+            method,
+            mime_type != "Folder" and not self._rclone_select,
+            config,
+        )
 
         if self._listener.is_cancelled:
             return None, None
 
-        if return_code == -9:
-            return None, None
-        if return_code == 0:
+        if error is None:
+            listing_cache.invalidate(config_path, self._split_fs(destination)[0])
+            if method == "move":
+                listing_cache.invalidate(config_path, self._split_fs(source)[0])
             if mime_type != "Folder":
                 destination += (
                     f"/{self._listener.name}" if dst_path else self._listener.name
                 )
-            if dst_remote_type == "drive":
-                link = await self._get_gdrive_link(
-                    config_path,
-                    destination,
-                    mime_type,
-                )
-                return (
-                    (None, None)
-                    if self._listener.is_cancelled
-                    else (link, destination)
-                )
-            cmd = [
-                "xone",
-                "link",
-                "--config",
+            link = await self._get_link(
                 config_path,
                 destination,
-                "-v",
-                "--log-systemd",
-                "--log-file",
-                "rlog.txt",
-            ]
-            res, err, code = await cmd_exec(cmd)
-
+                mime_type,
+                dst_remote_type,
+            )
             if self._listener.is_cancelled:
                 return None, None
+            return link or None, destination
 
-            if code == 0:
-                return res, destination
-            if code != -9:
-                if not err:
-                    err = "Use <code>/shell cat rlog.txt</code> to see more information"
-                LOGGER.error(
-                    f"while getting link. Path: {destination} | Stderr: {err}",
-                )
-                return None, destination
-            return None
-
-        error = (
-            stderr.decode().strip()
-            or "Use <code>/shell cat rlog.txt</code> to see more information"
-        )
         LOGGER.error(error)
         await self._listener.on_upload_error(error[:4000])
         return None, None
 
-    def _get_updated_command(
-        self,
-        config_path,
-        source,
-        destination,
-        method,
-    ):
-        if source.split(":")[-1].startswith("rclone_select"):
-            source = f"{source.split(':')[0]}:"
-            self._rclone_select = True
-        else:
-            ext = "*.{" + ",".join(self._listener.extension_filter) + "}"
-        cmd = [
-            "xone",
-            method,
-            "--fast-list",
-            "--config",
-            config_path,
-            "-P",
-            source,
-            destination,
-            "-L",
-            "--retries-sleep",
-            "3s",
-            "--ignore-case",
-            "--low-level-retries",
-            "1",
-            "-M",
-            "-v",
-            "--log-systemd",
-            "--log-file",
-            "rlog.txt",
-        ]
-        if self._rclone_select:
-            cmd.extend(("--files-from", self._listener.link))
-        else:
-            cmd.extend(("--exclude", ext))
-        if rcflags := self._listener.rc_flags or Config.RCLONE_FLAGS:
-            rcflags = rcflags.split("|")
-            for flag in rcflags:
-                if ":" in flag:
-                    key, value = map(str.strip, flag.split(":", 1))
-                    cmd.extend((key, value))
-                elif len(flag) > 0:
-                    cmd.append(flag.strip())
-        return cmd
-
     @staticmethod
     async def _get_remote_options(config_path, remote):
         config = RawConfigParser()
@@ -546,9 +568,10 @@ class RcloneTransferHelper:
 
     async def cancel_task(self):
         self._listener.is_cancelled = True
-        if self._proc is not None:
+        if self._job is not None:
+            config_path, jobid = self._job
             with contextlib.suppress(Exception):
-                self._proc.kill()
+                await self._call(config_path, "job/stop", jobid=jobid)
         if self._is_download:
             LOGGER.info(f"Cancelling Download: {self._listener.name}")
             await self._listener.on_download_error("Stopped by user!")
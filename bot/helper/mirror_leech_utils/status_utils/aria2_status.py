@@ -1,14 +1,21 @@
 from time import time
 
+from aria2p import Download
+
 from bot import LOGGER, aria2
-from bot.helper.ext_utils.bot_utils import sync_to_async
+from bot.core.aria2_client import Aria2Client
+from bot.helper.ext_utils.bot_utils import async_to_sync, sync_to_async
+from bot.helper.ext_utils.status_snapshot import status_snapshot
 from bot.helper.ext_utils.status_utils import MirrorStatus, get_readable_time
 
 
 def get_download(gid, old_info=None):
+    """Download info of gid, from the snapshot or the async client. Runs in
+    executor threads like the rest of the status calls."""
+    if res := status_snapshot.aria2_download(gid):
+        return res
     try:
-        res = aria2.get_download(gid)
-        return res or old_info
+        return Download(aria2, async_to_sync(Aria2Client.tell_status, gid))
     except Exception as e:
         LOGGER.error(f"{e}: Aria2c, Error while getting torrent info")
         return old_info
@@ -24,10 +31,7 @@ class Aria2Status:
         self.seeding = seeding
 
     def update(self):
-        if self._download is None:
-            self._download = get_download(self._gid, self._download)
-        else:
-            self._download = self._download.live
+        self._download = get_download(self._gid, self._download)
         if self._download.followed_by_ids:
             self._gid = self._download.followed_by_ids[0]
             self._download = get_download(self._gid)
@@ -94,17 +98,12 @@ class Aria2Status:
             await self.listener.on_upload_error(
                 f"Seeding stopped with Ratio: {self.ratio()} and Time: {self.seeding_time()}",
             )
-            await sync_to_async(
-                aria2.remove,
-                [self._download],
-                force=True,
-                files=True,
-            )
-        elif downloads := self._download.followed_by:
+            await Aria2Client.remove(self._gid, files=True)
+        elif gids := self._download.followed_by_ids:
             LOGGER.info(f"Cancelling Download: {self.name()}")
             await self.listener.on_download_error("Download cancelled by user!")
-            downloads.append(self._download)
-            await sync_to_async(aria2.remove, downloads, force=True, files=True)
+            for gid in [*gids, self._download.gid]:
+                await Aria2Client.remove(gid, files=True)
         else:
             if self.queued:
                 LOGGER.info(f"Cancelling QueueDl: {self.name()}")
@@ -113,9 +112,4 @@ class Aria2Status:
                 LOGGER.info(f"Cancelling Download: {self.name()}")
                 msg = "Download stopped by user!"
             await self.listener.on_download_error(msg)
-            await sync_to_async(
-                aria2.remove,
-                [self._download],
-                force=True,
-                files=True,
-            )
+            await Aria2Client.remove(self._gid, files=True)
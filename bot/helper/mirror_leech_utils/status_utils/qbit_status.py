@@ -2,6 +2,7 @@ from asyncio import gather, sleep
 
 from bot import LOGGER, qb_listener_lock, qb_torrents, xnox_client
 from bot.helper.ext_utils.bot_utils import sync_to_async
+from bot.helper.ext_utils.status_snapshot import status_snapshot
 from bot.helper.ext_utils.status_utils import (
     MirrorStatus,
     get_readable_file_size,
@@ -10,6 +11,8 @@ from bot.helper.ext_utils.status_utils import (
 
 
 def get_download(tag, old_info=None):
+    if res := status_snapshot.qbit_info(tag):
+        return res
     try:
         res = xnox_client.torrents_info(tag=tag)[0]
         return res or old_info
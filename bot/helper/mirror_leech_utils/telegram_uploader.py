@@ -1,5 +1,6 @@
 import contextlib
-from asyncio import sleep
+from asyncio import Semaphore, create_task, sleep
+from collections import deque
 from logging import getLogger
 from os import path as ospath
 from os import walk
@@ -17,11 +18,20 @@ from aiofiles.os import (
 from aioshutil import rmtree
 from natsort import natsorted
 from PIL import Image
-from pyrogram.errors import BadRequest, FloodPremiumWait, FloodWait, RPCError
+from pyrogram import raw, utils
+from pyrogram.enums import ChatType
+from pyrogram.errors import (
+    BadRequest,
+    FilePartMissing,
+    FloodPremiumWait,
+    FloodWait,
+    RPCError,
+)
 from pyrogram.types import (
     InputMediaDocument,
     InputMediaPhoto,
     InputMediaVideo,
+    Message,
 )
 from tenacity import (
     RetryError,
@@ -35,8 +45,11 @@ from bot.core.aeon_client import TgClient
 from bot.core.config_manager import Config
 from bot.helper.aeon_utils.caption_gen import generate_caption
 from bot.helper.ext_utils.bot_utils import sync_to_async
+from bot.helper.ext_utils.db_handler import database
 from bot.helper.ext_utils.files_utils import (
+    FileRange,
     get_base_name,
+    get_file_digest,
     is_archive,
 )
 from bot.helper.ext_utils.media_utils import (
@@ -51,13 +64,37 @@ from bot.helper.telegram_helper.message_utils import delete_message
 LOGGER = getLogger(__name__)
 
 
+class _UploadJob:
+    """A file of the task from preparation until its message is sent.
+
+    `task` uploads the file parts ahead of time; the message itself is only
+    sent once every earlier file is, which keeps the reply chain in order.
+    When the leech cache already holds the file, `cached` is the chat and
+    message id of the earlier upload and nothing is uploaded ahead.
+    """
+
+    def __init__(self, file_, f_path, up_path, up_range, cap_mono, client, size):
+        self.file_ = file_
+        self.f_path = f_path
+        self.up_path = up_path
+        self.up_range = up_range
+        self.cap_mono = cap_mono
+        self.client = client
+        self.size = size
+        self.uploaded = 0
+        self.input_file = None
+        self.task = None
+        self.cache_key = None
+        self.cached = None
+
+
 class TelegramUploader:
-    def __init__(self, listener, path):
-        self._last_uploaded = 0
+    def __init__(self, listener, path, files_queue=None):
         self._processed_bytes = 0
         self._listener = listener
         self._user_id = listener.user_id
         self._path = path
+        self._files_queue = files_queue
         self._start_time = time()
         self._total_files = 0
         self._thumb = self._listener.thumb or f"Thumbnails/{listener.user_id}.jpg"
@@ -67,6 +104,7 @@ class TelegramUploader:
         self._media_dict = {"videos": {}, "documents": {}}
         self._last_msg_in_group = False
         self._up_path = ""
+        self._up_range = None
         self._lprefix = ""
         self._user_dump = ""
         self._lcaption = ""
@@ -75,16 +113,10 @@ class TelegramUploader:
         self._sent_msg = None
         self._user_session = self._listener.user_transmission
         self._error = ""
-
-    async def _upload_progress(self, current, _):
-        if self._listener.is_cancelled:
-            if self._user_session:
-                TgClient.user.stop_transmission()
-            else:
-                self._listener.client.stop_transmission()
-        chunk_size = current - self._last_uploaded
-        self._last_uploaded = current
-        self._processed_bytes += chunk_size
+        self._sessions = []
+        self._session_index = 0
+        self._upload_slots = None
+        self._cache_tag = None
 
     async def _user_settings(self):
         self._media_group = self._listener.user_dict.get("media_group") or (
@@ -105,6 +137,13 @@ class TelegramUploader:
         )
         if self._thumb != "none" and not await aiopath.exists(self._thumb):
             self._thumb = None
+        if Config.LEECH_CACHE and not self._listener.no_cache:
+            thumb = self._thumb
+            if thumb is not None and thumb != "none":
+                thumb = await sync_to_async(get_file_digest, thumb)
+            self._cache_tag = (
+                f"{self._listener.as_doc}|{thumb}|{self._listener.thumbnail_layout}"
+            )
 
     async def _msg_to_reply(self):
         if self._listener.up_dest:
@@ -159,8 +198,7 @@ class TelegramUploader:
             self._lprefix = re_sub("<.*?>", "", self._lprefix)
             new_path = ospath.join(dirpath, f"{self._lprefix} {file_}")
             LOGGER.info(self._up_path)
-            await rename(self._up_path, new_path)
-            self._up_path = new_path
+            await self._rename_up_path(new_path)
             LOGGER.info(self._up_path)  # nxt
         if not self._lcaption and not self._lprefix:
             cap_mono = f"<code>{file_}</code>"
@@ -184,10 +222,15 @@ class TelegramUploader:
             remain = 60 - extn
             name = name[:remain]
             new_path = ospath.join(dirpath, f"{name}{ext}")
-            await rename(self._up_path, new_path)
-            self._up_path = new_path
+            await self._rename_up_path(new_path)
         return cap_mono
 
+    async def _rename_up_path(self, new_path):
+        # Byte-range parts only exist by name until they're uploaded
+        if not self._up_range:
+            await rename(self._up_path, new_path)
+        self._up_path = new_path
+
     def _get_input_media(self, subkey, key):
         rlist = []
         for msg in self._media_dict[key][subkey]:
@@ -246,11 +289,7 @@ class TelegramUploader:
                 self._msgs_dict[m.link] = m.caption
         self._sent_msg = msgs_list[-1]
 
-    async def upload(self):
-        await self._user_settings()
-        res = await self._msg_to_reply()
-        if not res:
-            return
+    async def _walk_files(self):
         for dirpath, _, files in natsorted(await sync_to_async(walk, self._path)):
             if dirpath.endswith("/yt-dlp-thumb"):
                 continue
@@ -259,89 +298,257 @@ class TelegramUploader:
                 await rmtree(dirpath, ignore_errors=True)
                 continue
             for file_ in natsorted(files):
-                self._error = ""
-                self._up_path = f_path = ospath.join(dirpath, file_)
-                if not ospath.exists(self._up_path):
-                    LOGGER.error(f"{self._up_path} not exists! Continue uploading!")
-                    continue
-                if file_.lower().endswith(tuple(self._listener.extension_filter)):
-                    await remove(self._up_path)
-                    continue
+                for item in self._upload_parts(dirpath, file_):
+                    yield item
+
+    async def _queued_files(self):
+        while (item := await self._files_queue.get()) is not None:
+            if isinstance(item, Exception):
+                self._listener.is_cancelled = True
+                await self._listener.on_upload_error(f"Processing failed: {item}")
+                return
+            for part in self._upload_parts(*item):
+                yield part
+
+    def _upload_parts(self, dirpath, file_):
+        f_path = ospath.join(dirpath, file_)
+        if ranges := self._listener.byte_splits.get(f_path):
+            return [
+                (dirpath, ospath.basename(part), (f_path, offset, length))
+                for part, offset, length in ranges
+            ]
+        return [(dirpath, file_, None)]
+
+    async def _init_sessions(self):
+        self._sessions = [self._listener.client]
+        if self._sent_msg.chat.type == ChatType.PRIVATE:
+            return
+        for client in TgClient.helpers:
+            try:
+                await client.get_chat(self._sent_msg.chat.id)
+            except Exception as e:
+                LOGGER.warning(
+                    f"Helper @{client.me.username} can't upload here: {e}",
+                )
+                continue
+            self._sessions.append(client)
+
+    def _pick_session(self, f_size):
+        if self._listener.user_transmission and (
+            not self._listener.mixed_leech or f_size > 2097152000
+        ):
+            return TgClient.user
+        client = self._sessions[self._session_index % len(self._sessions)]
+        self._session_index += 1
+        return client
+
+    def _progress(self, job):
+        async def progress(current, _):
+            if self._listener.is_cancelled:
+                job.client.stop_transmission()
+            self._processed_bytes += current - job.uploaded
+            job.uploaded = current
+
+        return progress
+
+    async def _save_file(self, job):
+        source = job.up_path
+        if job.up_range:
+            source = FileRange(*job.up_range, ospath.basename(job.up_path))
+        try:
+            while True:
                 try:
-                    f_size = await aiopath.getsize(self._up_path)
-                    self._total_files += 1
-                    if f_size == 0:
-                        LOGGER.error(
-                            f"{self._up_path} size is zero, telegram don't upload zero size files",
-                        )
-                        self._corrupted += 1
-                        continue
-                    if self._listener.is_cancelled:
-                        return
-                    cap_mono = await self._prepare_file(file_, dirpath)
-                    if self._last_msg_in_group:
-                        group_lists = [
-                            x for v in self._media_dict.values() for x in v
-                        ]
-                        match = re_match(
-                            r".+(?=\.0*\d+$)|.+(?=\.part\d+\..+$)",
-                            f_path,
-                        )
-                        if not match or (
-                            match and match.group(0) not in group_lists
-                        ):
-                            for key, value in list(self._media_dict.items()):
-                                for subkey, msgs in list(value.items()):
-                                    if len(msgs) > 1:
-                                        await self._send_media_group(
-                                            subkey,
-                                            key,
-                                            msgs,
-                                        )
-                    if (
-                        self._listener.mixed_leech
-                        and self._listener.user_transmission
-                    ):
-                        self._user_session = f_size > 2097152000
-                        if self._user_session:
-                            self._sent_msg = await TgClient.user.get_messages(
-                                chat_id=self._sent_msg.chat.id,
-                                message_ids=self._sent_msg.id,
-                            )
-                        else:
-                            self._sent_msg = (
-                                await self._listener.client.get_messages(
-                                    chat_id=self._sent_msg.chat.id,
-                                    message_ids=self._sent_msg.id,
+                    return await job.client.save_file(
+                        source,
+                        progress=self._progress(job),
+                    )
+                except (FloodWait, FloodPremiumWait) as f:
+                    LOGGER.warning(str(f))
+                    await sleep(f.value * 1.3)
+        finally:
+            if job.up_range:
+                source.close()
+
+    async def _lookup_cache(self, job):
+        """Find an earlier upload of the same bytes, name and upload settings."""
+        digest = await sync_to_async(
+            get_file_digest,
+            job.up_path,
+            job.up_range,
+            workload="cpu",
+        )
+        job.cache_key = f"{digest}|{ospath.basename(job.up_path)}|{self._cache_tag}"
+        job.cached = await database.get_leech_cache(job.cache_key)
+        return job.cached is not None
+
+    async def _prefetch(self, job):
+        async with self._upload_slots:
+            if self._listener.is_cancelled:
+                return None
+            if self._cache_tag is not None and await self._lookup_cache(job):
+                return None
+            return await self._save_file(job)
+
+    async def _send_cached(self, job):
+        """Copy the earlier upload of job, False if it has to be uploaded."""
+        chat_id, msg_id = job.cached
+        try:
+            msg = await job.client.get_messages(chat_id, msg_id)
+            if msg is None or msg.empty or not msg.media:
+                LOGGER.info(f"Leech cache entry deleted. Path: {job.up_path}")
+                await database.rm_leech_cache(job.cache_key)
+                return False
+            self._sent_msg = await msg.copy(
+                self._sent_msg.chat.id,
+                caption=job.cap_mono,
+                disable_notification=True,
+                reply_to_message_id=self._sent_msg.id,
+            )
+        except Exception as e:
+            LOGGER.warning(f"Leech cache copy failed: {e}. Path: {job.up_path}")
+            return False
+        self._processed_bytes += job.size
+        await self._copy_message()
+        if self._media_group:
+            await self._add_to_media_group(job.f_path)
+        return True
+
+    async def _input_file(self, job):
+        if job.task is not None:
+            task, job.task = job.task, None
+            job.input_file = await task
+        if job.input_file is None:
+            job.input_file = await self._save_file(job)
+        return job.input_file
+
+    async def _prepare_job(self, dirpath, file_, byte_range):
+        self._up_path = f_path = ospath.join(dirpath, file_)
+        self._up_range = byte_range
+        if not ospath.exists(byte_range[0] if byte_range else self._up_path):
+            LOGGER.error(f"{self._up_path} not exists! Continue uploading!")
+            return None
+        if not byte_range and file_.lower().endswith(
+            tuple(self._listener.extension_filter),
+        ):
+            await remove(self._up_path)
+            return None
+        try:
+            f_size = (
+                byte_range[2] if byte_range else await aiopath.getsize(self._up_path)
+            )
+            self._total_files += 1
+            if f_size == 0:
+                LOGGER.error(
+                    f"{self._up_path} size is zero, telegram don't upload zero size files",
+                )
+                self._corrupted += 1
+                return None
+            cap_mono = await self._prepare_file(file_, dirpath)
+        except Exception as err:
+            LOGGER.error(f"{err}. Path: {self._up_path}")
+            self._error = str(err)
+            self._corrupted += 1
+            return None
+        job = _UploadJob(
+            file_,
+            f_path,
+            self._up_path,
+            byte_range,
+            cap_mono,
+            self._pick_session(f_size),
+            f_size,
+        )
+        job.task = create_task(self._prefetch(job))
+        return job
+
+    async def _send_job(self, job):
+        self._error = ""
+        self._up_path = job.up_path
+        self._up_range = job.up_range
+        try:
+            if self._last_msg_in_group:
+                group_lists = [x for v in self._media_dict.values() for x in v]
+                match = re_match(
+                    r".+(?=\.0*\d+$)|.+(?=\.part\d+\..+$)",
+                    job.f_path,
+                )
+                if not match or (match and match.group(0) not in group_lists):
+                    for key, value in list(self._media_dict.items()):
+                        for subkey, msgs in list(value.items()):
+                            if len(msgs) > 1:
+                                await self._send_media_group(
+                                    subkey,
+                                    key,
+                                    msgs,
                                 )
-                            )
-                    self._last_msg_in_group = False
-                    self._last_uploaded = 0
-                    await self._upload_file(cap_mono, file_, f_path)
-                    if self._listener.is_cancelled:
-                        return
-                    if (
-                        not self._is_corrupted
-                        and (self._listener.is_super_chat or self._listener.up_dest)
-                        and not self._is_private
-                    ):
-                        self._msgs_dict[self._sent_msg.link] = file_
-                    await sleep(1)
-                except Exception as err:
-                    if isinstance(err, RetryError):
-                        LOGGER.info(
-                            f"Total Attempts: {err.last_attempt.attempt_number}",
-                        )
-                        err = err.last_attempt.exception()
-                    LOGGER.error(f"{err}. Path: {self._up_path}")
-                    self._error = str(err)
-                    self._corrupted += 1
+            self._user_session = job.client is TgClient.user
+            self._last_msg_in_group = False
+            if job.cached is None or not await self._send_cached(job):
+                await self._upload_file(job, job.cap_mono, job.file_, job.f_path)
+                if self._listener.is_cancelled:
+                    return
+                if job.cache_key and self._sent_msg.chat.type != ChatType.PRIVATE:
+                    await database.update_leech_cache(
+                        job.cache_key,
+                        self._sent_msg.chat.id,
+                        self._sent_msg.id,
+                    )
+            if self._listener.is_cancelled:
+                return
+            if (
+                not self._is_corrupted
+                and (self._listener.is_super_chat or self._listener.up_dest)
+                and not self._is_private
+            ):
+                self._msgs_dict[self._sent_msg.link] = job.file_
+        except Exception as err:
+            if isinstance(err, RetryError):
+                LOGGER.info(
+                    f"Total Attempts: {err.last_attempt.attempt_number}",
+                )
+                err = err.last_attempt.exception()
+            LOGGER.error(f"{err}. Path: {self._up_path}")
+            self._error = str(err)
+            self._corrupted += 1
+            if self._listener.is_cancelled:
+                return
+        if self._listener.is_cancelled:
+            return
+        if job.up_range:
+            source, offset, length = job.up_range
+            if offset + length >= await aiopath.getsize(source):
+                await remove(source)
+        elif await aiopath.exists(self._up_path):
+            await remove(self._up_path)
+
+    async def upload(self):
+        await self._user_settings()
+        res = await self._msg_to_reply()
+        if not res:
+            return
+        await self._init_sessions()
+        window = max(1, Config.LEECH_PARALLEL_UPLOADS)
+        self._upload_slots = Semaphore(window)
+        jobs = deque()
+        files = self._queued_files() if self._files_queue else self._walk_files()
+        try:
+            async for dirpath, file_, byte_range in files:
+                if self._listener.is_cancelled:
+                    return
+                if job := await self._prepare_job(dirpath, file_, byte_range):
+                    jobs.append(job)
+                while len(jobs) > window:
+                    await self._send_job(jobs.popleft())
                     if self._listener.is_cancelled:
                         return
-                if not self._listener.is_cancelled and await aiopath.exists(
-                    self._up_path,
-                ):
-                    await remove(self._up_path)
+            while jobs:
+                await self._send_job(jobs.popleft())
+                if self._listener.is_cancelled:
+                    return
+        finally:
+            for job in jobs:
+                if job.task is not None:
+                    job.task.cancel()
         for key, value in list(self._media_dict.items()):
             for subkey, msgs in list(value.items()):
                 if len(msgs) > 1:
@@ -371,12 +578,39 @@ class TelegramUploader:
             self._corrupted,
         )
 
+    async def _send_media(self, client, media, caption):
+        chat_id = self._sent_msg.chat.id
+        r = await client.invoke(
+            raw.functions.messages.SendMedia(
+                peer=await client.resolve_peer(chat_id),
+                media=media,
+                silent=True,
+                reply_to=raw.types.InputReplyToMessage(
+                    reply_to_msg_id=self._sent_msg.id,
+                ),
+                random_id=client.rnd_id(),
+                **await utils.parse_text_entities(client, caption, None, None),
+            ),
+        )
+        for update in r.updates:
+            if isinstance(
+                update,
+                raw.types.UpdateNewMessage | raw.types.UpdateNewChannelMessage,
+            ):
+                return await Message._parse(
+                    client,
+                    update.message,
+                    {u.id: u for u in r.users},
+                    {c.id: c for c in r.chats},
+                )
+        raise RPCError(f"No message returned for {self._up_path}")
+
     @retry(
         wait=wait_exponential(multiplier=2, min=4, max=8),
         stop=stop_after_attempt(3),
         retry=retry_if_exception_type(Exception),
     )
-    async def _upload_file(self, cap_mono, file, o_path, force_document=False):
+    async def _upload_file(self, job, cap_mono, file, o_path, force_document=False):
         if (
             self._thumb is not None
             and not await aiopath.exists(self._thumb)
@@ -385,12 +619,19 @@ class TelegramUploader:
             self._thumb = None
         thumb = self._thumb
         self._is_corrupted = False
+        client = job.client
+        file_name = ospath.basename(self._up_path)
         try:
-            is_video, is_audio, is_image = await get_document_type(self._up_path)
+            if self._up_range:
+                is_video = is_audio = is_image = False
+            else:
+                is_video, is_audio, is_image = await get_document_type(
+                    self._up_path,
+                )
 
             if not is_image and thumb is None:
-                file_name = ospath.splitext(file)[0]
-                thumb_path = f"{self._path}/yt-dlp-thumb/{file_name}.jpg"
+                thumb_name = ospath.splitext(file)[0]
+                thumb_path = f"{self._path}/yt-dlp-thumb/{thumb_name}.jpg"
                 if await aiopath.isfile(thumb_path):
                     thumb = thumb_path
                 elif is_audio and not is_video:
@@ -409,14 +650,14 @@ class TelegramUploader:
                     return None
                 if thumb == "none":
                     thumb = None
-                self._sent_msg = await self._sent_msg.reply_document(
-                    document=self._up_path,
-                    quote=True,
-                    thumb=thumb,
-                    caption=cap_mono,
-                    force_document=True,
-                    disable_notification=True,
-                    progress=self._upload_progress,
+                media = raw.types.InputMediaUploadedDocument(
+                    mime_type=client.guess_mime_type(file_name) or "application/zip",
+                    file=await self._input_file(job),
+                    force_file=True,
+                    thumb=await client.save_file(thumb),
+                    attributes=[
+                        raw.types.DocumentAttributeFilename(file_name=file_name),
+                    ],
                 )
             elif is_video:
                 key = "videos"
@@ -439,69 +680,54 @@ class TelegramUploader:
                     return None
                 if thumb == "none":
                     thumb = None
-                self._sent_msg = await self._sent_msg.reply_video(
-                    video=self._up_path,
-                    quote=True,
-                    caption=cap_mono,
-                    duration=duration,
-                    width=width,
-                    height=height,
-                    thumb=thumb,
-                    supports_streaming=True,
-                    disable_notification=True,
-                    progress=self._upload_progress,
+                media = raw.types.InputMediaUploadedDocument(
+                    mime_type=client.guess_mime_type(file_name) or "video/mp4",
+                    file=await self._input_file(job),
+                    thumb=await client.save_file(thumb),
+                    attributes=[
+                        raw.types.DocumentAttributeVideo(
+                            supports_streaming=True,
+                            duration=duration,
+                            w=width,
+                            h=height,
+                        ),
+                        raw.types.DocumentAttributeFilename(file_name=file_name),
+                    ],
                 )
             elif is_audio:
                 key = "audios"
                 duration, artist, title = await get_media_info(self._up_path)
                 if self._listener.is_cancelled:
                     return None
-                self._sent_msg = await self._sent_msg.reply_audio(
-                    audio=self._up_path,
-                    quote=True,
-                    caption=cap_mono,
-                    duration=duration,
-                    performer=artist,
-                    title=title,
-                    thumb=thumb,
-                    disable_notification=True,
-                    progress=self._upload_progress,
+                media = raw.types.InputMediaUploadedDocument(
+                    mime_type=client.guess_mime_type(file_name) or "audio/mpeg",
+                    file=await self._input_file(job),
+                    thumb=await client.save_file(thumb),
+                    attributes=[
+                        raw.types.DocumentAttributeAudio(
+                            duration=duration,
+                            performer=artist,
+                            title=title,
+                        ),
+                        raw.types.DocumentAttributeFilename(file_name=file_name),
+                    ],
                 )
             else:
                 key = "photos"
                 if self._listener.is_cancelled:
                     return None
-                self._sent_msg = await self._sent_msg.reply_photo(
-                    photo=self._up_path,
-                    quote=True,
-                    caption=cap_mono,
-                    disable_notification=True,
-                    progress=self._upload_progress,
+                media = raw.types.InputMediaUploadedPhoto(
+                    file=await self._input_file(job),
                 )
 
+            if self._listener.is_cancelled:
+                return None
+            self._sent_msg = await self._send_media(client, media, cap_mono)
+
             await self._copy_message()
 
-            if (
-                not self._listener.is_cancelled
-                and self._media_group
-                and (self._sent_msg.video or self._sent_msg.document)
-            ):
-                key = "documents" if self._sent_msg.document else "videos"
-                if match := re_match(r".+(?=\.0*\d+$)|.+(?=\.part\d+\..+$)", o_path):
-                    pname = match.group(0)
-                    if pname in self._media_dict[key]:
-                        self._media_dict[key][pname].append(
-                            [self._sent_msg.chat.id, self._sent_msg.id],
-                        )
-                    else:
-                        self._media_dict[key][pname] = [
-                            [self._sent_msg.chat.id, self._sent_msg.id],
-                        ]
-                    msgs = self._media_dict[key][pname]
-                    if len(msgs) == 10:
-                        await self._send_media_group(pname, key, msgs)
-                    else:
-                        self._last_msg_in_group = True
+            if not self._listener.is_cancelled and self._media_group:
+                await self._add_to_media_group(o_path)
 
             if (
                 self._thumb is None
@@ -518,7 +744,7 @@ class TelegramUploader:
                 and await aiopath.exists(thumb)
             ):
                 await remove(thumb)
-            return await self._upload_file(cap_mono, file, o_path)
+            return await self._upload_file(job, cap_mono, file, o_path)
         except Exception as err:
             if (
                 self._thumb is None
@@ -526,13 +752,35 @@ class TelegramUploader:
                 and await aiopath.exists(thumb)
             ):
                 await remove(thumb)
+            if isinstance(err, FilePartMissing):
+                job.input_file = None
             err_type = "RPCError: " if isinstance(err, RPCError) else ""
             LOGGER.error(f"{err_type}{err}. Path: {self._up_path}")
             if isinstance(err, BadRequest) and key != "documents":
                 LOGGER.error(f"Retrying As Document. Path: {self._up_path}")
-                return await self._upload_file(cap_mono, file, o_path, True)
+                return await self._upload_file(job, cap_mono, file, o_path, True)
             raise err
 
+    async def _add_to_media_group(self, o_path):
+        if not (self._sent_msg.video or self._sent_msg.document):
+            return
+        key = "documents" if self._sent_msg.document else "videos"
+        if match := re_match(r".+(?=\.0*\d+$)|.+(?=\.part\d+\..+$)", o_path):
+            pname = match.group(0)
+            if pname in self._media_dict[key]:
+                self._media_dict[key][pname].append(
+                    [self._sent_msg.chat.id, self._sent_msg.id],
+                )
+            else:
+                self._media_dict[key][pname] = [
+                    [self._sent_msg.chat.id, self._sent_msg.id],
+                ]
+            msgs = self._media_dict[key][pname]
+            if len(msgs) == 10:
+                await self._send_media_group(pname, key, msgs)
+            else:
+                self._last_msg_in_group = True
+
     async def _copy_message(self):
         await sleep(1)
 
@@ -1,9 +1,9 @@
-from asyncio import sleep
+from asyncio import gather, sleep
 from re import match as re_match
 from time import time
 
 from cachetools import TTLCache
-from pyrogram import Client, enums
+from pyrogram import enums
 from pyrogram.errors import (
     FloodPremiumWait,
     FloodWait,
@@ -14,6 +14,7 @@ from pyrogram.types import InputMediaPhoto
 
 from bot import (
     LOGGER,
+    bot_loop,
     intervals,
     status_dict,
     task_dict_lock,
@@ -21,12 +22,19 @@ from bot import (
 )
 from bot.core.aeon_client import TgClient
 from bot.core.config_manager import Config
-from bot.helper.ext_utils.bot_utils import SetInterval
+from bot.core.rate_governor import GovernedClient
 from bot.helper.ext_utils.exceptions import TgLinkException
-from bot.helper.ext_utils.status_utils import get_readable_message
+from bot.helper.ext_utils.status_utils import (
+    StatusSnapshot,
+    get_readable_message,
+    get_status_page,
+)
 
 session_cache = TTLCache(maxsize=1000, ttl=36000)
 
+STATUS_INTERVAL = 3
+STATUS_STALE = 30
+
 
 async def send_message(
     message,
@@ -208,7 +216,7 @@ async def get_tg_link_message(link, user_id=""):
             user_dict = user_data.get(user_id, {})
             session_string = user_dict.get("session_string")
             if session_string:
-                user_session = Client(
+                user_session = GovernedClient(
                     f"session_{user_id}",
                     Config.TELEGRAM_API,
                     Config.TELEGRAM_HASH,
@@ -301,55 +309,93 @@ async def check_permission(_, chat, uploader_id, __):
         )
 
 
+def _status_interval(sid):
+    """Seconds between refreshes of sid, longer after FloodWaits in its chat."""
+    chat_id = status_dict[sid]["message"].chat.id
+    return STATUS_INTERVAL * TgClient.bot.governor.slowdown(chat_id)
+
+
+async def _refresh_status(sid, snapshot, force=False):
+    """Render sid from snapshot and return the edit it needs, if any.
+
+    Without force, a status whose tasks, states and whole progress percents
+    are unchanged is only edited again once it is STATUS_STALE seconds old.
+    """
+    data = status_dict[sid]
+    text, buttons, signature = await get_status_page(
+        sid,
+        data["is_user"],
+        data["page_no"],
+        data["status"],
+        data["page_step"],
+        snapshot,
+    )
+    if text is None:
+        del status_dict[sid]
+        return None
+    if text == data["message"].text or (
+        not force
+        and signature == data.get("signature")
+        and time() - data["time"] < STATUS_STALE
+    ):
+        return None
+    data["time"] = time()
+    return sid, data["message"], text, buttons, signature
+
+
+async def _edit_status(sid, message, text, buttons, signature):
+    result = await edit_message(message, text, buttons, block=False)
+    if result is message:
+        return
+    if isinstance(result, str):
+        if result.startswith("Telegram says: [40"):
+            if status_dict.get(sid, {}).get("message") is message:
+                del status_dict[sid]
+        else:
+            LOGGER.error(
+                f"Status with id: {sid} haven't been updated. Error: {result}",
+            )
+        return
+    message.text = text
+    if (data := status_dict.get(sid)) and data["message"] is message:
+        data.update({"signature": signature, "time": time()})
+
+
+async def _status_ticker():
+    """Refresh every due status message from one snapshot of the tasks."""
+    # User status messages aren't refreshed here, stop once only they are left
+    while not intervals["stopAll"] and any(
+        not data["is_user"] for data in status_dict.values()
+    ):
+        await sleep(1)
+        try:
+            async with task_dict_lock:
+                snapshot = StatusSnapshot()
+                edits = []
+                for sid, data in list(status_dict.items()):
+                    if data["is_user"] or time() - data["time"] < _status_interval(
+                        sid,
+                    ):
+                        continue
+                    if edit := await _refresh_status(sid, snapshot):
+                        edits.append(edit)
+            await gather(*(_edit_status(*edit) for edit in edits))
+        except Exception as e:
+            LOGGER.error(f"Status update failed: {e}")
+    intervals["status"] = ""
+
+
 async def update_status_message(sid, force=False):
     if intervals["stopAll"]:
         return
     async with task_dict_lock:
         if not status_dict.get(sid):
-            if obj := intervals["status"].get(sid):
-                obj.cancel()
-                del intervals["status"][sid]
-            return
-        if not force and time() - status_dict[sid]["time"] < 3:
             return
-        status_dict[sid]["time"] = time()
-        page_no = status_dict[sid]["page_no"]
-        status = status_dict[sid]["status"]
-        is_user = status_dict[sid]["is_user"]
-        page_step = status_dict[sid]["page_step"]
-        text, buttons = await get_readable_message(
-            sid,
-            is_user,
-            page_no,
-            status,
-            page_step,
-        )
-        if text is None:
-            del status_dict[sid]
-            if obj := intervals["status"].get(sid):
-                obj.cancel()
-                del intervals["status"][sid]
+        if not force and time() - status_dict[sid]["time"] < _status_interval(sid):
             return
-        if text != status_dict[sid]["message"].text:
-            message = await edit_message(
-                status_dict[sid]["message"],
-                text,
-                buttons,
-                block=False,
-            )
-            if isinstance(message, str):
-                if message.startswith("Telegram says: [40"):
-                    del status_dict[sid]
-                    if obj := intervals["status"].get(sid):
-                        obj.cancel()
-                        del intervals["status"][sid]
-                else:
-                    LOGGER.error(
-                        f"Status with id: {sid} haven't been updated. Error: {message}",
-                    )
-                return
-            status_dict[sid]["message"].text = text
-            status_dict[sid]["time"] = time()
+        edit = await _refresh_status(sid, StatusSnapshot(), force)
+    if edit:
+        await _edit_status(*edit)
 
 
 async def send_status_message(msg, user_id=0):
@@ -371,9 +417,6 @@ async def send_status_message(msg, user_id=0):
             )
             if text is None:
                 del status_dict[sid]
-                if obj := intervals["status"].get(sid):
-                    obj.cancel()
-                    del intervals["status"][sid]
                 return
             old_message = status_dict[sid]["message"]
             message = await send_message(msg, text, buttons, block=False)
@@ -404,9 +447,5 @@ async def send_status_message(msg, user_id=0):
                 "status": "All",
                 "is_user": is_user,
             }
-        if not intervals["status"].get(sid) and not is_user:
-            intervals["status"][sid] = SetInterval(
-                1,
-                update_status_message,
-                sid,
-            )
+        if not intervals["status"] and not is_user:
+            intervals["status"] = bot_loop.create_task(_status_ticker())
@@ -24,17 +24,16 @@ from bot import (
     drives_names,
     extension_filter,
     index_urls,
-    intervals,
     jd_listener_lock,
-    task_dict,
 )
 from bot.core.aeon_client import TgClient
 from bot.core.config_manager import Config
 from bot.core.startup import update_variables
-from bot.helper.ext_utils.bot_utils import SetInterval, new_task, sync_to_async
+from bot.helper.ext_utils.bot_utils import new_task, sync_to_async
 from bot.helper.ext_utils.db_handler import database
 from bot.helper.ext_utils.jdownloader_booter import jdownloader
 from bot.helper.ext_utils.task_manager import start_from_queued
+from bot.helper.mirror_leech_utils.gdrive_utils.index import drive_index
 from bot.helper.mirror_leech_utils.rclone_utils.serve import rclone_serve_booter
 from bot.helper.telegram_helper.button_build import ButtonMaker
 from bot.helper.telegram_helper.message_utils import (
@@ -42,7 +41,6 @@ from bot.helper.telegram_helper.message_utils import (
     edit_message,
     send_file,
     send_message,
-    update_status_message,
 )
 
 from .rss import add_job
@@ -78,6 +76,7 @@ async def get_buttons(key=None, edit_type=None):
                 "CMD_SUFFIX",
                 "OWNER_ID",
                 "USER_SESSION_STRING",
+                "HELPER_BOT_TOKENS",
                 "TELEGRAM_HASH",
                 "TELEGRAM_API",
                 "BOT_TOKEN",
@@ -96,6 +95,7 @@ async def get_buttons(key=None, edit_type=None):
                     "CMD_SUFFIX",
                     "OWNER_ID",
                     "USER_SESSION_STRING",
+                    "HELPER_BOT_TOKENS",
                     "TELEGRAM_HASH",
                     "TELEGRAM_API",
                     "BOT_TOKEN",
@@ -194,6 +194,7 @@ async def edit_variable(_, message, pre_message, key):
         "CMD_SUFFIX",
         "OWNER_ID",
         "USER_SESSION_STRING",
+        "HELPER_BOT_TOKENS",
         "TELEGRAM_HASH",
         "TELEGRAM_API",
         "BOT_TOKEN",
@@ -218,6 +219,8 @@ async def edit_variable(_, message, pre_message, key):
         await jdownloader.boot()
     elif key == "RSS_DELAY":
         add_job()
+    elif key == "GDRIVE_INDEX_INTERVAL":
+        await drive_index.start()
 
 
 async def sync_jdownloader():
@@ -485,15 +488,6 @@ async def load_config():
     if not await aiopath.exists("accounts"):
         Config.USE_SERVICE_ACCOUNTS = False
 
-    if len(task_dict) != 0 and (st := intervals["status"]):
-        for key, intvl in list(st.items()):
-            intvl.cancel()
-            intervals["status"][key] = SetInterval(
-                1,
-                update_status_message,
-                key,
-            )
-
     downloads = aria2.get_downloads()
     if not Config.TORRENT_TIMEOUT:
         for download in downloads:
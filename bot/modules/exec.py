@@ -85,7 +85,9 @@ async def do(func, message):
     try:
         with redirect_stdout(stdout):
             func_return = (
-                await sync_to_async(rfunc) if func == "exec" else await rfunc()
+                await sync_to_async(rfunc, workload="io-long")
+                if func == "exec"
+                else await rfunc()
             )
     except Exception:
         value = stdout.getvalue()
@@ -98,7 +100,7 @@ async def do(func, message):
                 result = f"{value}"
             else:
                 with suppress(Exception):
-                    result = f"{await sync_to_async(eval, body, env)!r}"
+                    result = f"{await sync_to_async(eval, body, env, workload='io-long')!r}"
         else:
             result = f"{value}{func_return}"
         if result:
@@ -9,10 +9,7 @@ from bot import (
 from bot.core.config_manager import Config
 from bot.helper.ext_utils.bot_utils import new_task
 from bot.helper.ext_utils.status_utils import get_task_by_gid
-from bot.helper.ext_utils.task_manager import (
-    start_dl_from_queued,
-    start_up_from_queued,
-)
+from bot.helper.ext_utils.task_manager import start_from_queued
 from bot.helper.telegram_helper.bot_commands import BotCommands
 from bot.helper.telegram_helper.message_utils import send_message
 
@@ -36,8 +33,8 @@ async def remove_from_queue(_, message):
             return
     elif len(msg) in {1, 2}:
         msg = f"""Reply to an active Command message which was used to start the download/upload.
-<code>/{BotCommands.ForceStartCommand[0]}</code> fd (to remove it from download queue) or fu (to remove it from upload queue) or nothing to start remove it from both download and upload queue.
-Also send <code>/{BotCommands.ForceStartCommand[0]} GID</code> fu|fd or obly gid to force start by removeing the task rom queue!
+<code>/{BotCommands.ForceStartCommand[0]}</code> fd (to bump it in download queue) or fu (to bump it in upload queue) or nothing to bump it in both download and upload queue.
+Also send <code>/{BotCommands.ForceStartCommand[0]} GID</code> fu|fd or obly gid to move the task to the front of the queue!
 Examples:
 <code>/{BotCommands.ForceStartCommand[1]}</code> GID fu (force upload)
 <code>/{BotCommands.ForceStartCommand[1]}</code> GID (force download and upload)
@@ -57,28 +54,25 @@ By reply to task cmd:
     async with queue_dict_lock:
         if status == "fu":
             listener.force_upload = True
-            if listener.mid in queued_up:
-                await start_up_from_queued(listener.mid)
-                msg = "Task have been force started to upload!"
+            if queued_up.bump(listener.mid):
+                msg = "Task moved to the front of the upload queue!"
             else:
-                msg = "Force upload enabled for this task!"
+                msg = "Task will go to the front of the upload queue!"
         elif status == "fd":
             listener.force_download = True
-            if listener.mid in queued_dl:
-                await start_dl_from_queued(listener.mid)
-                msg = "Task have been force started to download only!"
+            if queued_dl.bump(listener.mid):
+                msg = "Task moved to the front of the download queue!"
             else:
                 msg = "This task not in download queue!"
         else:
             listener.force_download = True
             listener.force_upload = True
-            if listener.mid in queued_up:
-                await start_up_from_queued(listener.mid)
-                msg = "Task have been force started to upload!"
-            elif listener.mid in queued_dl:
-                await start_dl_from_queued(listener.mid)
-                msg = "Task have been force started to download and upload will start once download finish!"
+            if queued_up.bump(listener.mid):
+                msg = "Task moved to the front of the upload queue!"
+            elif queued_dl.bump(listener.mid):
+                msg = "Task moved to the front of the download queue, upload will go to the front too once download finish!"
             else:
                 msg = "This task not in queue!"
+    await start_from_queued()
     if msg:
         await send_message(message, msg)
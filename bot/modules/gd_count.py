@@ -24,6 +24,7 @@ async def count_node(_, message):
             GoogleDriveCount().count,
             link,
             user.id,
+            workload="io-long",
         )
         if mime_type is None:
             await send_message(message, name)
@@ -48,6 +48,7 @@ async def _list_drive(key, message, item_type, is_recursive, user_token, user_id
         key,
         target_id,
         user_id,
+        workload="io-long",
     )
     if telegraph_content:
         try:
@@ -91,6 +91,7 @@ class Mirror(TaskListener):
         args = {
             "-doc": False,
             "-med": False,
+            "-nc": False,
             "-d": False,
             "-j": False,
             "-s": False,
@@ -147,6 +148,7 @@ class Mirror(TaskListener):
         self.thumbnail_layout = args["-tl"]
         self.as_doc = args["-doc"]
         self.as_med = args["-med"]
+        self.no_cache = args["-nc"]
         self.metadata = args["-md"]
         self.folder_name = f"/{args['-m']}" if len(args["-m"]) > 0 else ""
 
@@ -358,7 +360,11 @@ class Mirror(TaskListener):
                 content_type,
             ):
                 try:
-                    self.link = await sync_to_async(direct_link_generator, self.link)
+                    self.link = await sync_to_async(
+                        direct_link_generator,
+                        self.link,
+                        workload="io-long",
+                    )
                     if isinstance(self.link, tuple):
                         self.link, headers = self.link
                     elif isinstance(self.link, str):
@@ -118,8 +118,7 @@ async def confirm_restart(_, query):
         if jd := intervals["jd"]:
             jd.cancel()
         if st := intervals["status"]:
-            for intvl in list(st.values()):
-                intvl.cancel()
+            st.cancel()
         await sync_to_async(clean_all)
         proc1 = await create_subprocess_exec(
             "pkill",
@@ -1,19 +1,27 @@
-from asyncio import Lock, sleep
+from asyncio import Lock, Semaphore, gather, sleep
+from collections import defaultdict
 from datetime import datetime, timedelta
 from functools import partial
 from io import BytesIO
-from re import IGNORECASE, compile
+from re import IGNORECASE, compile, escape
 from time import time
+from typing import ClassVar
+from urllib.parse import urlparse
 
 from apscheduler.triggers.interval import IntervalTrigger
 from feedparser import parse as feed_parse
-from httpx import AsyncClient
+from httpx import AsyncClient, Limits
 from pyrogram.filters import create
 from pyrogram.handlers import MessageHandler
 
 from bot import LOGGER, rss_dict, scheduler
 from bot.core.config_manager import Config
-from bot.helper.ext_utils.bot_utils import arg_parser, get_size_bytes, new_task
+from bot.helper.ext_utils.bot_utils import (
+    arg_parser,
+    get_size_bytes,
+    new_task,
+    sync_to_async,
+)
 from bot.helper.ext_utils.db_handler import database
 from bot.helper.ext_utils.exceptions import RssShutdownException
 from bot.helper.ext_utils.help_messages import RSS_HELP_MESSAGE
@@ -30,6 +38,7 @@ from bot.helper.telegram_helper.message_utils import (
 
 rss_dict_lock = Lock()
 handler_dict = {}
+rss_matchers = {}
 size_regex = compile(r"(\d+(\.\d+)?\s?(GB|MB|KB|GiB|MiB|KiB))", IGNORECASE)
 
 headers = {
@@ -39,6 +48,123 @@ headers = {
 }
 
 
+class RssFetcher:
+    """Fetches feeds over one pooled client.
+
+    At most FETCHES requests run at once and at most HOST_FETCHES of them go
+    to the same host. The ETag and Last-Modified of each feed's last response
+    are sent back, so feeds that didn't change answer 304 and are skipped
+    without being parsed. Parsing runs off the event loop.
+    """
+
+    FETCHES = 20
+    HOST_FETCHES = 4
+    _client = None
+    _slots = Semaphore(FETCHES)
+    _host_slots: ClassVar[dict] = defaultdict(partial(Semaphore, HOST_FETCHES))
+    _validators: ClassVar[dict] = {}
+
+    @classmethod
+    def _get_client(cls):
+        if cls._client is None:
+            cls._client = AsyncClient(
+                headers=headers,
+                follow_redirects=True,
+                timeout=60,
+                verify=False,
+                limits=Limits(
+                    max_connections=cls.FETCHES,
+                    max_keepalive_connections=cls.FETCHES,
+                ),
+            )
+        return cls._client
+
+    @classmethod
+    async def fetch(cls, link, conditional=False):
+        """Parsed feed of link, None if conditional and unchanged."""
+        request_headers = {}
+        if conditional and link in cls._validators:
+            etag, modified = cls._validators[link]
+            if etag:
+                request_headers["If-None-Match"] = etag
+            if modified:
+                request_headers["If-Modified-Since"] = modified
+        async with cls._slots, cls._host_slots[urlparse(link).netloc]:
+            tries = 0
+            while True:
+                try:
+                    res = await cls._get_client().get(link, headers=request_headers)
+                    break
+                except Exception:
+                    tries += 1
+                    if tries > 3:
+                        raise
+        if res.status_code == 304:
+            return None
+        if conditional:
+            etag = res.headers.get("ETag")
+            modified = res.headers.get("Last-Modified")
+            if etag or modified:
+                cls._validators[link] = (etag, modified)
+            else:
+                cls._validators.pop(link, None)
+        return await sync_to_async(feed_parse, res.text, workload="cpu")
+
+    @classmethod
+    def forget(cls, link):
+        """Fetch link in full next time, as its last response wasn't handled
+        or a subscription to it was resumed or edited since."""
+        cls._validators.pop(link, None)
+
+
+class RssSender:
+    """Spaces out the items posted to RSS_CHAT, independently of fetching."""
+
+    INTERVAL = 3
+    _lock = Lock()
+
+    @classmethod
+    async def send(cls, text, chat_id, thread_id):
+        async with cls._lock:
+            await send_rss(text, chat_id, thread_id)
+            try:
+                await sleep(cls.INTERVAL)
+            except Exception:
+                raise RssShutdownException("Rss Monitor Stopped!") from None
+
+
+class RssMatcher:
+    """Include and exclude filters of a subscription compiled to regexes.
+
+    Each include group becomes one alternation that has to match and all
+    exclude words become a single alternation that must not, so a title is
+    scanned once per group instead of once per word. Matchers are cached
+    in rss_matchers and dropped when the subscription is added or edited.
+    """
+
+    __slots__ = ("_exf", "_inf")
+
+    def __init__(self, data):
+        flags = IGNORECASE if data.get("sensitive", False) else 0
+        self._inf = [
+            compile("|".join(escape(x) for x in flist), flags)
+            for flist in data["inf"]
+        ]
+        words = [escape(x) for flist in data["exf"] for x in flist]
+        self._exf = compile("|".join(words), flags) if words else None
+
+    @classmethod
+    def get(cls, user, title, data):
+        if (matcher := rss_matchers.get((user, title))) is None:
+            matcher = rss_matchers[(user, title)] = cls(data)
+        return matcher
+
+    def match(self, item_title):
+        return all(regex.search(item_title) for regex in self._inf) and not (
+            self._exf and self._exf.search(item_title)
+        )
+
+
 async def rss_menu(event):
     user_id = event.from_user.id
     buttons = ButtonMaker()
@@ -135,15 +261,7 @@ async def rss_sub(_, message, pre_event):
             cmd = None
             stv = False
         try:
-            async with AsyncClient(
-                headers=headers,
-                follow_redirects=True,
-                timeout=60,
-                verify=False,
-            ) as client:
-                res = await client.get(feed_link)
-            html = res.text
-            rss_d = feed_parse(html)
+            rss_d = await RssFetcher.fetch(feed_link)
             last_title = rss_d.entries[0]["title"]
             if rss_d.entries[0].get("size"):
                 size = int(rss_d.entries[0]["size"])
@@ -196,6 +314,8 @@ async def rss_sub(_, message, pre_event):
                             "tag": tag,
                         },
                     }
+                rss_matchers.pop((user_id, title), None)
+                RssFetcher.forget(feed_link)
             LOGGER.info(
                 f"Rss Feed Added: id: {user_id} - title: {title} - link: {feed_link} - c: {cmd} - inf: {inf} - exf: {exf} - stv {stv}",
             )
@@ -256,6 +376,8 @@ async def rss_update(_, message, pre_event, state):
                 rss_dict[user_id][title]["paused"] = True
             elif state == "resume":
                 rss_dict[user_id][title]["paused"] = False
+                # A 304 would hide what was posted while it was paused
+                RssFetcher.forget(rss_dict[user_id][title]["link"])
         if state == "resume":
             if scheduler.state == 2:
                 scheduler.resume()
@@ -352,15 +474,7 @@ async def rss_get(_, message, pre_event):
                     message,
                     f"Getting the last <b>{count}</b> item(s) from {title}",
                 )
-                async with AsyncClient(
-                    headers=headers,
-                    follow_redirects=True,
-                    timeout=60,
-                    verify=False,
-                ) as client:
-                    res = await client.get(data["link"])
-                html = res.text
-                rss_d = feed_parse(html)
+                rss_d = await RssFetcher.fetch(data["link"])
                 item_info = ""
                 for item_num in range(count):
                     try:
@@ -443,6 +557,8 @@ async def rss_edit(_, message, pre_event):
                         y = x.split(" or ")
                         exf_lists.append(y)
                 rss_dict[user_id][title]["exf"] = exf_lists
+            rss_matchers.pop((user_id, title), None)
+            RssFetcher.forget(rss_dict[user_id][title]["link"])
     if updated:
         await database.rss_update(user_id)
     await update_rss_menu(pre_event)
@@ -603,6 +719,7 @@ Timeout: 60 sec. Argument -c for command and arguments
             async with rss_dict_lock:
                 for title in list(rss_dict[int(data[2])].keys()):
                     rss_dict[int(data[2])][title]["paused"] = False
+                    RssFetcher.forget(rss_dict[int(data[2])][title]["link"])
             if scheduler.state == 2:
                 scheduler.resume()
             await database.rss_update(int(data[2]))
@@ -630,6 +747,7 @@ Timeout: 60 sec. Argument -c for command and arguments
                 for user in list(rss_dict.keys()):
                     for title in list(rss_dict[user].keys()):
                         rss_dict[int(data[2])][title]["paused"] = False
+                        RssFetcher.forget(rss_dict[user][title]["link"])
             if scheduler.state == 2:
                 scheduler.resume()
             elif not scheduler.running:
@@ -674,6 +792,97 @@ Timeout: 60 sec. Argument -c for command and arguments
             await query.answer(text="Already Running!", show_alert=True)
 
 
+def _feed_items(rss_d):
+    """(title, link, size) of every entry of a parsed feed, newest first."""
+    items = []
+    for entry in rss_d.entries:
+        try:
+            url = entry["links"][1]["href"]
+        except IndexError:
+            url = entry["link"]
+        if entry.get("size"):
+            size = int(entry["size"])
+        elif entry.get("summary"):
+            sizes = [match[0] for match in size_regex.findall(entry["summary"])]
+            size = get_size_bytes(sizes[0]) if sizes else 0
+        else:
+            size = 0
+        items.append((entry["title"], url, size))
+    return items
+
+
+async def _check_subscription(user, title, data, items, rss_chat_id, rss_topic_id):
+    last_title, last_link, _ = items[0]
+    if data["last_feed"] == last_link or data["last_title"] == last_title:
+        return
+    matcher = RssMatcher.get(user, title, data)
+    for feed_count, (item_title, url, size) in enumerate(items):
+        if data["last_feed"] == url or data["last_title"] == item_title:
+            break
+        if feed_count == len(items) - 1:
+            LOGGER.warning(
+                f"Reached Max index no. {feed_count + 1} for this feed: {title}. Maybe you need to use less RSS_DELAY to not miss some torrents",
+            )
+        if not matcher.match(item_title):
+            continue
+        if command := data["command"]:
+            if size and Config.RSS_SIZE_LIMIT and size > Config.RSS_SIZE_LIMIT:
+                continue
+            cmd = command.split(maxsplit=1)
+            cmd.insert(1, url)
+            feed_msg = " ".join(cmd)
+            if not feed_msg.startswith("/"):
+                feed_msg = f"/{feed_msg}"
+        else:
+            feed_msg = f"<b>Name: </b><code>{item_title.replace('>', '').replace('<', '')}</code>"
+            feed_msg += f"\n\n<b>Link: </b><code>{url}</code>"
+            if size:
+                feed_msg += f"\n<b>Size: </b>{get_readable_file_size(size)}"
+        feed_msg += f"\n<b>Tag: </b><code>{data['tag']}</code> <code>{user}</code>"
+        await RssSender.send(feed_msg, rss_chat_id, rss_topic_id)
+    async with rss_dict_lock:
+        if user not in rss_dict or not rss_dict[user].get(title, False):
+            return
+        rss_dict[user][title].update(
+            {"last_feed": last_link, "last_title": last_title},
+        )
+    await database.rss_update(user)
+    LOGGER.info(f"Feed Name: {title}")
+    LOGGER.info(f"Last item: {last_link}")
+
+
+async def _check_feed(link, subscriptions, rss_chat_id, rss_topic_id):
+    """Fetch link once and hand its entries to every subscription to it."""
+    try:
+        rss_d = await RssFetcher.fetch(link, conditional=True)
+        if rss_d is None:
+            return
+        items = _feed_items(rss_d)
+    except Exception as e:
+        RssFetcher.forget(link)
+        LOGGER.error(f"{e} - Feed Link: {link}")
+        return
+    if not items:
+        return
+    for user, title, data in subscriptions:
+        try:
+            await _check_subscription(
+                user,
+                title,
+                data,
+                items,
+                rss_chat_id,
+                rss_topic_id,
+            )
+        except RssShutdownException as ex:
+            RssFetcher.forget(link)
+            LOGGER.info(ex)
+            return
+        except Exception as e:
+            RssFetcher.forget(link)
+            LOGGER.error(f"{e} - Feed Name: {title} - Feed Link: {link}")
+
+
 async def rss_monitor():
     chat = Config.RSS_CHAT
     if not chat:
@@ -683,7 +892,6 @@ async def rss_monitor():
     if len(rss_dict) == 0:
         scheduler.pause()
         return
-    all_paused = True
     rss_topic_id = rss_chat_id = None
     if isinstance(chat, int):
         rss_chat_id = chat
@@ -693,141 +901,20 @@ async def rss_monitor():
         ]
     elif chat.lstrip("-").isdigit():
         rss_chat_id = int(chat)
+    feeds = defaultdict(list)
     for user, items in list(rss_dict.items()):
-        for title, data in items.items():
-            try:
-                if data["paused"]:
-                    continue
-                tries = 0
-                while True:
-                    try:
-                        async with AsyncClient(
-                            headers=headers,
-                            follow_redirects=True,
-                            timeout=60,
-                            verify=False,
-                        ) as client:
-                            res = await client.get(data["link"])
-                        html = res.text
-                        break
-                    except Exception:
-                        tries += 1
-                        if tries > 3:
-                            raise
-                        continue
-                rss_d = feed_parse(html)
-                try:
-                    last_link = rss_d.entries[0]["links"][1]["href"]
-                except IndexError:
-                    last_link = rss_d.entries[0]["link"]
-                finally:
-                    all_paused = False
-                last_title = rss_d.entries[0]["title"]
-                if (
-                    data["last_feed"] == last_link
-                    or data["last_title"] == last_title
-                ):
-                    continue
-                feed_count = 0
-                while True:
-                    try:
-                        await sleep(10)
-                    except Exception:
-                        raise RssShutdownException("Rss Monitor Stopped!") from None
-                    try:
-                        item_title = rss_d.entries[feed_count]["title"]
-                        try:
-                            url = rss_d.entries[feed_count]["links"][1]["href"]
-                        except IndexError:
-                            url = rss_d.entries[feed_count]["link"]
-                        if (
-                            data["last_feed"] == url
-                            or data["last_title"] == item_title
-                        ):
-                            break
-                        if rss_d.entries[feed_count].get("size"):
-                            size = int(rss_d.entries[feed_count]["size"])
-                        elif rss_d.entries[feed_count].get("summary"):
-                            summary = rss_d.entries[feed_count]["summary"]
-                            matches = size_regex.findall(summary)
-                            sizes = [match[0] for match in matches]
-                            size = get_size_bytes(sizes[0])
-                        else:
-                            size = 0
-                    except IndexError:
-                        LOGGER.warning(
-                            f"Reached Max index no. {feed_count} for this feed: {title}. Maybe you need to use less RSS_DELAY to not miss some torrents",
-                        )
-                        break
-                    parse = True
-                    for flist in data["inf"]:
-                        if (
-                            data.get("sensitive", False)
-                            and all(
-                                x.lower() not in item_title.lower() for x in flist
-                            )
-                        ) or (
-                            not data.get("sensitive", False)
-                            and all(x not in item_title for x in flist)
-                        ):
-                            parse = False
-                            feed_count += 1
-                            break
-                    if not parse:
-                        continue
-                    for flist in data["exf"]:
-                        if (
-                            data.get("sensitive", False)
-                            and any(x.lower() in item_title.lower() for x in flist)
-                        ) or (
-                            not data.get("sensitive", False)
-                            and any(x in item_title for x in flist)
-                        ):
-                            parse = False
-                            feed_count += 1
-                            break
-                    if not parse:
-                        continue
-                    if command := data["command"]:
-                        if (
-                            size
-                            and Config.RSS_SIZE_LIMIT
-                            and size > Config.RSS_SIZE_LIMIT
-                        ):
-                            feed_count += 1
-                            continue
-                        cmd = command.split(maxsplit=1)
-                        cmd.insert(1, url)
-                        feed_msg = " ".join(cmd)
-                        if not feed_msg.startswith("/"):
-                            feed_msg = f"/{feed_msg}"
-                    else:
-                        feed_msg = f"<b>Name: </b><code>{item_title.replace('>', '').replace('<', '')}</code>"
-                        feed_msg += f"\n\n<b>Link: </b><code>{url}</code>"
-                        if size:
-                            feed_msg += (
-                                f"\n<b>Size: </b>{get_readable_file_size(size)}"
-                            )
-                    feed_msg += f"\n<b>Tag: </b><code>{data['tag']}</code> <code>{user}</code>"
-                    await send_rss(feed_msg, rss_chat_id, rss_topic_id)
-                    feed_count += 1
-                async with rss_dict_lock:
-                    if user not in rss_dict or not rss_dict[user].get(title, False):
-                        continue
-                    rss_dict[user][title].update(
-                        {"last_feed": last_link, "last_title": last_title},
-                    )
-                await database.rss_update(user)
-                LOGGER.info(f"Feed Name: {title}")
-                LOGGER.info(f"Last item: {last_link}")
-            except RssShutdownException as ex:
-                LOGGER.info(ex)
-                break
-            except Exception as e:
-                LOGGER.error(f"{e} - Feed Name: {title} - Feed Link: {data['link']}")
-                continue
-    if all_paused:
+        for title, data in list(items.items()):
+            if not data["paused"]:
+                feeds[data["link"]].append((user, title, data))
+    if not feeds:
         scheduler.pause()
+        return
+    await gather(
+        *(
+            _check_feed(link, subscriptions, rss_chat_id, rss_topic_id)
+            for link, subscriptions in feeds.items()
+        ),
+    )
 
 
 def add_job():
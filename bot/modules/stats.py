@@ -14,7 +14,7 @@ from psutil import (
 )
 
 from bot import bot_start_time
-from bot.helper.ext_utils.bot_utils import cmd_exec, new_task
+from bot.helper.ext_utils.bot_utils import THREAD_POOLS, cmd_exec, new_task
 from bot.helper.ext_utils.status_utils import (
     get_readable_file_size,
     get_readable_time,
@@ -36,6 +36,21 @@ commands = {
 }
 
 
+def get_pools_stats():
+    msg = ""
+    for name, pool in THREAD_POOLS.items():
+        stats = pool.stats()
+        waits = " ".join(
+            f"{bucket}:{count}"
+            for bucket, count in stats["wait_histogram"].items()
+            if count
+        )
+        msg += f"<b>{name}:</b> {stats['running']}/{stats['workers']} running | {stats['queued']} queued | max wait {stats['max_wait']:.2f}s\n"
+        if waits:
+            msg += f"<code>{waits}</code>\n"
+    return msg
+
+
 @new_task
 async def bot_stats(_, message):
     total, used, free, disk = disk_usage("/")
@@ -72,6 +87,9 @@ async def bot_stats(_, message):
 <b>yt-dlp:</b> {commands["yt-dlp"]}
 <b>ffmpeg:</b> {commands["ffmpeg"]}
 <b>7z:</b> {commands["7z"]}
+
+<b>Thread Pools:</b>
+{get_pools_stats()}
 """
     reply_message = await send_message(message, stats)
     await delete_message(message)
@@ -2,7 +2,7 @@ from time import time
 
 from psutil import cpu_percent, disk_usage, virtual_memory
 
-from bot import bot_start_time, intervals, status_dict, task_dict, task_dict_lock
+from bot import bot_start_time, status_dict, task_dict, task_dict_lock
 from bot.core.config_manager import Config
 from bot.helper.ext_utils.bot_utils import new_task
 from bot.helper.ext_utils.status_utils import (
@@ -39,10 +39,6 @@ async def task_status(_, message):
             user_id = message.from_user.id if text[1] == "me" else int(text[1])
         else:
             user_id = 0
-            sid = message.chat.id
-            if obj := intervals["status"].get(sid):
-                obj.cancel()
-                del intervals["status"][sid]
         await send_status_message(message, user_id)
         await delete_message(message)
 
@@ -310,6 +310,7 @@ class YtDlp(TaskListener):
         args = {
             "-doc": False,
             "-med": False,
+            "-nc": False,
             "-s": False,
             "-b": False,
             "-z": False,
@@ -373,6 +374,7 @@ class YtDlp(TaskListener):
         self.thumbnail_layout = args["-tl"]
         self.as_doc = args["-doc"]
         self.as_med = args["-med"]
+        self.no_cache = args["-nc"]
         self.metadata = args["-md"]
         self.folder_name = f"/{args['-m']}" if len(args["-m"]) > 0 else ""
 
@@ -482,7 +484,12 @@ class YtDlp(TaskListener):
         options["playlist_items"] = "0"
 
         try:
-            result = await sync_to_async(extract_info, self.link, options)
+            result = await sync_to_async(
+                extract_info,
+                self.link,
+                options,
+                workload="io-long",
+            )
         except Exception as e:
             msg = str(e).replace("<", " ").replace(">", " ")
             await send_message(self.message, f"{self.tag} {msg}")
@@ -9,6 +9,7 @@ DATABASE_URL = ""
 
 # OPTIONAL CONFIG
 USER_SESSION_STRING = ""
+TELEGRAM_DL_CONNECTIONS = 4
 DOWNLOAD_DIR = "/usr/src/app/downloads/"
 CMD_SUFFIX = ""
 AUTHORIZED_CHATS = ""
@@ -38,6 +39,10 @@ LEECH_FILENAME_CAPTION = ""
 # GDrive Tools
 GDRIVE_ID = ""
 IS_TEAM_DRIVE = False
+GDRIVE_UPLOAD_WORKERS = 4
+GDRIVE_CLONE_WORKERS = 4
+GDRIVE_DOWNLOAD_WORKERS = 4
+GDRIVE_INDEX_INTERVAL = 0
 STOP_DUPLICATE = False
 INDEX_URL = ""
 
@@ -63,8 +68,11 @@ AS_DOCUMENT = False
 MEDIA_GROUP = False
 USER_TRANSMISSION = False
 MIXED_LEECH = False
+HELPER_BOT_TOKENS = ""
+LEECH_PARALLEL_UPLOADS = 4
 LEECH_FILENAME_PREFIX = ""
 LEECH_DUMP_CHAT = ""
+LEECH_CACHE = True
 THUMBNAIL_LAYOUT = ""
 
 # qBittorrent/Aria2c